@@ -29,7 +29,7 @@ from bot.responses import (
     UNKNOWN_MONITORING,
     URL_NOT_REACHABLE,
 )
-from core.dependencies import get_monitoring_service
+from core.dependencies import get_freshness_tracker, get_monitoring_service
 from services.monitoring import MonitoringSpec
 from services.validator import UrlValidator
 
@@ -272,4 +272,28 @@ async def _send_status(message: types.Message, task):
     status_text += f"🕒 *Last updated:* {format_datetime(task.last_updated)}\n"
     status_text += f"📦 *Last item sent:* {format_datetime(task.last_got_item)}\n"
 
+    tracker = get_freshness_tracker()
+    summary = await tracker.summary(task.id) if tracker is not None else None
+    if summary is not None:
+        status_text += (
+            f"⏱ *Delivery lag:* p50 {_format_lag(summary.p50)}, "
+            f"p90 {_format_lag(summary.p90)}, p99 {_format_lag(summary.p99)} "
+            f"({summary.count} items)\n"
+        )
+
     await message.answer(status_text, parse_mode="Markdown")
+
+
+def _format_lag(seconds: float) -> str:
+    """Format *seconds* as ``45s``, ``3m 20s``, ``2h 5m`` or ``1d 3h``."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
@@ -0,0 +1,114 @@
+"""Instrumentation of update handling.
+
+:class:`InstrumentationMiddleware` wraps every update as the outermost
+user middleware.  It measures the whole update and records it per handler
+and outcome, together with the time spent in repository and validator calls
+(see :mod:`tools.tracing`).  Updates slower than ``slow_threshold_s`` are
+logged with that breakdown and the FSM state they arrived in.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, Final
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import TelegramObject
+
+from core.metrics import Histogram
+from tools.tracing import current_trace, reset_trace, start_trace
+
+__all__ = [
+    "HANDLER_DOWNSTREAM_SECONDS",
+    "HANDLER_SECONDS",
+    "HandlerNameMiddleware",
+    "InstrumentationMiddleware",
+    "setup_instrumentation",
+]
+
+logger: Final = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+
+HANDLER_SECONDS: Final = Histogram(
+    "bot_handler_duration_seconds",
+    "Time to handle one update",
+    ("handler", "outcome"),
+)
+HANDLER_DOWNSTREAM_SECONDS: Final = Histogram(
+    "bot_handler_downstream_seconds",
+    "Time one update spent in downstream calls",
+    ("handler", "category"),
+)
+
+
+class InstrumentationMiddleware(BaseMiddleware):
+    """Outer update middleware timing every update end to end."""
+
+    def __init__(self, *, slow_threshold_s: float = 1.0) -> None:
+        self._slow_threshold_s = slow_threshold_s
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: Dict[str, Any]
+    ) -> Any:
+        trace, token = start_trace()
+        outcome = "ok"
+        try:
+            result = await handler(event, data)
+            if result is UNHANDLED:
+                outcome = "unhandled"
+            return result
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            reset_trace(token)
+            elapsed = trace.elapsed()
+            HANDLER_SECONDS.labels(trace.handler, outcome).observe(elapsed)
+            for category, (_calls, seconds) in trace.spans.items():
+                HANDLER_DOWNSTREAM_SECONDS.labels(trace.handler, category).observe(
+                    seconds
+                )
+            if elapsed >= self._slow_threshold_s:
+                breakdown = " ".join(
+                    f"{category}={int(calls)} calls/{seconds:.3f}s"
+                    for category, (calls, seconds) in sorted(trace.spans.items())
+                )
+                logger.warning(
+                    "Slow update %s: handler=%s state=%s outcome=%s total=%.3fs %s",
+                    getattr(event, "update_id", "?"),
+                    trace.handler,
+                    data.get("raw_state"),
+                    outcome,
+                    elapsed,
+                    breakdown or "no downstream calls",
+                )
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Inner middleware naming the handler chosen for the traced update."""
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: Dict[str, Any]
+    ) -> Any:
+        trace = current_trace()
+        handler_object = data.get("handler")
+        if trace is not None and handler_object is not None:
+            trace.handler = getattr(
+                handler_object.callback, "__name__", type(handler_object).__name__
+            )
+        return await handler(event, data)
+
+
+def setup_instrumentation(dp: Dispatcher, *, slow_threshold_s: float = 1.0) -> None:
+    """Register the instrumentation middlewares on *dp*.
+
+    Must run after the Dispatcher is created so the FSM middleware runs first
+    and ``raw_state`` is available.
+    """
+    dp.update.outer_middleware(
+        InstrumentationMiddleware(slow_threshold_s=slow_threshold_s)
+    )
+    for observer in (dp.message, dp.callback_query):
+        observer.middleware(HandlerNameMiddleware())
@@ -0,0 +1,140 @@
+"""Webhook delivery of Telegram updates through an aiohttp server.
+
+Instead of long-polling ``getUpdates``, Telegram POSTs every update to
+``WEBHOOK_URL + WEBHOOK_PATH`` and the app feeds it into the same
+``Dispatcher`` the polling mode uses.  Requests must carry the
+``X-Telegram-Bot-Api-Secret-Token`` header configured with ``set_webhook``.
+Several replicas can serve the same path behind a load balancer – the FSM
+state lives in Redis.
+
+Try it locally without Telegram::
+
+    curl -X POST localhost:8080/webhook \\
+        -H 'X-Telegram-Bot-Api-Secret-Token: <WEBHOOK_SECRET>' \\
+        -H 'Content-Type: application/json' \\
+        -d '{"update_id": 1, "message": {"message_id": 1, "date": 0,
+             "chat": {"id": 1, "type": "private"}, "text": "/start"}}'
+
+``GET /ready`` answers 200 once the webhook is registered and every
+readiness check passes, 503 otherwise.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Final, Sequence
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+__all__ = ["create_webhook_app", "mark_ready", "run_webhook"]
+
+logger: Final = logging.getLogger(__name__)
+
+ReadinessCheck = Callable[[], Awaitable[object]]
+
+_READY_KEY: Final = web.AppKey("ready", asyncio.Event)
+_CHECKS_KEY: Final = web.AppKey("readiness_checks", tuple)
+
+
+def create_webhook_app(
+    dp: Dispatcher,
+    bot: Bot,
+    *,
+    path: str = "/webhook",
+    secret_token: str | None = None,
+    handle_in_background: bool = True,
+    checks: Sequence[ReadinessCheck] = (),
+) -> web.Application:
+    """Build the aiohttp app receiving updates for *dp* on *path*.
+
+    With *handle_in_background* every update is answered immediately and
+    processed in its own task, so slow handlers do not hold up others.
+    *checks* are awaited by ``/ready``; any exception marks the app not ready.
+    A *secret_token* is required – without it anyone could post forged
+    updates for any chat.
+    """
+    if not secret_token:
+        raise ValueError("WEBHOOK_SECRET is required in webhook mode")
+    app = web.Application()
+    app[_READY_KEY] = asyncio.Event()
+    app[_CHECKS_KEY] = tuple(checks)
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=secret_token,
+        handle_in_background=handle_in_background,
+    ).register(app, path=path)
+    app.router.add_get("/ready", _ready)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def mark_ready(app: web.Application, ready: bool = True) -> None:
+    """Flip the readiness flag reported by ``/ready``."""
+    if ready:
+        app[_READY_KEY].set()
+    else:
+        app[_READY_KEY].clear()
+
+
+async def _ready(request: web.Request) -> web.Response:
+    app = request.app
+    if not app[_READY_KEY].is_set():
+        return web.json_response({"status": "starting"}, status=503)
+    for check in app[_CHECKS_KEY]:
+        try:
+            await check()
+        except Exception as e:
+            logger.warning(f"Readiness check failed: {e}")
+            return web.json_response({"status": "unavailable"}, status=503)
+    return web.json_response({"status": "ready"})
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    *,
+    base_url: str,
+    path: str = "/webhook",
+    secret_token: str | None = None,
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    handle_in_background: bool = True,
+    checks: Sequence[ReadinessCheck] = (),
+) -> None:
+    """Serve the webhook app and register it with Telegram until cancelled.
+
+    The webhook is left registered on shutdown so other replicas keep
+    receiving updates.
+    """
+    if not base_url:
+        raise ValueError("WEBHOOK_URL is required in webhook mode")
+    if not secret_token:
+        raise ValueError("WEBHOOK_SECRET is required in webhook mode")
+    app = create_webhook_app(
+        dp,
+        bot,
+        path=path,
+        secret_token=secret_token,
+        handle_in_background=handle_in_background,
+        checks=checks,
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+    logger.info("Webhook server listening on %s:%d%s", host, port, path)
+    try:
+        await bot.set_webhook(
+            f"{base_url.rstrip('/')}{path}",
+            secret_token=secret_token,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        mark_ready(app)
+        await asyncio.Event().wait()
+    finally:
+        mark_ready(app, False)
+        await runner.cleanup()
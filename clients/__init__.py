@@ -7,8 +7,10 @@ from typing import Optional
 import httpx
 
 from core.config import settings
+from core.metrics import Gauge
 
-from .topn_db_client import TopnDbClient
+from .resilience import CircuitBreaker, RetryPolicy
+from .topn_db_client import DEFAULT_TIMEOUTS, TopnDbClient
 
 _client: Optional[httpx.AsyncClient] = None
 
@@ -34,4 +36,19 @@ async def close_client():
         _client = None
 
 
-topn_db_client = TopnDbClient(base_url=settings.TOPN_DB_BASE_URL, client=get_client())
+topn_db_client = TopnDbClient(
+    base_url=settings.TOPN_DB_BASE_URL,
+    client=get_client(),
+    retry=RetryPolicy(attempts=settings.TOPN_DB_RETRY_ATTEMPTS),
+    breaker=CircuitBreaker(
+        failure_threshold=settings.TOPN_DB_BREAKER_FAILURES,
+        reset_timeout_s=settings.TOPN_DB_BREAKER_RESET_SECONDS,
+    ),
+    timeouts={**DEFAULT_TIMEOUTS, "": settings.TOPN_DB_TIMEOUT_SECONDS},
+)
+
+Gauge(
+    "topn_db_circuit_open",
+    "1 while the topn-db circuit breaker fails calls fast",
+    function=lambda: float(topn_db_client.breaker.is_open),
+)
@@ -0,0 +1,198 @@
+"""Compact typed models for topn-db payloads.
+
+Tasks and items are plain ``__slots__`` classes: no per-instance ``__dict__``
+and attribute access instead of dict lookups.  The ``decode_*`` helpers turn
+raw response bytes straight into these models (with ``orjson`` when it is
+installed) so large ``items-to-send`` / item listing payloads never exist as
+nested dicts for longer than the parse.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Final, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover – optional speed-up
+    orjson = None
+
+__all__ = [
+    "Item",
+    "MonitoringTask",
+    "decode_items",
+    "decode_tasks",
+    "loads",
+]
+
+_MISSING: Final = object()
+
+
+def loads(content: bytes) -> Any:
+    """Parse JSON *content* using the fastest available parser."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class MonitoringTask:
+    """Represents a monitoring task."""
+
+    __slots__ = (
+        "id",
+        "chat_id",
+        "name",
+        "url",
+        "last_updated",
+        "last_got_item",
+        "created_at",
+        "is_active",
+    )
+
+    def __init__(self, data: Dict[str, Any]):
+        get = data.get
+        self.id = get("id")
+        self.chat_id = get("chat_id")
+        self.name = get("name")
+        self.url = get("url")
+        self.last_updated = get("last_updated")
+        self.last_got_item = get("last_got_item")
+        self.created_at = get("created_at")
+        self.is_active = get("is_active", True)
+
+    @classmethod
+    def coerce(cls, task: Any) -> Any:
+        """Return *task* as a model (dicts are converted, others kept)."""
+        return cls(task) if isinstance(task, dict) else task
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"MonitoringTask(id={self.id!r}, chat_id={self.chat_id!r}, name={self.name!r})"
+
+    @staticmethod
+    async def has_url_for_chat(client: Any, chat_id: str, url: str) -> bool:
+        """Check if URL is already monitored for the given chat."""
+        try:
+            tasks_response = await client.get_tasks_by_chat_id(chat_id)
+            tasks = tasks_response.get("tasks", [])
+            return any(task.get("url") == url for task in tasks)
+        except Exception:
+            return False
+
+
+_ITEM_FIELDS: Final = (
+    "id",
+    "title",
+    "price",
+    "location",
+    "created_at",
+    "created_at_pretty",
+    "image_url",
+    "item_url",
+    "description",
+    "source",
+    "source_url",
+)
+_ITEM_FIELD_SET: Final = frozenset(_ITEM_FIELDS)
+
+
+class Item:
+    """An OLX item record.
+
+    Fields missing from the payload stay *unset* (``getattr`` with a default
+    returns the default), so ``None`` and absent values remain distinguishable.
+    Unknown keys are kept in ``extra`` so :meth:`to_dict` round-trips.
+    """
+
+    __slots__ = _ITEM_FIELDS + ("extra",)
+
+    def __init__(self, **fields: Any):
+        self.extra = None
+        for key, value in fields.items():
+            self._set(key, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Item":
+        item = cls.__new__(cls)
+        item.extra = None
+        for key, value in data.items():
+            item._set(key, value)
+        return item
+
+    @classmethod
+    def coerce(cls, item: Any) -> Any:
+        """Return *item* as a model (dicts are converted, others kept)."""
+        return cls.from_dict(item) if isinstance(item, dict) else item
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Dict-style access kept for callers written against raw payloads."""
+        value = getattr(self, name, _MISSING) if name in _ITEM_FIELD_SET else _MISSING
+        if value is _MISSING:
+            return (self.extra or {}).get(name, default)
+        return value
+
+    def __getitem__(self, name: str) -> Any:
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            name: value
+            for name in _ITEM_FIELDS
+            if (value := getattr(self, name, _MISSING)) is not _MISSING
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Item):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Item({self.to_dict()!r})"
+
+    def _set(self, key: str, value: Any) -> None:
+        if key in _ITEM_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+
+def _items(raw: Any) -> Any:
+    if isinstance(raw, dict):
+        # Batch payload: task id → item list
+        return {key: _item_list(value) for key, value in raw.items()}
+    return _item_list(raw)
+
+
+def _item_list(raw: Optional[Iterable[Dict[str, Any]]]) -> list:
+    from_dict = Item.from_dict
+    return [from_dict(item) for item in raw or ()]
+
+
+def decode_items(content: bytes) -> Dict[str, Any]:
+    """Decode a response whose ``items`` hold item records into :class:`Item`."""
+    data = loads(content)
+    if isinstance(data, dict) and "items" in data:
+        data["items"] = _items(data["items"])
+    return data
+
+
+def decode_tasks(content: bytes) -> Dict[str, Any]:
+    """Decode a response whose ``tasks`` hold tasks into :class:`MonitoringTask`."""
+    data = loads(content)
+    if isinstance(data, dict) and "tasks" in data:
+        data["tasks"] = [MonitoringTask(task) for task in data["tasks"] or ()]
+    return data
@@ -0,0 +1,145 @@
+"""Retry and circuit-breaker primitives for the topn-db client.
+
+:class:`RetryPolicy` retries idempotent requests on transport errors and
+transient 5xx/429 responses with jittered exponential backoff.
+:class:`CircuitBreaker` counts consecutive failed calls; once the threshold
+is reached it *opens* and rejects calls immediately with
+:class:`CircuitOpenError`.  After ``reset_timeout_s`` it lets a single probe
+through (*half-open*): success closes the circuit, failure opens it again.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Final, FrozenSet
+
+import httpx
+
+__all__ = ["CircuitBreaker", "CircuitOpenError", "RetryPolicy", "is_server_failure"]
+
+logger: Final = logging.getLogger(__name__)
+
+CLOSED: Final = "closed"
+OPEN: Final = "open"
+HALF_OPEN: Final = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+def is_server_failure(error: BaseException) -> bool:
+    """Return True if *error* means the server is unhealthy (not our request)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request."""
+
+    attempts: int = 3
+    base_delay_s: float = 0.2
+    max_delay_s: float = 2.0
+    methods: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    statuses: FrozenSet[int] = frozenset({429, 502, 503, 504})
+
+    def should_retry(self, method: str, error: BaseException, attempt: int) -> bool:
+        """Return True if *attempt* (0-based) failing with *error* may be retried."""
+        if attempt + 1 >= self.attempts or method.upper() not in self.methods:
+            return False
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.statuses
+        return isinstance(error, httpx.TransportError)
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number *attempt*."""
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2**attempt))
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open probe → closed."""
+
+    def __init__(
+        self,
+        *,
+        name: str = "topn-db",
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state; an expired open circuit reads as half-open."""
+        if self._state == OPEN and self._retry_in() <= 0:
+            return HALF_OPEN
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are rejected (not yet due for a probe)."""
+        return self.state == OPEN
+
+    def before_call(self) -> None:
+        """Admit a call or raise :class:`CircuitOpenError`."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probing:
+            # Let exactly one probe through to test recovery
+            self._state = HALF_OPEN
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"{self.name} circuit is open, retry in {max(0.0, self._retry_in()):.1f}s"
+        )
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            logger.info("Circuit %s closed", self.name)
+        self._state = CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_abandoned(self) -> None:
+        """The admitted call finished without an outcome (e.g. cancelled)."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != OPEN:
+                logger.warning(
+                    "Circuit %s opened after %d failures", self.name, self._failures
+                )
+            self._state = OPEN
+            self._opened_at = self._clock()
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State and counters for health checks and metrics."""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "rejected": self.rejected,
+            "retry_in_s": max(0.0, self._retry_in()) if self._state == OPEN else 0.0,
+        }
+
+    def _retry_in(self) -> float:
+        return self._opened_at + self._reset_timeout_s - self._clock()
@@ -1,24 +1,103 @@
+import asyncio
+import re
+import time
 from logging import getLogger
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
 import httpx
 
+from core.metrics import Histogram
+
+from .models import Item, decode_items, decode_tasks
+from .resilience import CircuitBreaker, RetryPolicy, is_server_failure
+
 logger = getLogger(__name__)
 
+# Fetches one page of items given (skip, limit)
+PageFetcher = Callable[[int, int], Awaitable[Dict[str, Any]]]
+
+# Per-endpoint request timeouts (seconds), matched by the longest prefix
+DEFAULT_TIMEOUTS: Dict[str, float] = {
+    "": 10.0,
+    "/health": 3.0,
+    "/api/v1/items/cleanup/": 120.0,
+}
+
+REQUEST_SECONDS = Histogram(
+    "topn_db_request_duration_seconds",
+    "Latency of topn-db API calls as seen by the caller",
+    ("method", "endpoint"),
+)
+# Ids and item URLs in paths are replaced so the endpoint label stays bounded
+_PATH_PARAMS = re.compile(r"/by-url/.*|/-?\d+(?=/|$)")
+_MAX_LATENCY_CHILDREN = 1024
+_latency_children: Dict[Tuple[str, str], Any] = {}
+
+
+def _endpoint_template(endpoint: str) -> str:
+    """``/api/v1/tasks/42/items-to-send`` -> ``/api/v1/tasks/{id}/items-to-send``."""
+    return _PATH_PARAMS.sub(
+        lambda m: "/by-url/{url}" if m.group().startswith("/by-url/") else "/{id}",
+        endpoint,
+    )
+
+
+def _latency_child(method: str, endpoint: str):
+    """Histogram child for a raw *endpoint*, cached per concrete path."""
+    key = (method, endpoint)
+    child = _latency_children.get(key)
+    if child is None:
+        child = REQUEST_SECONDS.labels(method, _endpoint_template(endpoint))
+        if len(_latency_children) < _MAX_LATENCY_CHILDREN:
+            _latency_children[key] = child
+    return child
+
 
 class TopnDbClient:
     """Client for communicating with the OLX Database API."""
 
-    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None):
+    def __init__(
+        self,
+        base_url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        single_flight: bool = True,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        timeouts: Optional[Mapping[str, float]] = None,
+    ):
         """Initialize the database client.
 
         Args:
             base_url: Base URL of the database API
             client: Optional httpx.AsyncClient instance. If not provided, a new one will be created.
+            single_flight: Share one in-flight request between concurrent identical GETs
+            retry: Retry policy for idempotent requests (default: RetryPolicy())
+            breaker: Circuit breaker failing fast while the API is down
+            timeouts: Endpoint prefix -> timeout in seconds (default: DEFAULT_TIMEOUTS)
         """
         self.base_url = base_url.rstrip("/")
         self.client = client or httpx.AsyncClient()
         self._own_client = client is None
+        self._single_flight = single_flight
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.requests_sent = 0
+        self.requests_coalesced = 0
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        # Longest prefix first so the most specific timeout wins
+        self._timeouts = sorted(
+            (timeouts or DEFAULT_TIMEOUTS).items(), key=lambda kv: -len(kv[0])
+        )
 
     async def __aenter__(self):
         return self
@@ -27,51 +106,175 @@ class TopnDbClient:
         if self._own_client:
             await self.client.aclose()
 
+    @property
+    def single_flight_stats(self) -> Dict[str, int]:
+        """Counters of sent and coalesced requests (for monitoring)."""
+        return {
+            "sent": self.requests_sent,
+            "coalesced": self.requests_coalesced,
+            "in_flight": len(self._inflight),
+        }
+
     async def _make_request(
         self,
         method: str,
         endpoint: str,
         json_data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        decoder: Optional[Callable[[bytes], Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        with_etag: bool = False,
     ) -> Dict[str, Any]:
         """Make an HTTP request to the API.
 
+        Concurrent identical GET requests share one in-flight request and
+        receive the same response object, which callers must not mutate.
+
         Args:
             method: HTTP method (GET, POST, PUT, DELETE)
             endpoint: API endpoint (without base URL)
             json_data: JSON data to send in request body
             params: Query parameters
+            decoder: Turns the raw response body into the result (default: JSON)
+            headers: Extra request headers (e.g. ``If-None-Match``)
+            with_etag: Add the response ``ETag`` to the result as ``"etag"``
 
         Returns:
             Response data as dictionary
 
         Raises:
             httpx.HTTPStatusError: If the request fails
+            CircuitOpenError: If the API failed repeatedly and is not called
         """
+        started = time.perf_counter()
+        try:
+            if (
+                not self._single_flight
+                or method != "GET"
+                or json_data is not None
+                or headers is not None
+                or with_etag
+            ):
+                return await self._send_request(
+                    method, endpoint, json_data, params, decoder, headers, with_etag
+                )
+
+            # Values as query-string text so the key is always hashable
+            key = (
+                endpoint,
+                tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+            )
+            task = self._inflight.get(key)
+            if task is not None:
+                self.requests_coalesced += 1
+            else:
+                task = asyncio.ensure_future(
+                    self._send_request(method, endpoint, json_data, params, decoder)
+                )
+                self._inflight[key] = task
+                task.add_done_callback(lambda t: self._request_done(key, t))
+            # A cancelled waiter must not cancel the request shared with others
+            return await asyncio.shield(task)
+        finally:
+            _latency_child(method, endpoint).observe(time.perf_counter() - started)
+
+    def _request_done(self, key: Tuple, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        decoder: Optional[Callable[[bytes], Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        with_etag: bool = False,
+    ) -> Dict[str, Any]:
         url = f"{self.base_url}{endpoint}"
+        timeout = self._timeout_for(endpoint)
 
-        logger.debug(f"Making {method} request to {url}")
-
+        # Fail fast without touching the network while the circuit is open
+        self.breaker.before_call()
+        attempt = 0
         try:
-            response = await self.client.request(
-                method=method, url=url, json=json_data, params=params
-            )
-            response.raise_for_status()
+            while True:
+                logger.debug(f"Making {method} request to {url}")
+                self.requests_sent += 1
+                try:
+                    response = await self.client.request(
+                        method=method,
+                        url=url,
+                        json=json_data,
+                        params=params,
+                        headers=headers,
+                        timeout=timeout,
+                    )
+                    # 304 answers a conditional request, it is not an error
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                    break
+                except Exception as e:
+                    # Stop retrying once other calls opened the circuit
+                    if (
+                        not self.retry.should_retry(method, e, attempt)
+                        or self.breaker.is_open
+                    ):
+                        raise
+                    delay = self.retry.delay(attempt)
+                    logger.warning(
+                        f"Retrying {method} {url} in {delay:.2f}s after: {e!r}"
+                    )
+                    attempt += 1
+                    await asyncio.sleep(delay)
+            self.breaker.record_success()
 
             # Handle 204 No Content responses
             if response.status_code == 204:
                 return {"success": True}
 
-            return response.json()
+            # Handle 304 Not Modified answers to conditional requests
+            if response.status_code == 304:
+                return {"not_modified": True}
+
+            if decoder is not None:
+                result = decoder(response.content)
+            else:
+                result = response.json()
+            if with_etag and isinstance(result, dict):
+                result["etag"] = response.headers.get("ETag")
+            return result
 
         except httpx.HTTPStatusError as e:
+            self._record_outcome(e)
             logger.error(
                 f"HTTP error {e.response.status_code} for {method} {url}: {e.response.text}"
             )
             raise
         except Exception as e:
+            self._record_outcome(e)
             logger.error(f"Request failed for {method} {url}: {str(e)}")
             raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+
+    def _record_outcome(self, error: Exception) -> None:
+        if is_server_failure(error):
+            self.breaker.record_failure()
+        else:
+            # The API answered (4xx) or decoding failed – it is reachable
+            self.breaker.record_success()
+
+    def _timeout_for(self, endpoint: str) -> Any:
+        for prefix, timeout in self._timeouts:
+            if endpoint.startswith(prefix):
+                return timeout
+        return httpx.USE_CLIENT_DEFAULT
 
     # ==================== API Root & Health ====================
 
@@ -87,7 +290,7 @@ class TopnDbClient:
 
     async def get_all_tasks(self) -> Dict[str, Any]:
         """Get all monitoring tasks."""
-        return await self._make_request("GET", "/api/v1/tasks/")
+        return await self._make_request("GET", "/api/v1/tasks/", decoder=decode_tasks)
 
     async def get_tasks_by_chat_id(self, chat_id: str) -> Dict[str, Any]:
         """Get tasks by chat ID."""
@@ -124,7 +327,40 @@ class TopnDbClient:
 
     async def get_pending_tasks(self) -> Dict[str, Any]:
         """Get pending tasks ready for processing."""
-        return await self._make_request("GET", "/api/v1/tasks/pending")
+        return await self._make_request(
+            "GET", "/api/v1/tasks/pending", decoder=decode_tasks
+        )
+
+    async def get_pending_tasks_if_changed(
+        self, etag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get pending tasks unless they still match *etag*.
+
+        Returns ``{"not_modified": True}`` on 304, otherwise the task list with
+        the new ``etag`` (None if the server sends none).
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        return await self._make_request(
+            "GET",
+            "/api/v1/tasks/pending",
+            decoder=decode_tasks,
+            headers=headers,
+            with_etag=True,
+        )
+
+    async def get_pending_task_changes(self, cursor: str) -> Dict[str, Any]:
+        """Get changes to the pending tasks since *cursor*.
+
+        The response holds the changed or newly pending ``tasks``, the ids of
+        ``removed`` tasks and the next ``cursor``.  An expired cursor is
+        answered with 410 Gone.
+        """
+        return await self._make_request(
+            "GET",
+            "/api/v1/tasks/pending/changes",
+            params={"since": cursor},
+            decoder=decode_tasks,
+        )
 
     async def update_last_got_item_timestamp(self, task_id: int) -> Dict[str, Any]:
         """Update the last_got_item timestamp for a task."""
@@ -134,28 +370,151 @@ class TopnDbClient:
 
     async def get_items_to_send_for_task(self, task_id: int) -> Dict[str, Any]:
         """Get items to send for a specific monitoring task."""
-        return await self._make_request("GET", f"/api/v1/tasks/{task_id}/items-to-send")
+        return await self._make_request(
+            "GET", f"/api/v1/tasks/{task_id}/items-to-send", decoder=decode_items
+        )
+
+    # ==================== Batch Operations ====================
+
+    async def get_items_to_send_for_tasks(self, task_ids: List[int]) -> Dict[str, Any]:
+        """Get items to send for several tasks in one request.
+
+        The response maps task ids (as strings) to item lists under ``items``.
+        """
+        return await self._make_request(
+            "POST",
+            "/api/v1/tasks/items-to-send/batch",
+            json_data={"task_ids": task_ids},
+            decoder=decode_items,
+        )
+
+    async def update_tasks_bulk(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Update several tasks at once; every update must contain ``id``."""
+        return await self._make_request(
+            "PATCH", "/api/v1/tasks/batch", json_data={"tasks": updates}
+        )
+
+    async def update_last_got_item_timestamps(
+        self, task_ids: List[int]
+    ) -> Dict[str, Any]:
+        """Update the last_got_item timestamp for several tasks."""
+        return await self._make_request(
+            "POST",
+            "/api/v1/tasks/update-last-got-item/batch",
+            json_data={"task_ids": task_ids},
+        )
 
     # ==================== Item Records ====================
 
     async def get_all_items(self, skip: int = 0, limit: int = 100) -> Dict[str, Any]:
         """Get all items with pagination."""
         params = {"skip": skip, "limit": limit}
-        return await self._make_request("GET", "/api/v1/items/", params=params)
+        return await self._make_request(
+            "GET", "/api/v1/items/", params=params, decoder=decode_items
+        )
 
     async def get_items_by_source_url(
-        self, source_url: str, limit: int = 100
+        self, source_url: str, limit: int = 100, skip: int = 0
     ) -> Dict[str, Any]:
         """Get items filtered by source URL."""
         params = {"source_url": source_url, "limit": limit}
-        return await self._make_request("GET", "/api/v1/items/by-source", params=params)
+        if skip:
+            params["skip"] = skip
+        return await self._make_request(
+            "GET", "/api/v1/items/by-source", params=params, decoder=decode_items
+        )
 
     async def get_recent_items(
-        self, hours: int = 24, limit: int = 100
+        self, hours: int = 24, limit: int = 100, skip: int = 0
     ) -> Dict[str, Any]:
         """Get recent items from the last N hours."""
         params = {"hours": hours, "limit": limit}
-        return await self._make_request("GET", "/api/v1/items/recent", params=params)
+        if skip:
+            params["skip"] = skip
+        return await self._make_request(
+            "GET", "/api/v1/items/recent", params=params, decoder=decode_items
+        )
+
+    # ==================== Streaming Item Listings ====================
+
+    def iter_all_items(
+        self, page_size: int = 100, prefetch: bool = True
+    ) -> AsyncIterator[Item]:
+        """Yield every item, fetching ``page_size`` items per request."""
+        return self._iter_pages(
+            lambda skip, limit: self.get_all_items(skip=skip, limit=limit),
+            page_size,
+            prefetch,
+        )
+
+    def iter_items_by_source_url(
+        self, source_url: str, page_size: int = 100, prefetch: bool = True
+    ) -> AsyncIterator[Item]:
+        """Yield every item found for *source_url*, page by page."""
+        return self._iter_pages(
+            lambda skip, limit: self.get_items_by_source_url(
+                source_url, limit=limit, skip=skip
+            ),
+            page_size,
+            prefetch,
+        )
+
+    def iter_recent_items(
+        self, hours: int = 24, page_size: int = 100, prefetch: bool = True
+    ) -> AsyncIterator[Item]:
+        """Yield every item from the last *hours*, page by page."""
+        return self._iter_pages(
+            lambda skip, limit: self.get_recent_items(
+                hours=hours, limit=limit, skip=skip
+            ),
+            page_size,
+            prefetch,
+        )
+
+    async def _iter_pages(
+        self, fetch: PageFetcher, page_size: int, prefetch: bool
+    ) -> AsyncIterator[Item]:
+        """Stream items from offset-paginated *fetch* in constant memory.
+
+        With *prefetch* the request for the next page is started before the
+        current page is handed out, so consuming a page overlaps with fetching
+        the next one.  Iteration ends at the first short page, or at a page
+        bringing no item missing from the previous one – a server ignoring
+        ``skip`` would otherwise return the first page forever.  Offsets are
+        not a snapshot: rows inserted or deleted during a scan can shift pages.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        skip = 0
+        previous: set = set()
+        next_page: Optional[asyncio.Future] = asyncio.ensure_future(
+            fetch(skip, page_size)
+        )
+        try:
+            while next_page is not None:
+                items = (await next_page).get("items") or []
+                next_page = None
+                keys = {_item_key(item) for item in items} - {None}
+                if keys and keys <= previous:
+                    logger.warning(
+                        f"Page at offset {skip} repeats the previous one,"
+                        " the server may not support skip; stopping"
+                    )
+                    return
+                previous = keys
+                skip += len(items)
+                more = len(items) >= page_size
+                if more and prefetch:
+                    next_page = asyncio.ensure_future(fetch(skip, page_size))
+                for item in items:
+                    yield item
+                if more and not prefetch:
+                    next_page = asyncio.ensure_future(fetch(skip, page_size))
+        finally:
+            if next_page is not None:
+                # Consumer stopped early: drop the prefetched page
+                next_page.cancel()
+                next_page.add_done_callback(_discard_result)
 
     async def get_item_by_id(self, item_id: int) -> Dict[str, Any]:
         """Get item by ID."""
@@ -185,3 +544,14 @@ class TopnDbClient:
         """Legacy method - use create_item instead."""
         logger.warning("add_item is deprecated, use create_item instead")
         return await self.create_item(item_data)
+
+
+def _item_key(item: Any) -> Any:
+    """Identity of a listed item: its id, else its URL."""
+    key = item.get("id")
+    return key if key is not None else item.get("item_url")
+
+
+def _discard_result(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
@@ -1,6 +1,7 @@
 """Define configuration settings using Pydantic and manage environment variables."""
 
 from logging import getLogger
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -19,12 +20,101 @@ class Settings(BaseSettings):
 
     CHECK_FREQUENCY_SECONDS: int = 10
 
+    # Update delivery: "polling" (getUpdates) or "webhook" (aiohttp server
+    # receiving POSTs at WEBHOOK_URL + WEBHOOK_PATH)
+    BOT_DELIVERY_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    # Required in webhook mode: Telegram sends it in the
+    # X-Telegram-Bot-Api-Secret-Token header and other requests are refused
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    # Answer Telegram at once and process each update in its own task
+    WEBHOOK_BACKGROUND: bool = True
+    # Log updates slower than this with a repository / validator breakdown
+    SLOW_UPDATE_SECONDS: float = 1.0
+
+    # Notifier settings
+    # Max parallel item fetches per cycle; ``1`` uses the sequential cycle
+    NOTIFIER_CONCURRENCY: int = 10
+    # Deliver photos as send_media_group albums and merge plain texts
+    NOTIFIER_ALBUMS: bool = True
+    # Fetch items / update idle tasks with topn-db batch endpoints
+    NOTIFIER_BATCH: bool = True
+    # Run the notifier inside the polling bot; disable when running
+    # ``python -m services.notifier_worker`` separately
+    RUN_NOTIFIER_IN_BOT: bool = True
+    # Worker processes started by ``services.notifier_worker``
+    NOTIFIER_WORKERS: int = 2
+    # Coordinate several notifier nodes/processes with Redis shard leases
+    NOTIFIER_COORDINATION: bool = False
+    NOTIFIER_SHARDS: int = 64
+    NOTIFIER_LEASE_SECONDS: int = 30
+    # Hosts running NOTIFIER_WORKERS coordinated workers each; the bot-wide
+    # TELEGRAM_GLOBAL_RATE is split between all of their workers
+    NOTIFIER_HOSTS: int = 1
+
+    # Telegram file_id cache for photos (stored in Redis)
+    PHOTO_CACHE_ENABLED: bool = True
+    PHOTO_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    PHOTO_CACHE_MAX_ENTRIES: int = 50_000
+
+    # Durable outbound queue (Redis Streams) between polling and sending
+    NOTIFIER_OUTBOX: bool = False
+    OUTBOX_STREAM: str = "notifier:outbox"
+    OUTBOX_CONSUMERS: int = 4
+    OUTBOX_MAX_DELIVERIES: int = 5
+
+    # Push mode: process tasks named on a Redis stream of new-item events;
+    # the full check then only runs every NOTIFIER_SAFETY_POLL_SECONDS
+    NOTIFIER_PUSH: bool = False
+    ITEM_EVENTS_STREAM: str = "items:new"
+    NOTIFIER_SAFETY_POLL_SECONDS: int = 5 * 60
+
+    # Lag from listing creation to delivery per monitoring (kept in Redis,
+    # shown by /status); unused monitorings expire after the TTL
+    FRESHNESS_TRACKING: bool = True
+    FRESHNESS_TTL_SECONDS: int = 30 * 24 * 60 * 60
+
+    # Adaptive per-task polling based on observed listing arrival rates
+    ADAPTIVE_POLLING: bool = False
+    ADAPTIVE_MIN_INTERVAL_SECONDS: int = 10
+    ADAPTIVE_MAX_INTERVAL_SECONDS: int = 15 * 60
+
+    # Telegram rate limits (messages per second unless stated otherwise)
+    TELEGRAM_GLOBAL_RATE: float = 30.0
+    TELEGRAM_PRIVATE_CHAT_RATE: float = 1.0
+    TELEGRAM_GROUP_CHAT_PER_MINUTE: float = 20.0
+
+    # Prometheus exposition on METRICS_PORT; notifier worker i of
+    # services.notifier_worker uses METRICS_PORT + 1 + i
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 9100
+
     TOPN_DB_BASE_URL: str
+    # Resilience of topn-db calls: default timeout, retries and circuit breaker
+    TOPN_DB_TIMEOUT_SECONDS: float = 10.0
+    TOPN_DB_RETRY_ATTEMPTS: int = 3
+    TOPN_DB_BREAKER_FAILURES: int = 5
+    TOPN_DB_BREAKER_RESET_SECONDS: float = 30.0
 
     # DB settings
+    # Persistence backend: "topn_db" (HTTP API) or "sqlite" (embedded file)
+    REPOSITORY_BACKEND: Literal["topn_db", "sqlite"] = "topn_db"
+    SQLITE_PATH: str = "monitoring.db"
     DB_REMOVE_OLD_ITEMS_DATA_N_DAYS: int = 7
 
     # Redis settings for state persistence
+    # Read-through cache of per-chat task lists (Redis-backed when shared)
+    TASK_CACHE_ENABLED: bool = True
+    TASK_CACHE_TTL_SECONDS: int = 30
+    TASK_CACHE_MAX_CHATS: int = 10_000
+    TASK_CACHE_REDIS: bool = False
+    # Sync pending tasks by delta cursor / ETag instead of full listings
+    TASK_DELTA_SYNC: bool = True
+
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
 
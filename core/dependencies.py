@@ -5,7 +5,10 @@ Provides singleton access to services throughout the application.
 
 from typing import Optional
 
-from repositories.monitoring import MonitoringRepository
+from core.config import settings
+from repositories.cache import TaskListCache
+from repositories.monitoring import MonitoringRepository, MonitoringRepositoryProtocol
+from services.freshness import FreshnessTracker
 from services.monitoring import MonitoringService
 from services.validator import UrlValidator
 
@@ -15,7 +18,8 @@ class ServiceContainer:
 
     _instance: Optional["ServiceContainer"] = None
     _monitoring_service: Optional[MonitoringService] = None
-    _repository: Optional[MonitoringRepository] = None
+    _repository: Optional[MonitoringRepositoryProtocol] = None
+    _freshness_tracker: Optional[FreshnessTracker] = None
 
     def __new__(cls) -> "ServiceContainer":
         if cls._instance is None:
@@ -25,7 +29,7 @@ class ServiceContainer:
     def initialize(self) -> None:
         """Initialize all services."""
         if self._monitoring_service is None:
-            self._repository = MonitoringRepository()
+            self._repository = create_repository()
             validator = UrlValidator()
             self._monitoring_service = MonitoringService(self._repository, validator)
 
@@ -35,12 +39,60 @@ class ServiceContainer:
             self.initialize()
         return self._monitoring_service
 
-    def get_repository(self) -> MonitoringRepository:
+    def get_repository(self) -> MonitoringRepositoryProtocol:
         """Get the repository instance."""
         if self._repository is None:
             self.initialize()
         return self._repository
 
+    def get_freshness_tracker(self) -> Optional[FreshnessTracker]:
+        """Get the delivery lag tracker (None if ``FRESHNESS_TRACKING`` is off)."""
+        if self._freshness_tracker is None and settings.FRESHNESS_TRACKING:
+            self._freshness_tracker = create_freshness_tracker()
+        return self._freshness_tracker
+
+
+def create_repository() -> MonitoringRepositoryProtocol:
+    """Build the repository of the configured ``REPOSITORY_BACKEND``."""
+    if settings.REPOSITORY_BACKEND == "sqlite":
+        # Imported lazily so the default backend does not need aiosqlite
+        from repositories.sqlite import SqliteMonitoringRepository
+
+        return SqliteMonitoringRepository(
+            settings.SQLITE_PATH, pending_interval_s=settings.CHECK_FREQUENCY_SECONDS
+        )
+    return MonitoringRepository(
+        cache=create_task_cache(), delta_sync=settings.TASK_DELTA_SYNC
+    )
+
+
+def create_task_cache() -> Optional[TaskListCache]:
+    """Build the task list cache configured in ``settings`` (None if off)."""
+    if not settings.TASK_CACHE_ENABLED:
+        return None
+    redis_client = None
+    if settings.TASK_CACHE_REDIS:
+        import redis.asyncio as redis
+
+        redis_client = redis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True
+        )
+    return TaskListCache(
+        ttl_s=settings.TASK_CACHE_TTL_SECONDS,
+        max_chats=settings.TASK_CACHE_MAX_CHATS,
+        redis=redis_client,
+    )
+
+
+def create_freshness_tracker() -> FreshnessTracker:
+    """Build the Redis-backed tracker the notifier workers record lags into."""
+    import redis.asyncio as redis
+
+    redis_client = redis.Redis(
+        host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True
+    )
+    return FreshnessTracker(redis_client, ttl_s=settings.FRESHNESS_TTL_SECONDS)
+
 
 # Global service container instance
 _container = ServiceContainer()
@@ -51,6 +103,11 @@ def get_monitoring_service() -> MonitoringService:
     return _container.get_monitoring_service()
 
 
-def get_repository() -> MonitoringRepository:
+def get_repository() -> MonitoringRepositoryProtocol:
     """Get the global repository instance."""
     return _container.get_repository()
+
+
+def get_freshness_tracker() -> Optional[FreshnessTracker]:
+    """Get the global delivery lag tracker (None when disabled)."""
+    return _container.get_freshness_tracker()
@@ -0,0 +1,341 @@
+"""In-process metrics primitives and their Prometheus text exposition.
+
+Children of labelled metrics are created once per label combination and
+cached, so observing on the hot path is a dict lookup (or none, when the
+child is kept) plus a few arithmetic operations – no locks are needed under
+asyncio's single thread.
+
+Metrics register themselves in :data:`REGISTRY`, which
+:func:`start_metrics_server` serves as ``GET /metrics``::
+
+    curl localhost:9100/metrics
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+from typing import Callable, Dict, Final, Iterator, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+__all__ = [
+    "DEFAULT_LATENCY_BUCKETS",
+    "EVENT_LOOP_LAG_SECONDS",
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "create_metrics_app",
+    "monitor_loop_lag",
+    "start_metrics_server",
+]
+
+logger: Final = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS: Final = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+CONTENT_TYPE: Final = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    """Metrics exported together; a later metric replaces one of the same name."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics[metric.name] = metric
+
+    def unregister(self, metric: "_Metric") -> None:
+        if self._metrics.get(metric.name) is metric:
+            del self._metrics[metric.name]
+
+    def expose(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY: Final = Registry()
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, *values: object):
+        """Return the child for the label *values* (created on first use)."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def children(self) -> Dict[Tuple[str, ...], object]:
+        return dict(self._children)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def _labels_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape_label(value)}"'
+            for name, value in zip(self.labelnames, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing total, optionally labelled."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter by *amount*."""
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{self._labels_text(key)} {_format(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, optionally labelled.
+
+    An unlabelled gauge may instead read its value from *function* whenever
+    it is exposed, which keeps the hot path free of any bookkeeping.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+        function: Optional[Callable[[], float]] = None,
+    ) -> None:
+        if function is not None and labelnames:
+            raise ValueError("Only unlabelled gauges can read from a function")
+        super().__init__(name, documentation, labelnames, registry)
+        self._function = function
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge to *value*."""
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the unlabelled gauge from *function* at exposition time."""
+        if self.labelnames:
+            raise ValueError("Only unlabelled gauges can read from a function")
+        self._function = function
+
+    def samples(self) -> Iterator[str]:
+        if self._function is not None:
+            try:
+                value = float(self._function())
+            except Exception as e:
+                logger.error(f"Error reading gauge {self.name}: {e}")
+                return
+            yield f"{self.name} {_format(value)}"
+            return
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{self._labels_text(key)} {_format(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "buckets", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._bounds = bounds
+        # One counter per upper bound plus +Inf (not cumulative)
+        self.buckets = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """``(upper bound, observations <= bound)`` pairs ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self._bounds + (float("inf"),), self.buckets):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values, optionally labelled."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self._bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._bounds)
+
+    def observe(self, value: float) -> None:
+        """Observe *value* on the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            for bound, count in child.cumulative():
+                le = f'le="{_format(bound)}"'
+                yield f"{self.name}_bucket{self._labels_text(key, le)} {count}"
+            yield f"{self.name}_sum{self._labels_text(key)} {_format(child.sum)}"
+            yield f"{self.name}_count{self._labels_text(key)} {child.count}"
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ---------------------------------------------------------------------------
+# Event-loop lag
+# ---------------------------------------------------------------------------
+EVENT_LOOP_LAG_SECONDS: Final = Histogram(
+    "event_loop_lag_seconds",
+    "How late a periodic timer fired on the asyncio event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+async def monitor_loop_lag(interval_s: float = 0.5) -> None:
+    """Sleep *interval_s* forever and record how late every wake-up was.
+
+    Anything blocking the loop (CPU-bound work, sync I/O) delays the timer
+    and shows up as lag.
+    """
+    loop = asyncio.get_running_loop()
+    child = EVENT_LOOP_LAG_SECONDS.labels()
+    while True:
+        expected = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        child.observe(max(0.0, loop.time() - expected))
+
+
+# ---------------------------------------------------------------------------
+# HTTP exposition
+# ---------------------------------------------------------------------------
+_REGISTRY_KEY: Final = web.AppKey("metrics_registry", Registry)
+
+
+def create_metrics_app(registry: Registry = REGISTRY) -> web.Application:
+    """Build an aiohttp app serving *registry* on ``GET /metrics``."""
+    app = web.Application()
+    app[_REGISTRY_KEY] = registry
+    app.router.add_get("/metrics", _metrics)
+    return app
+
+
+async def _metrics(request: web.Request) -> web.Response:
+    body = request.app[_REGISTRY_KEY].expose()
+    return web.Response(body=body.encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(
+    host: str = "0.0.0.0", port: int = 9100, registry: Registry = REGISTRY
+) -> web.AppRunner:
+    """Serve ``/metrics`` on *host*:*port*; call ``cleanup()`` on the result to stop."""
+    runner = web.AppRunner(create_metrics_app(registry), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logger.info("Metrics server listening on %s:%d", host, port)
+    return runner
@@ -12,11 +12,14 @@ from aiogram.fsm.storage.redis import RedisStorage
 from bot.fsm import StartMonitoringForm, StatusForm, StopMonitoringForm
 from bot.handlers import monitoring as monitoring_handlers
 from bot.keyboards import MAIN_MENU_KEYBOARD
+from bot.middlewares import setup_instrumentation
+from bot.webhook import run_webhook
 from core.config import settings
-from core.dependencies import get_monitoring_service, get_repository
+from core.dependencies import get_repository
+from core.metrics import monitor_loop_lag, start_metrics_server
 
 # Dependency injection – business & infrastructure layers
-from services.notifier import Notifier
+from services.notifier_worker import create_notifier, run_notifier
 
 file_handler = TimedRotatingFileHandler(
     filename="bot.log",
@@ -52,9 +55,13 @@ async def telegram_main():
     bot = Bot(token=settings.BOT_TOKEN)
 
     # Get services from singleton container
-    mon_service = get_monitoring_service()
     repo = get_repository()
-    notifier = Notifier(bot, mon_service)
+
+    # Per-update latency and downstream call instrumentation
+    setup_instrumentation(dp, slow_threshold_s=settings.SLOW_UPDATE_SECONDS)
+    if settings.METRICS_ENABLED:
+        await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
+        asyncio.create_task(monitor_loop_lag())
 
     # Register FSM handlers
     dp.message.register(
@@ -88,20 +95,37 @@ async def telegram_main():
     async def status_button(message: types.Message, state: FSMContext):
         await monitoring_handlers.status_command(message, state)
 
-    # Start periodic check for new items
-    logger.info("Starting periodic check for new items...")
-    asyncio.create_task(notifier.run_periodically(settings.CHECK_FREQUENCY_SECONDS))
+    if settings.RUN_NOTIFIER_IN_BOT:
+        # Start periodic check for new items
+        logger.info("Starting periodic check for new items...")
+        asyncio.create_task(run_notifier(create_notifier(bot, redis_client)))
     asyncio.create_task(
         repo.remove_old_items_data_infinitely(settings.DB_REMOVE_OLD_ITEMS_DATA_N_DAYS)
     )
 
-    # Start polling
-    logger.info("Starting bot polling...")
     chat_id = settings.CHAT_IDS
     try:
         await bot.send_message(chat_id=chat_id, text="BOT WAS STARTED")
         logger.info(f"Bot started notification sent to chat_id {chat_id}")
-        await dp.start_polling(bot)
+        if settings.BOT_DELIVERY_MODE == "webhook":
+            logger.info("Starting webhook server...")
+            await run_webhook(
+                dp,
+                bot,
+                base_url=settings.WEBHOOK_URL,
+                path=settings.WEBHOOK_PATH,
+                secret_token=settings.WEBHOOK_SECRET,
+                host=settings.WEBHOOK_HOST,
+                port=settings.WEBHOOK_PORT,
+                handle_in_background=settings.WEBHOOK_BACKGROUND,
+                checks=[redis_client.ping],
+            )
+        else:
+            # Start polling
+            logger.info("Starting bot polling...")
+            # getUpdates is refused while a webhook from webhook mode is set
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except Exception as e:
         logger.critical(f"Fatal error in telegram_main: {e}", exc_info=True)
     finally:
@@ -0,0 +1,165 @@
+"""Read-through cache of per-chat monitoring task lists.
+
+Creating a monitoring, ``/status`` and the stop flow all look at the same
+chat's tasks within seconds; the cache answers those lookups from memory (or
+a shared Redis) instead of calling ``get_tasks_by_chat_id`` each time.
+
+Entries hold the raw task dicts plus indexed name / URL sets so duplicate
+checks are O(1).  They expire after ``ttl_s`` and are invalidated by the
+repository on writes.  Without Redis the cache is a process-local LRU bounded
+to ``max_chats``; with Redis every replica shares the entries.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Final, List, Optional, Sequence
+
+__all__ = ["TaskListCache"]
+
+logger: Final = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    tasks: tuple
+    names: frozenset
+    urls: frozenset
+    expires_at: float
+
+
+class TaskListCache:
+    """Chat id → task list cache with TTL, LRU bound and optional Redis."""
+
+    def __init__(
+        self,
+        *,
+        ttl_s: float = 30.0,
+        max_chats: int = 10_000,
+        redis: Any = None,
+        prefix: str = "task_cache",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl_s = ttl_s
+        self._max_chats = max_chats
+        self._redis = redis
+        self._prefix = prefix
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def get(self, chat_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached task dicts for *chat_id* or None on a miss."""
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self._key(chat_id, "tasks"))
+                return json.loads(raw) if raw is not None else None
+            except Exception as e:
+                logger.error(f"Error reading task cache: {e}")
+                return None
+        entry = self._local(chat_id)
+        return list(entry.tasks) if entry else None
+
+    async def has_name(self, chat_id: str, name: str) -> Optional[bool]:
+        """Return whether *chat_id* has a task *name* (None on a miss)."""
+        return await self._contains(chat_id, "names", name)
+
+    async def has_url(self, chat_id: str, url: str) -> Optional[bool]:
+        """Return whether *chat_id* monitors *url* (None on a miss)."""
+        return await self._contains(chat_id, "urls", url)
+
+    async def set(self, chat_id: str, tasks: Sequence[Dict[str, Any]]) -> None:
+        """Store the task dicts fetched for *chat_id*."""
+        tasks = tuple(tasks)
+        names = frozenset(t.get("name") for t in tasks if t.get("name") is not None)
+        urls = frozenset(t.get("url") for t in tasks if t.get("url") is not None)
+        if self._redis is not None:
+            await self._set_redis(chat_id, tasks, names, urls)
+            return
+        chat_id = str(chat_id)
+        self._entries[chat_id] = _Entry(tasks, names, urls, self._clock() + self._ttl_s)
+        self._entries.move_to_end(chat_id)
+        while len(self._entries) > self._max_chats:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, *chat_ids: str) -> None:
+        """Forget the cached tasks of *chat_ids* (after a write)."""
+        if not chat_ids:
+            return
+        if self._redis is not None:
+            keys = [
+                self._key(chat_id, kind)
+                for chat_id in chat_ids
+                for kind in ("tasks", "names", "urls")
+            ]
+            try:
+                await self._redis.delete(*keys)
+            except Exception as e:
+                logger.error(f"Error invalidating task cache: {e}")
+            return
+        for chat_id in chat_ids:
+            self._entries.pop(str(chat_id), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _local(self, chat_id: str) -> Optional[_Entry]:
+        chat_id = str(chat_id)
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            del self._entries[chat_id]
+            return None
+        self._entries.move_to_end(chat_id)
+        return entry
+
+    async def _contains(self, chat_id: str, kind: str, value: str) -> Optional[bool]:
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    # The tasks key marks presence – empty sets are not stored
+                    pipe.exists(self._key(chat_id, "tasks"))
+                    pipe.sismember(self._key(chat_id, kind), value)
+                    present, member = await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error reading task cache: {e}")
+                return None
+            return bool(member) if present else None
+        entry = self._local(chat_id)
+        if entry is None:
+            return None
+        return value in getattr(entry, kind)
+
+    async def _set_redis(
+        self, chat_id: str, tasks: tuple, names: frozenset, urls: frozenset
+    ) -> None:
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(chat_id, "names"), self._key(chat_id, "urls"))
+                if names:
+                    pipe.sadd(self._key(chat_id, "names"), *names)
+                    pipe.expire(self._key(chat_id, "names"), int(self._ttl_s))
+                if urls:
+                    pipe.sadd(self._key(chat_id, "urls"), *urls)
+                    pipe.expire(self._key(chat_id, "urls"), int(self._ttl_s))
+                pipe.set(
+                    self._key(chat_id, "tasks"),
+                    json.dumps(list(tasks), default=str),
+                    ex=int(self._ttl_s),
+                )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error writing task cache: {e}")
+
+    def _key(self, chat_id: str, kind: str) -> str:
+        return f"{self._prefix}:{chat_id}:{kind}"
@@ -9,13 +9,31 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Dict, Iterable, Protocol, Sequence
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+)
+
+import httpx
 
 from clients import topn_db_client
+from clients.models import Item, MonitoringTask
 from clients.topn_db_client import TopnDbClient
+from repositories.cache import TaskListCache
+from repositories.snapshot import PendingTaskSnapshot
 from tools.datetime_utils import now_warsaw
+from tools.tracing import trace_methods
 
 __all__ = [
+    "Item",
+    "MonitoringTask",
     "MonitoringRepositoryProtocol",
     "MonitoringRepository",
 ]
@@ -25,6 +43,13 @@ MINUTE = 60 * SECOND
 HOUR = 60 * MINUTE
 DAY = 24 * HOUR
 
+# Statuses meaning topn-db has no such batch endpoint (older server versions)
+BATCH_UNSUPPORTED_STATUSES = frozenset({404, 405, 501})
+# Parallel per-task requests when falling back from a batch endpoint
+FALLBACK_CONCURRENCY = 10
+# Status topn-db answers a delta request with once the cursor expired
+CURSOR_EXPIRED_STATUS = 410
+
 
 class MonitoringRepositoryProtocol(Protocol):
     """Abstract interface for monitoring persistence."""
@@ -53,54 +78,69 @@ class MonitoringRepositoryProtocol(Protocol):
     async def pending_tasks(self) -> Iterable[MonitoringTask]:  # noqa: D401
         """Return tasks that need to be checked for new items."""
 
+    async def active_tasks(self) -> Iterable[MonitoringTask]:  # noqa: D401
+        """Return every active task (to resolve new-item events)."""
+
     async def items_to_send(self, task: MonitoringTask):  # noqa: D401
         """Return new items that should be sent for *task*."""
 
-    async def update_last_got_item(self, chat_id: str) -> None:  # noqa: D401
-        """Update `last_got_item` timestamp after sending items."""
+    async def update_last_got_item(self, task: MonitoringTask) -> None:  # noqa: D401
+        """Update `last_got_item` timestamp of *task* after sending its items."""
 
     async def update_last_updated(self, task: MonitoringTask) -> None:  # noqa: D401
         """Update `last_updated` timestamp after checking for items."""
 
+    # --- Batch variants (one round trip per cycle) ---
+    async def items_to_send_many(
+        self, tasks: Sequence[MonitoringTask]
+    ) -> Dict[Any, list]:  # noqa: D401
+        """Return new items for several *tasks* keyed by task id."""
 
-# Simple data class to represent MonitoringTask since we're moving away from ORM
-class MonitoringTask:
-    """Represents a monitoring task."""
+    async def update_last_got_item_many(
+        self,
+        tasks: Sequence[MonitoringTask],
+        timestamps: Optional[Mapping[Any, str]] = None,
+    ) -> None:  # noqa: D401
+        """Update `last_got_item` of several *tasks* at once.
 
-    def __init__(self, data: Dict[str, Any]):
-        self.id = data.get("id")
-        self.chat_id = data.get("chat_id")
-        self.name = data.get("name")
-        self.url = data.get("url")
-        self.last_updated = data.get("last_updated")
-        self.last_got_item = data.get("last_got_item")
-        self.created_at = data.get("created_at")
-        self.is_active = data.get("is_active", True)
+        *timestamps* maps task ids to the value to store – when their items
+        were fetched; without one a task is stamped with the current time.
+        """
 
-    @staticmethod
-    async def has_url_for_chat(client: TopnDbClient, chat_id: str, url: str) -> bool:
-        """Check if URL is already monitored for the given chat."""
-        try:
-            tasks_response = await client.get_tasks_by_chat_id(chat_id)
-            tasks = tasks_response.get("tasks", [])
-            return any(task.get("url") == url for task in tasks)
-        except Exception:
-            return False
+    async def update_last_updated_many(
+        self, tasks: Sequence[MonitoringTask]
+    ) -> None:  # noqa: D401
+        """Update `last_updated` of several *tasks* at once."""
 
 
+@trace_methods("repository")
 class MonitoringRepository(MonitoringRepositoryProtocol):
     """Client-backed implementation using TopnDbClient for API communication."""
 
-    def __init__(self, client: TopnDbClient = None):
+    def __init__(
+        self,
+        client: TopnDbClient = None,
+        cache: TaskListCache | None = None,
+        delta_sync: bool = False,
+    ):
         self._client = client or topn_db_client
+        # Optional read-through cache of per-chat task lists
+        self._cache = cache
+        # Pending tasks synced by delta cursor / ETag instead of full listings
+        self._pending = PendingTaskSnapshot() if delta_sync else None
         self._logger = logging.getLogger(__name__)
+        # Batch endpoints the server answered 404/405/501 for
+        self._unsupported: set[str] = set()
 
     # ----------------- CRUD wrappers -----------------
     async def task_exists(self, chat_id: str, name: str) -> bool:  # noqa: D401
         """Return True if a task with *name* exists for *chat_id*."""
         try:
-            tasks_response = await self._client.get_tasks_by_chat_id(chat_id)
-            tasks = tasks_response.get("tasks", [])
+            if self._cache is not None:
+                found = await self._cache.has_name(chat_id, name)
+                if found is not None:
+                    return found
+            tasks = await self._chat_tasks(chat_id)
             return any(task.get("name") == name for task in tasks)
         except Exception as e:
             self._logger.error(f"Error checking if task exists: {e}")
@@ -108,7 +148,16 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
 
     async def has_url(self, chat_id: str, url: str) -> bool:  # noqa: D401
         """Return True if the *url* is already monitored for *chat_id*."""
-        return await MonitoringTask.has_url_for_chat(self._client, chat_id, url)
+        if self._cache is None:
+            return await MonitoringTask.has_url_for_chat(self._client, chat_id, url)
+        try:
+            found = await self._cache.has_url(chat_id, url)
+            if found is not None:
+                return found
+            tasks = await self._chat_tasks(chat_id)
+            return any(task.get("url") == url for task in tasks)
+        except Exception:
+            return False
 
     async def create_task(
         self, chat_id: str, name: str, url: str
@@ -121,6 +170,8 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
         except Exception as e:
             self._logger.error(f"Error creating task: {e}")
             raise
+        finally:
+            await self._invalidate(chat_id)
 
     async def delete_task(self, chat_id: str, name: str) -> None:
         """Delete monitoring task identified by *name* for the given chat."""
@@ -129,12 +180,13 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
         except Exception as e:
             self._logger.error(f"Error deleting task: {e}")
             raise
+        finally:
+            await self._invalidate(chat_id)
 
     async def list_tasks(self, chat_id: str) -> Sequence[MonitoringTask]:  # noqa: D401
         """Return all monitoring tasks for *chat_id*."""
         try:
-            response = await self._client.get_tasks_by_chat_id(chat_id)
-            tasks_data = response.get("tasks", [])
+            tasks_data = await self._chat_tasks(chat_id)
             return [MonitoringTask(task_data) for task_data in tasks_data]
         except Exception as e:
             self._logger.error(f"Error listing tasks: {e}")
@@ -144,13 +196,26 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
     async def pending_tasks(self) -> Iterable[MonitoringTask]:  # noqa: D401
         """Return tasks that need to be checked for new items."""
         try:
+            if self._pending is not None:
+                return await self._sync_pending()
             response = await self._client.get_pending_tasks()
             tasks_data = response.get("tasks", [])
-            return [MonitoringTask(task_data) for task_data in tasks_data]
+            # Already decoded into models by the client
+            return [MonitoringTask.coerce(task_data) for task_data in tasks_data]
         except Exception as e:
             self._logger.error(f"Error getting pending tasks: {e}")
             return []
 
+    async def active_tasks(self) -> Iterable[MonitoringTask]:  # noqa: D401
+        """Return every active task (to resolve new-item events)."""
+        try:
+            response = await self._client.get_all_tasks()
+            tasks = [MonitoringTask.coerce(task) for task in response.get("tasks", [])]
+            return [task for task in tasks if task.is_active]
+        except Exception as e:
+            self._logger.error(f"Error getting active tasks: {e}")
+            return []
+
     async def items_to_send(self, task: MonitoringTask):  # noqa: D401
         """Return new items that should be sent for *task*."""
         try:
@@ -160,15 +225,13 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
             self._logger.error(f"Error getting items to send: {e}")
             return []
 
-    async def update_last_got_item(self, chat_id: str) -> None:  # noqa: D401
-        """Update `last_got_item` timestamp after sending items."""
+    async def update_last_got_item(self, task: MonitoringTask) -> None:  # noqa: D401
+        """Update `last_got_item` timestamp of *task* after sending its items."""
         try:
-            # Find the task by chat_id first, then update
-            tasks = await self.list_tasks(chat_id)
-            for task in tasks:
-                await self._client.update_last_got_item_timestamp(task.id)
+            await self._client.update_last_got_item_timestamp(task.id)
         except Exception as e:
             self._logger.error(f"Error updating last_got_item: {e}")
+        await self._invalidate(task.chat_id)
 
     async def update_last_updated(self, task: MonitoringTask) -> None:  # noqa: D401
         """Update `last_updated` timestamp after checking for items."""
@@ -179,6 +242,173 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
         except Exception as e:
             self._logger.error(f"Error updating last_updated: {e}")
 
+    # ----------------- Batch helpers -----------------
+    async def items_to_send_many(
+        self, tasks: Sequence[MonitoringTask]
+    ) -> Dict[Any, list]:  # noqa: D401
+        """Return new items for several *tasks* keyed by task id.
+
+        Uses one batch request; falls back to per-task requests when the
+        server does not support batching.
+        """
+        if not tasks:
+            return {}
+        endpoint = "get_items_to_send_for_tasks"
+        if endpoint not in self._unsupported:
+            try:
+                response = await self._client.get_items_to_send_for_tasks(
+                    [task.id for task in tasks]
+                )
+                items = response.get("items", {})
+                return {task.id: items.get(str(task.id), []) for task in tasks}
+            except Exception as e:
+                if not self._mark_unsupported(endpoint, e):
+                    self._logger.error(f"Error getting items to send in batch: {e}")
+                    return {task.id: [] for task in tasks}
+        results = await _gather_bounded(self.items_to_send(task) for task in tasks)
+        return {task.id: items for task, items in zip(tasks, results)}
+
+    async def update_last_got_item_many(
+        self,
+        tasks: Sequence[MonitoringTask],
+        timestamps: Optional[Mapping[Any, str]] = None,
+    ) -> None:  # noqa: D401
+        """Update `last_got_item` of several *tasks* at once.
+
+        Given *timestamps* (by task id) are written as task fields, since the
+        dedicated endpoint always stamps the server's current time.
+        """
+        if not tasks:
+            return
+        if timestamps:
+            await self._update_last_got_item_at(tasks, timestamps)
+            return
+        endpoint = "update_last_got_item_timestamps"
+        if endpoint not in self._unsupported:
+            try:
+                await self._client.update_last_got_item_timestamps(
+                    [task.id for task in tasks]
+                )
+                await self._invalidate(*{task.chat_id for task in tasks})
+                return
+            except Exception as e:
+                if not self._mark_unsupported(endpoint, e):
+                    self._logger.error(f"Error updating last_got_item in batch: {e}")
+                    return
+        await _gather_bounded(self.update_last_got_item(task) for task in tasks)
+
+    async def update_last_updated_many(
+        self, tasks: Sequence[MonitoringTask]
+    ) -> None:  # noqa: D401
+        """Update `last_updated` of several *tasks* at once."""
+        if not tasks:
+            return
+        endpoint = "update_tasks_bulk"
+        if endpoint not in self._unsupported:
+            timestamp = now_warsaw().isoformat()
+            try:
+                await self._client.update_tasks_bulk(
+                    [{"id": task.id, "last_updated": timestamp} for task in tasks]
+                )
+                return
+            except Exception as e:
+                if not self._mark_unsupported(endpoint, e):
+                    self._logger.error(f"Error updating last_updated in batch: {e}")
+                    return
+        await _gather_bounded(self.update_last_updated(task) for task in tasks)
+
+    async def _update_last_got_item_at(
+        self, tasks: Sequence[MonitoringTask], timestamps: Mapping[Any, str]
+    ) -> None:
+        now = now_warsaw().isoformat()
+        updates = [
+            {"id": task.id, "last_got_item": timestamps.get(task.id, now)}
+            for task in tasks
+        ]
+        endpoint = "update_tasks_bulk"
+        if endpoint not in self._unsupported:
+            try:
+                await self._client.update_tasks_bulk(updates)
+                await self._invalidate(*{task.chat_id for task in tasks})
+                return
+            except Exception as e:
+                if not self._mark_unsupported(endpoint, e):
+                    self._logger.error(f"Error updating last_got_item in batch: {e}")
+                    return
+
+        async def update(task_id, stamp: str) -> None:
+            try:
+                await self._client.update_task(task_id, {"last_got_item": stamp})
+            except Exception as e:
+                self._logger.error(f"Error updating last_got_item: {e}")
+
+        await _gather_bounded(update(u["id"], u["last_got_item"]) for u in updates)
+        await self._invalidate(*{task.chat_id for task in tasks})
+
+    async def _sync_pending(self) -> List[MonitoringTask]:
+        """Bring the pending task snapshot up to date and return its tasks.
+
+        Prefers the changes since the last cursor; otherwise sends the last
+        ETag and keeps the snapshot on 304.  Servers supporting neither get a
+        plain full listing every time.
+        """
+        snapshot = self._pending
+        endpoint = "get_pending_task_changes"
+        if snapshot.cursor is not None and endpoint not in self._unsupported:
+            try:
+                response = await self._client.get_pending_task_changes(snapshot.cursor)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == CURSOR_EXPIRED_STATUS:
+                    self._logger.info("Pending task cursor expired, resyncing")
+                    snapshot.reset()
+                elif not self._mark_unsupported(endpoint, e):
+                    raise
+            else:
+                snapshot.apply(
+                    response.get("tasks", []),
+                    response.get("removed", []),
+                    response.get("cursor") or snapshot.cursor,
+                )
+                return snapshot.tasks
+
+        response = await self._client.get_pending_tasks_if_changed(snapshot.etag)
+        if response.get("not_modified"):
+            snapshot.not_modified += 1
+        else:
+            snapshot.replace(
+                response.get("tasks", []),
+                cursor=response.get("cursor"),
+                etag=response.get("etag"),
+            )
+        return snapshot.tasks
+
+    async def _chat_tasks(self, chat_id: str) -> List[Dict[str, Any]]:
+        """Return the raw task dicts of *chat_id*, through the cache if any."""
+        if self._cache is not None:
+            cached = await self._cache.get(chat_id)
+            if cached is not None:
+                return cached
+        response = await self._client.get_tasks_by_chat_id(chat_id)
+        tasks = response.get("tasks", [])
+        if self._cache is not None:
+            await self._cache.set(chat_id, tasks)
+        return tasks
+
+    async def _invalidate(self, *chat_ids: str) -> None:
+        if self._cache is not None:
+            await self._cache.invalidate(*chat_ids)
+
+    def _mark_unsupported(self, endpoint: str, error: Exception) -> bool:
+        """Remember *endpoint* as missing if *error* says so; return True then."""
+        if (
+            isinstance(error, httpx.HTTPStatusError)
+            and error.response.status_code in BATCH_UNSUPPORTED_STATUSES
+        ):
+            self._logger.warning(f"topn-db does not support {endpoint}, falling back")
+            self._unsupported.add(endpoint)
+            return True
+        return False
+
     async def remove_old_items_data_infinitely(self, n_days: int) -> None:
         """Remove old items data in an infinite loop."""
         while True:
@@ -188,3 +418,14 @@ class MonitoringRepository(MonitoringRepositoryProtocol):
             except Exception as e:
                 self._logger.error(f"Error cleaning up old items: {e}")
             await asyncio.sleep(DAY)
+
+
+async def _gather_bounded(coros: Iterable[Awaitable[Any]]) -> List[Any]:
+    """Await *coros* with at most ``FALLBACK_CONCURRENCY`` in flight."""
+    semaphore = asyncio.Semaphore(FALLBACK_CONCURRENCY)
+
+    async def run(coro: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
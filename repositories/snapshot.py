@@ -0,0 +1,85 @@
+"""Local snapshot of the pending monitoring tasks.
+
+The notifier asks for the pending tasks every few seconds and the answer
+rarely changes.  :class:`PendingTaskSnapshot` keeps the last answer together
+with the sync validators topn-db handed out (a delta ``cursor`` and/or an
+``ETag``) so the repository can request only what changed, or nothing at all
+on ``304 Not Modified``.
+
+Updates are applied in place: a task that is still pending keeps its
+:class:`MonitoringTask` object and only has its fields refreshed.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from clients.models import MonitoringTask
+
+__all__ = ["PendingTaskSnapshot"]
+
+
+class PendingTaskSnapshot:
+    """Pending tasks keyed by id plus the cursor / ETag they were synced at."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Any, MonitoringTask] = {}
+        self.cursor: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.not_modified = 0
+
+    @property
+    def tasks(self) -> List[MonitoringTask]:
+        """The pending tasks in server order."""
+        return list(self._tasks.values())
+
+    def replace(
+        self,
+        tasks: Iterable[Any],
+        *,
+        cursor: Optional[str] = None,
+        etag: Optional[str] = None,
+    ) -> None:
+        """Make *tasks* (a full listing) the new snapshot."""
+        previous, self._tasks = self._tasks, {}
+        for task in tasks:
+            task = MonitoringTask.coerce(task)
+            self._tasks[task.id] = _patch(previous.get(task.id), task)
+        self.cursor = cursor
+        self.etag = etag
+        self.full_syncs += 1
+
+    def apply(
+        self,
+        changed: Iterable[Any],
+        removed: Iterable[Any],
+        cursor: Optional[str],
+    ) -> None:
+        """Patch the snapshot with a delta and advance to *cursor*."""
+        for task_id in removed:
+            self._tasks.pop(task_id, None)
+        for task in changed:
+            task = MonitoringTask.coerce(task)
+            self._tasks[task.id] = _patch(self._tasks.get(task.id), task)
+        self.cursor = cursor
+        # The listing changed, so its old ETag no longer matches
+        self.etag = None
+        self.delta_syncs += 1
+
+    def reset(self) -> None:
+        """Forget the validators so the next sync is a full listing."""
+        self.cursor = None
+        self.etag = None
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+def _patch(current: Optional[MonitoringTask], update: MonitoringTask) -> MonitoringTask:
+    if current is None:
+        return update
+    for name in MonitoringTask.__slots__:
+        setattr(current, name, getattr(update, name))
+    return current
@@ -0,0 +1,428 @@
+"""Embedded SQLite implementation of the monitoring repository.
+
+An alternative to the topn-db HTTP API for single-node deployments, local
+development and load tests: tasks and items live in one SQLite file opened
+in WAL mode, so bot commands read from local disk and the notifier's batch
+writes cost one transaction each.
+
+Items are not scraped here – whatever fills the ``items`` table (an
+importer, a test fixture) calls :meth:`SqliteMonitoringRepository.add_items`.
+A task is *pending* once ``pending_interval_s`` passed since its
+``last_updated``; the items to send are those of its URL inserted after its
+``last_item_id`` – a high-water mark on the items' insertion order, set when
+the task is created and advanced to what its last fetch saw once the items
+were handed out.  Listings scraped late (with an older ``created_at``) are
+therefore still sent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import aiosqlite
+
+from clients.models import Item, MonitoringTask
+from repositories.monitoring import DAY, MonitoringRepositoryProtocol
+from tools.datetime_utils import now_warsaw, to_utc
+from tools.tracing import trace_methods
+
+__all__ = ["SqliteMonitoringRepository"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    last_updated TEXT,
+    last_got_item TEXT,
+    created_at TEXT NOT NULL,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    last_item_id INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_tasks_chat_name ON tasks (chat_id, name);
+CREATE INDEX IF NOT EXISTS ix_tasks_chat_url ON tasks (chat_id, url);
+CREATE INDEX IF NOT EXISTS ix_tasks_last_updated ON tasks (last_updated);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_url TEXT NOT NULL UNIQUE,
+    source_url TEXT NOT NULL,
+    title TEXT,
+    price TEXT,
+    location TEXT,
+    created_at TEXT,
+    created_at_pretty TEXT,
+    created_ts REAL NOT NULL,
+    image_url TEXT,
+    description TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_items_source_created ON items (source_url, created_ts);
+CREATE INDEX IF NOT EXISTS ix_items_created ON items (created_ts);
+"""
+
+_TASK_COLUMNS = (
+    "id, chat_id, name, url, last_updated, last_got_item, created_at, is_active"
+)
+_ITEM_COLUMNS = (
+    "id",
+    "item_url",
+    "source_url",
+    "title",
+    "price",
+    "location",
+    "created_at",
+    "created_at_pretty",
+    "image_url",
+    "description",
+    "source",
+)
+
+
+def _timestamp(ago_s: float = 0.0) -> str:
+    # Fixed precision keeps the stored strings ordered lexicographically
+    moment = now_warsaw() - timedelta(seconds=ago_s)
+    return moment.isoformat(timespec="microseconds")
+
+
+def _epoch(value: Any) -> Optional[float]:
+    moment = to_utc(value)
+    return moment.timestamp() if moment else None
+
+
+@trace_methods("repository")
+class SqliteMonitoringRepository(MonitoringRepositoryProtocol):
+    """aiosqlite-backed repository storing tasks and items in one file."""
+
+    def __init__(
+        self,
+        path: str = "monitoring.db",
+        *,
+        pending_interval_s: float = 10.0,
+    ) -> None:
+        self._path = path
+        self._pending_interval_s = pending_interval_s
+        self._db: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        self._logger = logging.getLogger(__name__)
+        # Highest item id seen by the last fetch, by task id and by URL (for
+        # subscribers of a shared URL that the notifier did not fetch for)
+        self._fetch_marks: Dict[Any, int] = {}
+        self._url_marks: Dict[str, int] = {}
+
+    async def connect(self) -> aiosqlite.Connection:
+        """Open the database (once) and create the schema if needed."""
+        if self._db is not None:
+            return self._db
+        async with self._connect_lock:
+            if self._db is None:
+                db = await aiosqlite.connect(self._path)
+                db.row_factory = aiosqlite.Row
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.executescript(_SCHEMA)
+                await self._migrate(db)
+                await db.commit()
+                self._db = db
+        return self._db
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    # ----------------- CRUD -----------------
+    async def task_exists(self, chat_id: str, name: str) -> bool:  # noqa: D401
+        """Return True if a task with *name* exists for *chat_id*."""
+        return await self._exists(
+            "SELECT 1 FROM tasks WHERE chat_id = ? AND name = ?", (chat_id, name)
+        )
+
+    async def has_url(self, chat_id: str, url: str) -> bool:  # noqa: D401
+        """Return True if the *url* is already monitored for *chat_id*."""
+        return await self._exists(
+            "SELECT 1 FROM tasks WHERE chat_id = ? AND url = ?", (chat_id, url)
+        )
+
+    async def create_task(
+        self, chat_id: str, name: str, url: str
+    ) -> MonitoringTask:  # noqa: D401
+        """Persist a new monitoring task and return the model instance."""
+        db = await self.connect()
+        try:
+            cursor = await db.execute(
+                "INSERT INTO tasks (chat_id, name, url, created_at, is_active,"
+                " last_item_id) VALUES (?, ?, ?, ?, 1,"
+                " (SELECT COALESCE(MAX(id), 0) FROM items))",
+                (chat_id, name, url, _timestamp()),
+            )
+            await db.commit()
+        except Exception as e:
+            self._logger.error(f"Error creating task: {e}")
+            raise
+        return await self._task(cursor.lastrowid)
+
+    async def delete_task(self, chat_id: str, name: str) -> None:
+        """Delete monitoring task identified by *name* for the given chat."""
+        db = await self.connect()
+        await db.execute(
+            "DELETE FROM tasks WHERE chat_id = ? AND name = ?", (chat_id, name)
+        )
+        await db.commit()
+
+    async def list_tasks(self, chat_id: str) -> Sequence[MonitoringTask]:  # noqa: D401
+        """Return all monitoring tasks for *chat_id*."""
+        try:
+            return await self._tasks(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE chat_id = ? ORDER BY id",
+                (chat_id,),
+            )
+        except Exception as e:
+            self._logger.error(f"Error listing tasks: {e}")
+            return []
+
+    # ----------------- Background / worker helpers -----------------
+    async def pending_tasks(self) -> Iterable[MonitoringTask]:  # noqa: D401
+        """Return active tasks not checked within ``pending_interval_s``."""
+        try:
+            return await self._tasks(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE is_active"
+                " AND (last_updated IS NULL OR last_updated <= ?) ORDER BY id",
+                (_timestamp(self._pending_interval_s),),
+            )
+        except Exception as e:
+            self._logger.error(f"Error getting pending tasks: {e}")
+            return []
+
+    async def active_tasks(self) -> Iterable[MonitoringTask]:  # noqa: D401
+        """Return every active task (to resolve new-item events)."""
+        try:
+            return await self._tasks(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE is_active ORDER BY id", ()
+            )
+        except Exception as e:
+            self._logger.error(f"Error getting active tasks: {e}")
+            return []
+
+    async def items_to_send(self, task: MonitoringTask):  # noqa: D401
+        """Return new items that should be sent for *task*."""
+        return (await self.items_to_send_many([task])).get(task.id, [])
+
+    async def update_last_got_item(self, task: MonitoringTask) -> None:  # noqa: D401
+        """Update `last_got_item` timestamp of *task* after sending its items."""
+        await self.update_last_got_item_many([task])
+
+    async def update_last_updated(self, task: MonitoringTask) -> None:  # noqa: D401
+        """Update `last_updated` timestamp after checking for items."""
+        await self.update_last_updated_many([task])
+
+    # ----------------- Batch helpers -----------------
+    async def items_to_send_many(
+        self, tasks: Sequence[MonitoringTask]
+    ) -> Dict[Any, list]:  # noqa: D401
+        """Return new items for several *tasks* keyed by task id.
+
+        One query reads the candidate items of every URL involved; each task
+        then keeps those inserted after its own ``last_item_id``.  The highest
+        item id read is remembered and stored as the new mark by
+        :meth:`update_last_got_item_many`.
+        """
+        if not tasks:
+            return {}
+        ids = [task.id for task in tasks]
+        urls = sorted({task.url for task in tasks})
+        try:
+            db = await self.connect()
+            async with db.execute(
+                "SELECT id, last_item_id FROM tasks"
+                f" WHERE id IN ({', '.join('?' for _ in ids)})",
+                ids,
+            ) as cursor:
+                marks = {
+                    row["id"]: row["last_item_id"] for row in await cursor.fetchall()
+                }
+            async with db.execute("SELECT COALESCE(MAX(id), 0) FROM items") as cursor:
+                (high,) = await cursor.fetchone()
+            since = {task.id: marks.get(task.id, high) for task in tasks}
+            async with db.execute(
+                f"SELECT {', '.join(_ITEM_COLUMNS)} FROM items"
+                f" WHERE source_url IN ({', '.join('?' for _ in urls)})"
+                " AND id > ? AND id <= ? ORDER BY created_ts, id",
+                (*urls, min(since.values()), high),
+            ) as cursor:
+                rows = await cursor.fetchall()
+        except Exception as e:
+            self._logger.error(f"Error getting items to send: {e}")
+            return {task.id: [] for task in tasks}
+        for task in tasks:
+            self._fetch_marks[task.id] = high
+            self._url_marks[task.url] = high
+        return {
+            task.id: [
+                _item(row)
+                for row in rows
+                if row["source_url"] == task.url and row["id"] > since[task.id]
+            ]
+            for task in tasks
+        }
+
+    async def update_last_got_item_many(
+        self,
+        tasks: Sequence[MonitoringTask],
+        timestamps: Optional[Mapping[Any, str]] = None,
+    ) -> None:  # noqa: D401
+        """Update `last_got_item` of several *tasks* in one transaction.
+
+        *timestamps* maps task ids to their fetch time; others get now.  Each
+        task's ``last_item_id`` advances to the mark of its last fetch (or of
+        the last fetch of its URL); it never moves backwards.
+        """
+        if not tasks:
+            return
+        timestamp = _timestamp()
+        timestamps = timestamps or {}
+        rows = []
+        for task in tasks:
+            mark = self._fetch_marks.pop(task.id, None)
+            if mark is None:
+                mark = self._url_marks.get(task.url, 0)
+            rows.append((timestamps.get(task.id, timestamp), mark, task.id))
+        try:
+            db = await self.connect()
+            await db.executemany(
+                "UPDATE tasks SET last_got_item = ?,"
+                " last_item_id = MAX(last_item_id, ?) WHERE id = ?",
+                rows,
+            )
+            await db.commit()
+        except Exception as e:
+            self._logger.error(f"Error updating last_got_item: {e}")
+
+    async def update_last_updated_many(
+        self, tasks: Sequence[MonitoringTask]
+    ) -> None:  # noqa: D401
+        """Update `last_updated` of several *tasks* in one transaction."""
+        await self._touch("last_updated", tasks)
+
+    # ----------------- Items -----------------
+    async def add_items(self, items: Iterable[Any]) -> int:
+        """Insert *items* (dicts or :class:`Item`), skipping known item URLs.
+
+        Returns the number of new rows.
+        """
+        rows = []
+        for item in items:
+            data = Item.coerce(item)
+            created_ts = _epoch(getattr(data, "created_at", None)) or time.time()
+            rows.append(
+                (
+                    *(getattr(data, name, None) for name in _ITEM_COLUMNS[1:]),
+                    created_ts,
+                )
+            )
+        if not rows:
+            return 0
+        db = await self.connect()
+        before = db.total_changes
+        await db.executemany(
+            f"INSERT OR IGNORE INTO items ({', '.join(_ITEM_COLUMNS[1:])}, created_ts)"
+            f" VALUES ({', '.join('?' for _ in _ITEM_COLUMNS)})",
+            rows,
+        )
+        await db.commit()
+        return db.total_changes - before
+
+    async def delete_old_items(self, n_days: int) -> int:
+        """Delete items created more than *n_days* ago; return how many."""
+        db = await self.connect()
+        cursor = await db.execute(
+            "DELETE FROM items WHERE created_ts < ?", (time.time() - n_days * DAY,)
+        )
+        await db.commit()
+        return cursor.rowcount
+
+    async def remove_old_items_data_infinitely(self, n_days: int) -> None:
+        """Remove old items data in an infinite loop."""
+        while True:
+            try:
+                await self.delete_old_items(n_days)
+                self._logger.info(f"Cleaned up items older than {n_days} days")
+            except Exception as e:
+                self._logger.error(f"Error cleaning up old items: {e}")
+            await asyncio.sleep(DAY)
+
+    # ----------------- Internal helpers -----------------
+    @staticmethod
+    async def _migrate(db: aiosqlite.Connection) -> None:
+        """Add ``last_item_id`` to databases created before it existed.
+
+        Existing tasks start from the newest item of their URL created before
+        their ``last_got_item`` – what the former created_at filter sent.
+        """
+        async with db.execute("PRAGMA table_info(tasks)") as cursor:
+            columns = {row["name"] for row in await cursor.fetchall()}
+        if "last_item_id" in columns:
+            return
+        await db.execute(
+            "ALTER TABLE tasks ADD COLUMN last_item_id INTEGER NOT NULL DEFAULT 0"
+        )
+        async with db.execute(
+            "SELECT id, url, last_got_item, created_at FROM tasks"
+        ) as cursor:
+            tasks = await cursor.fetchall()
+        for task in tasks:
+            since = _epoch(task["last_got_item"] or task["created_at"]) or 0.0
+            await db.execute(
+                "UPDATE tasks SET last_item_id = (SELECT COALESCE(MAX(id), 0)"
+                " FROM items WHERE source_url = ? AND created_ts <= ?) WHERE id = ?",
+                (task["url"], since, task["id"]),
+            )
+
+    async def _exists(self, query: str, params: tuple) -> bool:
+        try:
+            db = await self.connect()
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchone() is not None
+        except Exception as e:
+            self._logger.error(f"Error querying tasks: {e}")
+            return False
+
+    async def _tasks(self, query: str, params: tuple) -> List[MonitoringTask]:
+        db = await self.connect()
+        async with db.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+        return [_task(row) for row in rows]
+
+    async def _task(self, task_id: int) -> MonitoringTask:
+        (task,) = await self._tasks(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)
+        )
+        return task
+
+    async def _touch(self, column: str, tasks: Sequence[MonitoringTask]) -> None:
+        if not tasks:
+            return
+        timestamp = _timestamp()
+        try:
+            db = await self.connect()
+            await db.executemany(
+                f"UPDATE tasks SET {column} = ? WHERE id = ?",
+                [(timestamp, task.id) for task in tasks],
+            )
+            await db.commit()
+        except Exception as e:
+            self._logger.error(f"Error updating {column}: {e}")
+
+
+def _task(row: aiosqlite.Row) -> MonitoringTask:
+    data = dict(row)
+    data["is_active"] = bool(data["is_active"])
+    return MonitoringTask(data)
+
+
+def _item(row: aiosqlite.Row) -> Item:
+    return Item.from_dict({name: row[name] for name in _ITEM_COLUMNS})
@@ -0,0 +1,125 @@
+"""Micro-benchmark: services.renderer vs. the original item formatting.
+
+Run from the repository root::
+
+    python scripts/bench_renderer.py [n_items]
+
+The original implementation is inlined below so the comparison keeps working
+after the notifier switched to the renderer.  Outputs are also checked to be
+byte-identical.
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.renderer import render_items  # noqa: E402
+
+
+def _legacy_escape(text):
+    if not text:
+        return text
+    for char in r"_*[]()~`>#+-=|{}.!":
+        text = text.replace(char, rf"\{char}")
+    return text
+
+
+def _legacy_bold(text):
+    if not text:
+        return ""
+    return f"*{_legacy_escape(text)}*"
+
+
+def _legacy_format(item):
+    description = item.get("description", "")
+    extra = {}
+    for line in description.strip().split("\n"):
+        if line.startswith("price:"):
+            extra["price_info"] = line.replace("price:", "Price:").strip()
+        elif line.startswith("deposit:"):
+            extra["deposit_info"] = line.replace("deposit:", "Deposit:").strip()
+        elif line.startswith("animals_allowed:"):
+            animals_allowed = line.replace("animals_allowed:", "").strip()
+            if animals_allowed == "true":
+                extra["animals_info"] = "Pets: Allowed"
+            elif animals_allowed == "false":
+                extra["animals_info"] = "Pets: Not allowed"
+        elif line.startswith("rent:"):
+            extra["rent_info"] = line.replace("rent:", "Additional rent:").strip()
+
+    created_at = item.get("created_at", "N/A")
+    if created_at and created_at != "N/A":
+        try:
+            dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            date_formatted = (
+                f"{_legacy_escape(dt.strftime('%d.%m.%Y'))} "
+                f"{_legacy_escape('-')} {_legacy_bold(dt.strftime('%H:%M'))}"
+            )
+        except (ValueError, AttributeError):
+            date_formatted = _legacy_escape(str(created_at))
+    else:
+        date_formatted = "N/A"
+
+    text = (
+        f"📦 {_legacy_bold(item.get('title', 'No title'))}\n\n"
+        f"💰 {_legacy_bold('Price')}: {_legacy_escape(str(item.get('price', 'N/A')))}\n"
+        f"📍 {_legacy_bold('Location')}: "
+        f"{_legacy_escape(str(item.get('location', 'N/A')))}\n"
+        f"🕒 {_legacy_bold('Posted')}: {date_formatted}\n"
+    )
+    if price_info := extra.get("price_info"):
+        text += f"💵 {_legacy_bold('Price')}: {price_info}\n"
+    if (deposit := extra.get("deposit_info")) and deposit != "Deposit: 0":
+        text += f"🔐 {_legacy_bold('Deposit')}: {deposit}\n"
+    if animals := extra.get("animals_info"):
+        text += f"🐾 {_legacy_bold('Animals')}: {animals}\n"
+    if rent := extra.get("rent_info"):
+        text += f"💳 {_legacy_bold('Rent')}: {rent}\n"
+    source = item.get("source")
+    platform_name = _legacy_escape(source if source else "Unknown source")
+    text += f"🔗 [View on {platform_name}]({_legacy_escape(item.get('item_url', '#'))})"
+    return text
+
+
+def _sample_items(n: int) -> list[dict]:
+    return [
+        {
+            "title": f"*Mieszkanie {i}* 2-pokojowe (50m²) - [Mokotów]!",
+            "price": f"{2000 + i} zł",
+            "location": "Warszawa, Mokotów_Stegny",
+            "created_at": f"2025-03-04T{i % 24:02d}:05:00Z",
+            "item_url": f"https://www.olx.pl/d/oferta/mieszkanie-{i}-CID3-ID{i}.html",
+            "description": "price: 2 500 zł\ndeposit: 3 000 zł\n"
+            "animals_allowed: true\nrent: 650 zł\nfloor: 3\narea: 50 m²",
+            "source": "OLX.pl",
+        }
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    items = _sample_items(n)
+    legacy = [_legacy_format(item) for item in items]
+    assert render_items(items) == legacy, "renderer output differs from legacy"
+
+    repeat = 5
+    t_legacy = min(
+        timeit.repeat(
+            lambda: [_legacy_format(i) for i in items], number=1, repeat=repeat
+        )
+    )
+    t_new = min(timeit.repeat(lambda: render_items(items), number=1, repeat=repeat))
+    print(f"items:    {n}")
+    print(f"legacy:   {t_legacy * 1e6 / n:8.2f} µs/item")
+    print(f"renderer: {t_new * 1e6 / n:8.2f} µs/item")
+    print(f"speedup:  {t_legacy / t_new:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Lease-based coordination of notifier instances through Redis.
+
+Chats are hashed into a fixed number of *shards* (see
+:func:`tools.sharding.shard_for`).  Each running notifier is a *node* that
+periodically
+
+1. records a heartbeat in a sorted set scored by time,
+2. renews the leases it holds (``SET NX PX`` keys holding its node id),
+3. releases leases above its fair share ``ceil(shards / live nodes)``,
+4. claims free shards up to that share.
+
+Leases and heartbeats expire after ``lease_ms``; heartbeats run every third
+of that, so the shards of a node that died are picked up by the survivors
+within about one lease period, and a lease is never held by two live nodes.
+
+Ownership is only as fresh as the last heartbeat, though.  The notifier
+re-checks :meth:`LeaseCoordinator.owns` before every group it fetches and
+every delivery, which bounds the overlap after a takeover to sends already
+in progress; a node stalled for longer than a lease (GC pause, network
+partition) can still send items the new owner sends again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+import zlib
+from typing import Any, Callable, Final
+
+from tools.sharding import shard_for
+
+__all__ = ["LeaseCoordinator"]
+
+logger: Final = logging.getLogger(__name__)
+
+# Extend the lease only if this node still holds it
+_RENEW: Final = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+# Delete the lease only if this node still holds it
+_RELEASE: Final = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class LeaseCoordinator:
+    """Claim and keep a fair share of task shards with expiring leases."""
+
+    def __init__(
+        self,
+        redis: Any,
+        *,
+        shards: int = 64,
+        lease_ms: int = 30_000,
+        prefix: str = "notifier:lease",
+        node_id: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._redis = redis
+        self._shards = max(1, shards)
+        self._lease_ms = lease_ms
+        self._prefix = prefix
+        self._nodes_key = f"{prefix}:nodes"
+        self.node_id = node_id or _default_node_id()
+        self._clock = clock
+        self._owned: frozenset[int] = frozenset()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @property
+    def owned(self) -> frozenset[int]:
+        """Shards this node held after the last heartbeat."""
+        return self._owned
+
+    def owns(self, chat_id: Any) -> bool:
+        """Return True if the shard of *chat_id* is leased by this node."""
+        return shard_for(chat_id, self._shards) in self._owned
+
+    async def heartbeat(self) -> frozenset[int]:
+        """Announce liveness, renew, rebalance and return the owned shards.
+
+        On Redis errors the node drops all shards rather than risk sending
+        items another node already took over.
+        """
+        try:
+            self._owned = await self._rebalance()
+        except Exception as e:
+            logger.error(f"Error during lease heartbeat: {e}")
+            self._owned = frozenset()
+        return self._owned
+
+    async def run(self) -> None:
+        """Heartbeat every third of the lease period until cancelled."""
+        try:
+            while True:
+                await self.heartbeat()
+                await asyncio.sleep(self._lease_ms / 3000)
+        finally:
+            await self.release_all()
+
+    async def release_all(self) -> None:
+        """Give up every lease and leave the cluster (graceful shutdown)."""
+        owned, self._owned = self._owned, frozenset()
+        try:
+            for shard in owned:
+                await self._redis.eval(_RELEASE, 1, self._key(shard), self.node_id)
+            await self._redis.zrem(self._nodes_key, self.node_id)
+        except Exception as e:
+            logger.error(f"Error releasing leases: {e}")
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    async def _rebalance(self) -> frozenset[int]:
+        now_ms = int(self._clock() * 1000)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self._nodes_key, {self.node_id: now_ms})
+            pipe.zremrangebyscore(self._nodes_key, "-inf", now_ms - self._lease_ms)
+            pipe.zcard(self._nodes_key)
+            *_, nodes = await pipe.execute()
+        share = math.ceil(self._shards / max(1, nodes))
+
+        owned = []
+        for shard in self._owned:
+            renewed = await self._redis.eval(
+                _RENEW, 1, self._key(shard), self.node_id, self._lease_ms
+            )
+            if renewed:
+                owned.append(shard)
+            else:
+                logger.warning("Lost lease on shard %d", shard)
+
+        # Keep the shards this node prefers most; hand the rest back
+        owned.sort(key=self._preference)
+        for shard in owned[share:]:
+            await self._redis.eval(_RELEASE, 1, self._key(shard), self.node_id)
+        owned = owned[:share]
+
+        if len(owned) < share:
+            held = set(owned)
+            for shard in sorted(range(self._shards), key=self._preference):
+                if shard in held:
+                    continue
+                if await self._redis.set(
+                    self._key(shard), self.node_id, nx=True, px=self._lease_ms
+                ):
+                    owned.append(shard)
+                    if len(owned) >= share:
+                        break
+
+        result = frozenset(owned)
+        if result != self._owned:
+            logger.info(
+                "Node %s owns %d/%d shards (%d live nodes)",
+                self.node_id,
+                len(result),
+                self._shards,
+                nodes,
+            )
+        return result
+
+    def _preference(self, shard: int) -> int:
+        # Per-node order so nodes do not all race for the same free shards
+        return zlib.crc32(f"{self.node_id}:{shard}".encode("utf-8"))
+
+    def _key(self, shard: int) -> str:
+        return f"{self._prefix}:{shard}"
@@ -0,0 +1,107 @@
+"""New-item events published by the item producer on a Redis Stream.
+
+Whatever stores freshly scraped listings appends one entry per task or
+search URL that gained items::
+
+    XADD items:new * task_id 42
+    XADD items:new * source_url https://www.olx.pl/...
+
+Every notifier node reads the whole stream with plain ``XREAD`` (no consumer
+group – each node filters the tasks it serves) and processes the named tasks
+right away.  A stream rather than pub/sub lets a reader that reconnects
+continue from the last entry it saw instead of silently missing events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+__all__ = ["ItemEventBatch", "ItemEvents"]
+
+logger: Final = logging.getLogger(__name__)
+
+# Backoff between reads after Redis errors, doubling up to the maximum
+ERROR_DELAY_S: Final = 1.0
+MAX_ERROR_DELAY_S: Final = 8.0
+
+
+@dataclass(slots=True)
+class ItemEventBatch:
+    """Tasks and search URLs named by the events read in one go."""
+
+    task_ids: set = field(default_factory=set)
+    source_urls: set = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.task_ids or self.source_urls)
+
+
+class ItemEvents:
+    """Publish to and read from the new-item event stream."""
+
+    def __init__(
+        self,
+        redis: Any,
+        *,
+        stream: str = "items:new",
+        batch_size: int = 100,
+        maxlen: int = 10_000,
+    ) -> None:
+        self._redis = redis
+        self._stream = stream
+        self._batch_size = batch_size
+        self._maxlen = maxlen
+        # Resolved on the first read to the newest entry at that time; the
+        # initial full cycle covers anything older
+        self._last_id: str | None = None
+        self._error_delay_s = ERROR_DELAY_S
+
+    async def publish(
+        self, *, task_id: Any = None, source_url: str | None = None
+    ) -> str:
+        """Announce new items for *task_id* and/or *source_url*."""
+        fields = {}
+        if task_id is not None:
+            fields["task_id"] = str(task_id)
+        if source_url:
+            fields["source_url"] = source_url
+        if not fields:
+            raise ValueError("An event needs a task_id or a source_url")
+        return await self._redis.xadd(
+            self._stream, fields, maxlen=self._maxlen, approximate=True
+        )
+
+    async def next_batch(self, timeout_s: float) -> ItemEventBatch:
+        """Wait up to *timeout_s* for events and return what arrived.
+
+        On Redis errors an empty batch is returned after a short backoff
+        (capped by *timeout_s*), so push delivery resumes soon after a brief
+        outage while longer ones fall back to the caller's safety-net poll.
+        """
+        batch = ItemEventBatch()
+        try:
+            if self._last_id is None:
+                newest = await self._redis.xrevrange(self._stream, count=1)
+                self._last_id = newest[0][0] if newest else "0-0"
+            response = await self._redis.xread(
+                {self._stream: self._last_id},
+                count=self._batch_size,
+                block=max(1, int(timeout_s * 1000)),
+            )
+        except Exception as e:
+            logger.error(f"Error reading item events: {e}")
+            await asyncio.sleep(min(timeout_s, self._error_delay_s))
+            self._error_delay_s = min(self._error_delay_s * 2, MAX_ERROR_DELAY_S)
+            return batch
+        self._error_delay_s = ERROR_DELAY_S
+        for _stream, entries in response or ():
+            for entry_id, fields in entries:
+                self._last_id = entry_id
+                if fields.get("task_id"):
+                    batch.task_ids.add(fields["task_id"])
+                if fields.get("source_url"):
+                    batch.source_urls.add(fields["source_url"])
+        return batch
@@ -0,0 +1,209 @@
+"""End-to-end freshness: lag from listing creation to Telegram delivery.
+
+For every delivered item the notifier records ``sent_at - created_at`` – with
+``sent_at`` taken right after that item's own message or album went out – in a
+:class:`LagSketch` per monitoring.  The sketch keeps counts in logarithmic
+buckets with a fixed relative accuracy, so quantiles are accurate to
+``RELATIVE_ACCURACY`` while one monitoring never needs more than about 150
+counters however many items it delivers.
+
+With Redis the bucket counts live in one hash per monitoring
+(``freshness:<task id>``), so ``/status`` in the bot process sees the lags
+recorded by separate notifier workers.  Without Redis they are kept in
+process memory for at most ``max_tasks`` monitorings.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Final, Iterable, Mapping
+
+from core.metrics import Histogram
+from tools.datetime_utils import to_utc
+
+__all__ = ["FRESHNESS_SECONDS", "FreshnessSummary", "FreshnessTracker", "LagSketch"]
+
+logger: Final = logging.getLogger(__name__)
+
+DAY: Final = 24 * 60 * 60
+
+RELATIVE_ACCURACY: Final = 0.05
+# Lags at or below MIN_LAG_S share the first bucket, longer ones than
+# MAX_LAG_S are counted as MAX_LAG_S – this bounds the number of buckets
+MIN_LAG_S: Final = 1.0
+MAX_LAG_S: Final = 30 * DAY
+
+_GAMMA: Final = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA: Final = math.log(_GAMMA)
+
+FRESHNESS_SECONDS: Final = Histogram(
+    "notifier_item_freshness_seconds",
+    "Time from listing creation to its delivery to Telegram",
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, DAY),
+)
+_FRESHNESS: Final = FRESHNESS_SECONDS.labels()
+
+
+class LagSketch:
+    """Streaming quantile sketch of lags in logarithmic buckets."""
+
+    __slots__ = ("counts", "count")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+
+    @staticmethod
+    def index(seconds: float) -> int:
+        """Bucket of *seconds*: ``(MIN_LAG_S * γ^(i-1), MIN_LAG_S * γ^i]``."""
+        if seconds <= MIN_LAG_S:
+            return 0
+        return math.ceil(math.log(min(seconds, MAX_LAG_S) / MIN_LAG_S) / _LOG_GAMMA)
+
+    @staticmethod
+    def value(index: int) -> float:
+        """Representative lag of bucket *index* (within the relative accuracy)."""
+        if index <= 0:
+            return MIN_LAG_S
+        return MIN_LAG_S * 2 * _GAMMA**index / (_GAMMA + 1)
+
+    @classmethod
+    def from_counts(cls, counts: Mapping[Any, Any]) -> "LagSketch":
+        """Rebuild a sketch from ``{bucket index: count}`` (e.g. a Redis hash)."""
+        sketch = cls()
+        for index, count in counts.items():
+            sketch.add_to_bucket(int(index), int(count))
+        return sketch
+
+    def add(self, seconds: float) -> None:
+        self.add_to_bucket(self.index(seconds))
+
+    def add_to_bucket(self, index: int, count: int = 1) -> None:
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+
+    def quantile(self, q: float) -> float | None:
+        """Return the *q*-quantile (0..1) of the added lags, None when empty."""
+        if not self.count:
+            return None
+        # Nearest rank, so the top quantiles of few lags report the slowest
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self.value(index)
+        return self.value(max(self.counts))
+
+
+@dataclass(frozen=True, slots=True)
+class FreshnessSummary:
+    """Delivery lag percentiles (seconds) of one monitoring."""
+
+    count: int
+    p50: float
+    p90: float
+    p99: float
+
+
+class FreshnessTracker:
+    """Record delivery lags per monitoring and summarise them for ``/status``."""
+
+    def __init__(
+        self,
+        redis: Any = None,
+        *,
+        max_tasks: int = 10_000,
+        ttl_s: int = 30 * DAY,
+        prefix: str = "freshness",
+    ) -> None:
+        self._redis = redis
+        self._max_tasks = max_tasks
+        self._ttl_s = ttl_s
+        self._prefix = prefix
+        # In-process sketches (only without Redis), least recently used first
+        self._sketches: collections.OrderedDict[str, LagSketch] = (
+            collections.OrderedDict()
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def record(self, task, delivered: Iterable[tuple[Any, datetime]]) -> None:
+        """Record the lag of every ``(item, sent at)`` pair delivered for *task*.
+
+        *sent at* is an aware datetime taken right after the item's own send
+        call.  Items without a parsable ``created_at`` are skipped.  Errors
+        are logged – freshness tracking never fails a delivery.
+        """
+        lags = []
+        for item, sent_at in delivered:
+            created = to_utc(getattr(item, "created_at", None))
+            if created is not None:
+                # Listings stamped in the future (clock skew) count as instant
+                lags.append(max(0.0, (sent_at - created).total_seconds()))
+        if not lags:
+            return
+        for lag in lags:
+            _FRESHNESS.observe(lag)
+
+        task_key = str(task.id)
+        if self._redis is None:
+            sketch = self._local(task_key)
+            for lag in lags:
+                sketch.add(lag)
+            return
+        buckets = collections.Counter(LagSketch.index(lag) for lag in lags)
+        key = self._key(task_key)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for index, count in buckets.items():
+                    pipe.hincrby(key, str(index), count)
+                pipe.expire(key, self._ttl_s)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording freshness for task {task_key}: {e}")
+
+    async def sketch(self, task_id: Any) -> LagSketch:
+        """Return the lags recorded for *task_id* (empty if none or on errors)."""
+        task_key = str(task_id)
+        if self._redis is None:
+            sketch = self._sketches.get(task_key)
+            return LagSketch.from_counts(sketch.counts) if sketch else LagSketch()
+        try:
+            return LagSketch.from_counts(await self._redis.hgetall(self._key(task_key)))
+        except Exception as e:
+            logger.error(f"Error reading freshness for task {task_key}: {e}")
+            return LagSketch()
+
+    async def summary(self, task_id: Any) -> FreshnessSummary | None:
+        """Return the lag percentiles of *task_id*, None before any delivery."""
+        sketch = await self.sketch(task_id)
+        if not sketch.count:
+            return None
+        return FreshnessSummary(
+            sketch.count,
+            sketch.quantile(0.5),
+            sketch.quantile(0.9),
+            sketch.quantile(0.99),
+        )
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _local(self, task_key: str) -> LagSketch:
+        sketch = self._sketches.get(task_key)
+        if sketch is None:
+            if len(self._sketches) >= self._max_tasks:
+                self._sketches.popitem(last=False)
+            sketch = self._sketches[task_key] = LagSketch()
+        else:
+            self._sketches.move_to_end(task_key)
+        return sketch
+
+    def _key(self, task_key: str) -> str:
+        return f"{self._prefix}:{task_key}"
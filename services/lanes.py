@@ -0,0 +1,66 @@
+"""Per-chat ordered execution lanes for outbound Telegram traffic.
+
+Jobs submitted for the same chat run strictly one after another in submission
+order, while jobs for different chats run concurrently.  The notifier uses
+this to parallelise a cycle without interleaving the messages of a single
+chat.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Final
+
+__all__ = ["ChatLanes"]
+
+logger: Final = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class ChatLanes:
+    """Chain jobs per chat so each chat drains in order."""
+
+    def __init__(self) -> None:
+        self._tails: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tails)
+
+    def submit(self, chat_id: str, job: Job) -> asyncio.Task:
+        """Schedule *job* after every job previously submitted for *chat_id*.
+
+        Returns the task running *job*; finished lanes are dropped on their own.
+        """
+        previous = self._tails.get(chat_id)
+        task = self._tails[chat_id] = asyncio.create_task(
+            self._run(chat_id, previous, job)
+        )
+        task.add_done_callback(lambda t: self._release(chat_id, t))
+        return task
+
+    async def drain(self) -> None:
+        """Wait until every lane has finished all of its jobs."""
+        while self._tails:
+            tails = list(self._tails.values())
+            await asyncio.gather(*tails, return_exceptions=True)
+            # Jobs may submit follow-up work while we wait – only drop the
+            # lanes whose tail is the one we just awaited.
+            for chat_id, tail in list(self._tails.items()):
+                if tail.done():
+                    del self._tails[chat_id]
+
+    def _release(self, chat_id: str, task: asyncio.Task) -> None:
+        if self._tails.get(chat_id) is task:
+            del self._tails[chat_id]
+
+    @staticmethod
+    async def _run(chat_id: str, previous: asyncio.Task | None, job: Job) -> None:
+        if previous is not None:
+            # Only ordering matters here; failures were already logged.
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await job()
+        except Exception:
+            logger.exception("Send lane job failed for chat_id %s", chat_id)
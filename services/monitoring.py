@@ -85,11 +85,23 @@ class MonitoringService:  # noqa: D101 – simple name
     async def pending_tasks(self):
         return await self._repo.pending_tasks()
 
+    async def active_tasks(self):
+        return await self._repo.active_tasks()
+
     async def items_to_send(self, task):
         return await self._repo.items_to_send(task)
 
-    async def update_last_got_item(self, chat_id: str) -> None:
-        await self._repo.update_last_got_item(chat_id)
+    async def update_last_got_item(self, task) -> None:
+        await self._repo.update_last_got_item(task)
 
     async def update_last_updated(self, task) -> None:
         await self._repo.update_last_updated(task)
+
+    async def items_to_send_many(self, tasks):  # -> Dict[task_id, list]
+        return await self._repo.items_to_send_many(tasks)
+
+    async def update_last_got_item_many(self, tasks, timestamps=None) -> None:
+        await self._repo.update_last_got_item_many(tasks, timestamps)
+
+    async def update_last_updated_many(self, tasks) -> None:
+        await self._repo.update_last_updated_many(tasks)
@@ -9,26 +9,142 @@ anything about Telegram handlers or database internals.  It depends only on
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from typing import Final
 
 from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InputMediaPhoto
 
 from bot.responses import ITEMS_FOUND_CAPTION
+from clients.models import Item
+from core.metrics import Counter, Histogram
+from services.coordination import LeaseCoordinator
+from services.events import ItemEventBatch, ItemEvents
+from services.freshness import FreshnessTracker
+from services.lanes import ChatLanes
 from services.monitoring import MonitoringService
+from services.outbox import NotificationOutbox
+from services.photo_cache import PhotoCache
+from services.rate_limiter import TelegramRateLimiter
+from services.renderer import (
+    bold_markdown_v2,
+    escape_markdown_v2,
+    render_item,
+    render_items,
+)
+from services.scheduler import AdaptivePollingScheduler
+from services.validator import UrlValidator
+from tools.datetime_utils import now_warsaw, to_utc
+from tools.sharding import shard_for
 
 logger: Final = logging.getLogger(__name__)
 
+# Telegram Bot API limits
+MESSAGE_LIMIT: Final = 4096
+CAPTION_LIMIT: Final = 1024
+MEDIA_GROUP_LIMIT: Final = 10
+MESSAGE_SEPARATOR: Final = "\n\n"
+
+_EPOCH: Final = datetime.min.replace(tzinfo=timezone.utc)
+_URL_VALIDATOR: Final = UrlValidator()
+# Minimum seconds between task registry reloads caused by unknown events
+REGISTRY_REFRESH_S: Final = 30.0
+
+CYCLE_SECONDS: Final = Histogram(
+    "notifier_cycle_duration_seconds",
+    "Time to check a set of tasks and deliver their items",
+    ("trigger",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+CYCLE_TASKS: Final = Histogram(
+    "notifier_cycle_tasks",
+    "Tasks checked per cycle",
+    ("trigger",),
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+ITEMS_SENT: Final = Counter(
+    "notifier_items_sent_total", "Items delivered to Telegram chats"
+)
+_ITEMS_SENT: Final = ITEMS_SENT.labels()
+
+HEADER_IMAGE_URL: Final = (
+    "https://tse4.mm.bing.net/th?id=OIG2.fso8nlFWoq9hafRkva2e&pid=ImgGn"
+)
+
 
 class Notifier:  # noqa: D101 – simple name
-    def __init__(self, bot: Bot, service: MonitoringService):
+    def __init__(
+        self,
+        bot: Bot,
+        service: MonitoringService,
+        *,
+        concurrency: int = 1,
+        limiter: TelegramRateLimiter | None = None,
+        album: bool = False,
+        photo_cache: PhotoCache | None = None,
+        outbox: NotificationOutbox | None = None,
+        scheduler: AdaptivePollingScheduler | None = None,
+        shard: tuple[int, int] | None = None,
+        coordinator: LeaseCoordinator | None = None,
+        batch: bool = False,
+        events: ItemEvents | None = None,
+        freshness: FreshnessTracker | None = None,
+    ):
         self._bot = bot
         self._svc = service
+        self._limiter = limiter or TelegramRateLimiter()
+        # ``1`` keeps the original strictly sequential cycle as a fallback.
+        self._concurrency = max(1, concurrency)
+        # Group photos into ``send_media_group`` albums and merge texts
+        self._album = album
+        # Reuse Telegram file_ids instead of re-uploading photos from URLs
+        self._photo_cache = photo_cache
+        # Hand found items to a durable queue instead of sending inline
+        self._outbox = outbox
+        # Per-task adaptive intervals on top of the global check frequency
+        self._scheduler = scheduler
+        # ``(index, count)`` – only serve chats hashed to this worker
+        self._shard = shard
+        # Multi-node mode – only serve chats whose shard lease this node holds
+        self._coordinator = coordinator
+        # Fetch the items of all pending tasks in one batch request
+        self._batch = batch
+        # Push mode – process tasks named by new-item events right away
+        self._events = events
+        # Lag from listing creation to delivery, per monitoring
+        self._freshness = freshness
+        # Active tasks by id and canonical URL, to resolve events
+        self._by_id: dict = {}
+        self._by_url: dict = {}
+        self._registry_at = float("-inf")
+        # Bookkeeping of the running cycle, flushed once at its end
+        self._got_item: dict = {}
+        self._checked: dict = {}
+        # When each task's items were fetched – its next ``last_got_item``
+        self._fetched_at: dict = {}
 
     # ---------------------------------------------------------------------
     # Public API
     # ---------------------------------------------------------------------
+    @property
+    def outbox(self) -> NotificationOutbox | None:
+        """The durable queue items are handed to (None when sending inline)."""
+        return self._outbox
+
+    @property
+    def coordinator(self) -> LeaseCoordinator | None:
+        """Shard lease coordinator (None when running as the only node)."""
+        return self._coordinator
+
+    @property
+    def events(self) -> ItemEvents | None:
+        """New-item event stream driving push mode (None when only polling)."""
+        return self._events
+
     async def run_periodically(
         self, interval_s: int
     ) -> None:  # noqa: D401 – simple name
@@ -41,177 +157,564 @@ class Notifier:  # noqa: D101 – simple name
             logger.info("Sleeping for %s seconds", interval_s)
             await asyncio.sleep(interval_s)
 
+    async def run_on_events(self, safety_interval_s: float) -> None:
+        """Process the tasks named by new-item events as they arrive, forever.
+
+        A full cycle over the pending tasks still runs every
+        *safety_interval_s*, so events lost while the producer or Redis were
+        down only delay those items until the next safety-net poll.
+        """
+        loop = asyncio.get_running_loop()
+        next_poll = loop.time()
+        while True:
+            try:
+                if loop.time() >= next_poll:
+                    next_poll = loop.time() + safety_interval_s
+                    await self._refresh_registry()
+                    await self._check_and_send_items()
+                batch = await self._events.next_batch(max(0.0, next_poll - loop.time()))
+                if batch:
+                    tasks = await self._tasks_for(batch)
+                    if tasks:
+                        await self._check_and_send_items(tasks)
+            except Exception:  # pragma: no cover – log unexpected
+                logger.exception("Unexpected error while handling item events")
+                await asyncio.sleep(1)
+
     # ------------------------------------------------------------------
     # Internal helpers (should be small & testable)
     # ------------------------------------------------------------------
-    async def _check_and_send_items(self) -> None:  # noqa: D401 – simple name
-        """Check for new items and notify users."""
-        pending_tasks = await self._svc.pending_tasks()
+    async def _check_and_send_items(
+        self, tasks: list | None = None
+    ) -> None:  # noqa: D401 – simple name
+        """Check *tasks* (default: the pending ones) for new items and notify users."""
+        started = time.perf_counter()
+        # Full cycles are "poll", the targeted ones of push mode "event"
+        trigger = "poll" if tasks is None else "event"
+        pending_tasks = await self._pending_tasks() if tasks is None else tasks
+        try:
+            if self._concurrency > 1:
+                await self._check_and_send_items_concurrently(pending_tasks)
+            else:
+                await self._check_and_send_items_sequentially(pending_tasks)
+        finally:
+            CYCLE_SECONDS.labels(trigger).observe(time.perf_counter() - started)
+            CYCLE_TASKS.labels(trigger).observe(len(pending_tasks))
 
-        for task in pending_tasks:
-            items_to_send = await self._svc.items_to_send(task)
-            logger.info(
-                "Found %d items to send for chat_id %s",
-                len(items_to_send),
-                task.chat_id,
-            )
+    async def _check_and_send_items_sequentially(self, pending_tasks: list) -> None:
+        """Fetch and deliver task by task – the original strictly ordered cycle."""
+        groups = self._group_by_url(pending_tasks)
+        prefetched = await self._prefetch(groups)
+
+        try:
+            for group in groups:
+                for task, items_to_send, texts in await self._fetch_group(
+                    group, prefetched
+                ):
+                    await self._deliver(task, items_to_send, texts)
+        finally:
+            await self._flush_bookkeeping()
+
+    async def _check_and_send_items_concurrently(self, pending_tasks: list) -> None:
+        """Fetch tasks in parallel and send through per-chat ordered lanes.
+
+        At most ``concurrency`` fetches are in flight at once.  Deliveries for
+        one chat are chained so its messages keep their order, while different
+        chats are served in parallel.  The cycle ends once every lane drained.
+        """
+        groups = self._group_by_url(pending_tasks)
+        prefetched = await self._prefetch(groups)
+        semaphore = asyncio.Semaphore(self._concurrency)
+        lanes = ChatLanes()
+
+        async def fetch(group) -> None:
+            async with semaphore:
+                deliveries = await self._fetch_group(group, prefetched)
+            for task, items_to_send, texts in deliveries:
+                lanes.submit(
+                    str(task.chat_id),
+                    functools.partial(self._deliver, task, items_to_send, texts),
+                )
 
-            if not items_to_send:
-                # Mark that we *did* check – useful for monitoring dashboards
-                await self._svc.update_last_updated(task)
+        results = await asyncio.gather(
+            *(fetch(group) for group in groups), return_exceptions=True
+        )
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Error fetching items for chat_id %s: %s",
+                    ", ".join(str(task.chat_id) for task in group),
+                    result,
+                )
+        await lanes.drain()
+        await self._flush_bookkeeping()
+
+    async def _pending_tasks(self) -> list:
+        pending_tasks = self._owned(await self._svc.pending_tasks())
+        if self._scheduler is not None:
+            pending_tasks = self._scheduler.due(pending_tasks)
+        return pending_tasks
+
+    def _owned(self, tasks) -> list:
+        """Keep the *tasks* whose chats this worker / node serves."""
+        tasks = list(tasks)
+        if self._shard is not None:
+            index, count = self._shard
+            tasks = [task for task in tasks if shard_for(task.chat_id, count) == index]
+        if self._coordinator is not None:
+            tasks = [task for task in tasks if self._coordinator.owns(task.chat_id)]
+        return tasks
+
+    def _still_owned(self, tasks: list) -> list:
+        """Re-check leases mid-cycle; a long cycle may outlive a lease."""
+        if self._coordinator is None:
+            return tasks
+        return [task for task in tasks if self._coordinator.owns(task.chat_id)]
+
+    async def _refresh_registry(self) -> None:
+        """Reload the active tasks used to resolve new-item events."""
+        self._registry_at = asyncio.get_running_loop().time()
+        by_id: dict = {}
+        by_url: dict = {}
+        for task in await self._svc.active_tasks():
+            by_id[str(task.id)] = task
+            url = getattr(task, "url", None)
+            if isinstance(url, str):
+                by_url.setdefault(_URL_VALIDATOR.normalize(url), []).append(task)
+        self._by_id, self._by_url = by_id, by_url
+
+    async def _tasks_for(self, batch: ItemEventBatch) -> list:
+        """Return the served tasks named by *batch* (by id or search URL).
+
+        Unknown names reload the registry, at most every ``REGISTRY_REFRESH_S``,
+        so tasks created since the last reload are found too.
+        """
+        tasks, missing = self._lookup(batch)
+        now = asyncio.get_running_loop().time()
+        if missing and now - self._registry_at >= REGISTRY_REFRESH_S:
+            await self._refresh_registry()
+            tasks, missing = self._lookup(batch)
+        return self._owned(tasks)
+
+    def _lookup(self, batch: ItemEventBatch) -> tuple[list, bool]:
+        found: dict = {}
+        missing = False
+        for task_id in batch.task_ids:
+            task = self._by_id.get(str(task_id))
+            if task is None:
+                missing = True
+            else:
+                found[task.id] = task
+        for url in batch.source_urls:
+            tasks = self._by_url.get(_URL_VALIDATOR.normalize(url))
+            if not tasks:
+                missing = True
+            for task in tasks or ():
+                found[task.id] = task
+        return list(found.values()), missing
+
+    @staticmethod
+    def _group_by_url(tasks) -> list[list]:
+        """Group *tasks* monitoring the same canonical search URL."""
+        groups: dict = {}
+        for task in tasks:
+            url = getattr(task, "url", None)
+            key = _URL_VALIDATOR.normalize(url) if isinstance(url, str) else id(task)
+            groups.setdefault(key, []).append(task)
+        return list(groups.values())
+
+    async def _prefetch(self, groups: list[list]) -> dict | None:
+        """Fetch items of every group leader in one batch request.
+
+        Returns ``{task_id: items}`` or None when batching is disabled.
+        """
+        if not self._batch or not groups:
+            return None
+        leaders = [_group_leader(group) for group in groups]
+        fetched_at = now_warsaw().isoformat()
+        for leader in leaders:
+            self._fetched_at[leader.id] = fetched_at
+        return await self._svc.items_to_send_many(leaders)
+
+    async def _flush_bookkeeping(self) -> None:
+        """Persist the timestamps collected during the cycle in one go.
+
+        ``last_got_item`` is set to when the task's items were fetched, not to
+        the flush time, so items created while the cycle was delivering are
+        still sent next time.
+        """
+        got_item, self._got_item = list(self._got_item.values()), {}
+        checked, self._checked = list(self._checked.values()), {}
+        fetched_at, self._fetched_at = self._fetched_at, {}
+        if got_item:
+            now = now_warsaw().isoformat()
+            stamps = {task.id: fetched_at.get(task.id, now) for task in got_item}
+            await self._svc.update_last_got_item_many(got_item, stamps)
+            if self._events is not None:
+                # Registry tasks are reused between reloads; mirror the stamp
+                # on them too, as the safety-net poll delivers through the
+                # separate objects returned by pending_tasks()
+                for task in got_item:
+                    stamp = stamps[task.id]
+                    task.last_got_item = stamp
+                    registered = self._by_id.get(str(task.id))
+                    if registered is not None:
+                        registered.last_got_item = stamp
+        if checked:
+            await self._svc.update_last_updated_many(checked)
+
+    async def _fetch_group(
+        self, tasks: list, prefetched: dict | None = None
+    ) -> list[tuple]:
+        """Fetch items once for tasks sharing a URL and fan them out.
+
+        The task that received items longest ago fetches on behalf of the
+        group – its items are a superset of what the others still miss.  The
+        rendered texts are shared; every other subscriber only gets the items
+        created after its own ``last_got_item``.
+
+        Returns ``(task, items, texts)`` triples; *texts* is None when the
+        task is alone and rendering can happen at send time.
+        """
+        tasks = self._still_owned(tasks)
+        if not tasks:
+            return []
+        leader = _group_leader(tasks)
+        fetched_at = self._fetched_at.get(leader.id)
+        if prefetched is None or leader.id not in prefetched or fetched_at is None:
+            # Taken before the request – anything newer is fetched next time
+            fetched_at = now_warsaw().isoformat()
+        items = await self._fetch_items(leader, prefetched)
+        for task in tasks:
+            self._fetched_at[task.id] = fetched_at
+        if len(tasks) == 1:
+            return [(leader, items, None)]
+
+        texts = render_items(items)
+        logger.info(
+            "Sharing %d items of %s with %d subscribers",
+            len(items),
+            leader.url,
+            len(tasks) - 1,
+        )
+
+        deliveries = []
+        for task in tasks:
+            if task is leader:
+                deliveries.append((task, items, texts))
                 continue
+            since = to_utc(task.last_got_item)
+            keep = [
+                i
+                for i, item in enumerate(items)
+                if since is None or _created_after(item, since)
+            ]
+            subset = [items[i] for i in keep]
+            if self._scheduler is not None:
+                self._scheduler.observe(task, subset)
+            deliveries.append((task, subset, [texts[i] for i in keep]))
+        return deliveries
 
-            # Notify user that N items were found
-            await self._bot.send_photo(
-                chat_id=task.chat_id,
-                photo="https://tse4.mm.bing.net/th?id=OIG2.fso8nlFWoq9hafRkva2e&pid=ImgGn",
-                caption=ITEMS_FOUND_CAPTION.format(
-                    count=len(items_to_send), monitoring=task.name
-                ),
-            )
+    async def _fetch_items(self, task, prefetched: dict | None = None):
+        if prefetched is not None and task.id in prefetched:
+            items_to_send = prefetched[task.id]
+        else:
+            items_to_send = await self._svc.items_to_send(task)
+        items_to_send = [Item.coerce(item) for item in items_to_send]
+        logger.info(
+            "Found %d items to send for chat_id %s",
+            len(items_to_send),
+            task.chat_id,
+        )
+        if self._scheduler is not None:
+            self._scheduler.observe(task, items_to_send)
+        return items_to_send
+
+    async def _deliver(self, task, items_to_send, texts=None) -> None:
+        """Send *items_to_send* for *task* and record its bookkeeping.
+
+        Timestamps are only collected here and written by
+        :meth:`_flush_bookkeeping` at the end of the cycle.
+        """
+        if not self._still_owned([task]):
+            # Lease lost during the cycle – the new owner delivers these items
+            logger.info("Skipping chat_id %s: its shard moved away", task.chat_id)
+            return
+        if not items_to_send:
+            # Mark that we *did* check – useful for monitoring dashboards
+            self._checked[task.id] = task
+            return
 
-            for item in reversed(items_to_send):
-                text = _format_item_text(item)
-                # Handle both dict and object access patterns for image_url
-                image_url = (
-                    item.get("image_url")
-                    if isinstance(item, dict)
-                    else getattr(item, "image_url", None)
+        if self._outbox is not None:
+            # Durably queued – outbox consumers take care of the sending
+            await self._outbox.enqueue(task, items_to_send)
+        else:
+            await self.send_items(task, items_to_send, texts)
+
+        # Bookkeeping timestamps, deferred to the end of the cycle
+        self._got_item[task.id] = task
+        self._checked[task.id] = task
+
+    async def send_items(self, task, items_to_send, texts=None) -> None:
+        """Send the header and *items_to_send* to the task's chat.
+
+        *texts* are optional pre-rendered item texts aligned with the items.
+        """
+        # Outbox entries arrive as plain dicts
+        items_to_send = [Item.coerce(item) for item in items_to_send]
+        if texts is None:
+            texts = render_items(items_to_send)
+        # Notify user that N items were found
+        await self._send_photo(
+            task.chat_id,
+            HEADER_IMAGE_URL,
+            caption=ITEMS_FOUND_CAPTION.format(
+                count=len(items_to_send), monitoring=task.name
+            ),
+        )
+
+        if self._album:
+            delivered = await self._send_albums(task.chat_id, items_to_send, texts)
+        else:
+            delivered = await self._send_one_by_one(task.chat_id, items_to_send, texts)
+        _ITEMS_SENT.inc(len(items_to_send))
+        if self._freshness is not None:
+            await self._freshness.record(task, delivered)
+
+    async def _send_one_by_one(self, chat_id, items_to_send, texts) -> list[tuple]:
+        """Send every item as its own photo or text message (oldest first).
+
+        Returns ``(item, sent at)`` pairs stamped right after each send.
+        """
+        delivered = []
+        for item, text in zip(reversed(items_to_send), reversed(texts)):
+            image_url = _item_image_url(item)
+            if image_url:
+                await self._send_photo(
+                    chat_id, image_url, caption=text, parse_mode="MarkdownV2"
                 )
-                if image_url:
-                    await self._bot.send_photo(
-                        chat_id=task.chat_id,
-                        photo=image_url,
-                        caption=text,
+            else:
+                for part in _split_text(text):
+                    await self._limiter.send(
+                        chat_id,
+                        self._bot.send_message,
+                        chat_id=chat_id,
+                        text=part,
                         parse_mode="MarkdownV2",
                     )
-                else:
-                    await self._bot.send_message(
-                        chat_id=task.chat_id, text=text, parse_mode="MarkdownV2"
-                    )
-                await asyncio.sleep(0.5)  # prevent Telegram Flood-wait
+            delivered.append((item, datetime.now(timezone.utc)))
+        return delivered
+
+    async def _send_albums(self, chat_id, items_to_send, texts) -> list[tuple]:
+        """Send items with photos as albums and merge the rest into few texts.
+
+        Returns ``(item, sent at)`` pairs stamped after each album / message.
+        """
+        photos: list[tuple[str, str]] = []
+        photo_items: list = []
+        plain_texts: list[str] = []
+        plain_items: list = []
+        for item, text in zip(reversed(items_to_send), reversed(texts)):
+            image_url = _item_image_url(item)
+            if image_url and len(text) <= CAPTION_LIMIT:
+                photos.append((image_url, text))
+                photo_items.append(item)
+            else:
+                plain_texts.append(text)
+                plain_items.append(item)
+
+        delivered = []
+        for start in range(0, len(photos), MEDIA_GROUP_LIMIT):
+            end = start + MEDIA_GROUP_LIMIT
+            await self._send_album(chat_id, photos[start:end])
+            sent_at = datetime.now(timezone.utc)
+            delivered.extend((item, sent_at) for item in photo_items[start:end])
+
+        start = 0
+        for text, count in _pack_text_groups(plain_texts):
+            await self._limiter.send(
+                chat_id,
+                self._bot.send_message,
+                chat_id=chat_id,
+                text=text,
+                parse_mode="MarkdownV2",
+            )
+            sent_at = datetime.now(timezone.utc)
+            delivered.extend(
+                (item, sent_at) for item in plain_items[start : start + count]
+            )
+            start += count
+        return delivered
+
+    async def _send_photo(self, chat_id, url: str, **kwargs) -> None:
+        """Send photo from *url*, reusing a cached Telegram ``file_id``."""
+        file_id = await self._photo_cache.get(url) if self._photo_cache else None
+        try:
+            message = await self._limiter.send(
+                chat_id,
+                self._bot.send_photo,
+                # A stale file_id is recovered from below, not a failure
+                handled=(TelegramBadRequest,) if file_id else (),
+                chat_id=chat_id,
+                photo=file_id or url,
+                **kwargs,
+            )
+        except TelegramBadRequest:
+            if file_id is None:
+                raise
+            # Stale file_id – forget it and upload from the source URL again
+            await self._photo_cache.invalidate(url)
+            file_id = None
+            message = await self._limiter.send(
+                chat_id, self._bot.send_photo, chat_id=chat_id, photo=url, **kwargs
+            )
+        if self._photo_cache and file_id is None:
+            await self._photo_cache.remember(url, message)
+
+    async def _send_album(self, chat_id, batch: list[tuple[str, str]]) -> None:
+        """Send ``(image_url, caption)`` pairs as one ``send_media_group``."""
+        if len(batch) == 1:
+            # Albums need at least two media – fall back to a plain photo
+            url, caption = batch[0]
+            await self._send_photo(
+                chat_id, url, caption=caption, parse_mode="MarkdownV2"
+            )
+            return
+
+        urls = [url for url, _ in batch]
+        file_ids = (
+            await self._photo_cache.get_many(urls)
+            if self._photo_cache
+            else [None] * len(batch)
+        )
+
+        def build_media(ids) -> list[InputMediaPhoto]:
+            return [
+                InputMediaPhoto(
+                    media=file_id or url, caption=caption, parse_mode="MarkdownV2"
+                )
+                for (url, caption), file_id in zip(batch, ids)
+            ]
 
-            # Persist bookkeeping timestamps
-            await self._svc.update_last_got_item(task.chat_id)
-            await self._svc.update_last_updated(task)
+        try:
+            messages = await self._limiter.send(
+                chat_id,
+                self._bot.send_media_group,
+                cost=len(batch),
+                handled=(TelegramBadRequest,) if any(file_ids) else (),
+                chat_id=chat_id,
+                media=build_media(file_ids),
+            )
+        except TelegramBadRequest:
+            if not any(file_ids):
+                raise
+            await self._photo_cache.invalidate(
+                *(url for url, file_id in zip(urls, file_ids) if file_id)
+            )
+            file_ids = [None] * len(batch)
+            messages = await self._limiter.send(
+                chat_id,
+                self._bot.send_media_group,
+                cost=len(batch),
+                chat_id=chat_id,
+                media=build_media(file_ids),
+            )
+        if self._photo_cache:
+            await self._photo_cache.remember_many(
+                (url, message)
+                for url, file_id, message in zip(urls, file_ids, messages)
+                if file_id is None
+            )
 
 
 # ---------------------------- Formatting helpers -----------------------------
 
 
-def _escape_markdown_v2(text: str) -> str:
-    """
-    Escape all special characters for Telegram MarkdownV2.
-    """
-    if not text:
-        return text
-    # All special characters that need escaping in MarkdownV2
-    escape_chars = r"_*[]()~`>#+-=|{}.!"
-    for char in escape_chars:
-        text = text.replace(char, rf"\{char}")
-    return text
+# Rendering lives in services.renderer; old names kept for existing callers
+_escape_markdown_v2 = escape_markdown_v2
+bold_telegram_md = bold_markdown_v2
+_format_item_text = render_item
+
+
+def _item_image_url(item) -> str | None:
+    """Return the item's image URL (None when unset)."""
+    return getattr(item, "image_url", None)
+
+
+def _group_leader(tasks: list):
+    """Return the task fetching on behalf of a shared-URL group."""
+    if len(tasks) == 1:
+        return tasks[0]
+    return min(tasks, key=_last_got_item_key)
 
 
-def bold_telegram_md(text: str) -> str:
+def _last_got_item_key(task) -> tuple[bool, datetime]:
+    """Sort key putting tasks that never/longest ago got items first."""
+    since = to_utc(getattr(task, "last_got_item", None))
+    return (since is not None, since or _EPOCH)
+
+
+def _created_after(item, since: datetime) -> bool:
+    """Return True unless *item* is known to be created at/before *since*."""
+    created = to_utc(getattr(item, "created_at", None))
+    return created is None or created > since
+
+
+def _pack_texts(texts: list[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Merge *texts* into as few messages as possible, each below *limit*."""
+    return [message for message, _count in _pack_text_groups(texts, limit)]
+
+
+def _pack_text_groups(
+    texts: list[str], limit: int = MESSAGE_LIMIT
+) -> list[tuple[str, int]]:
+    """Like :func:`_pack_texts`, paired with how many texts each message ends.
+
+    A text longer than *limit* is split (see :func:`_split_text`) and counted
+    in the message holding its last part.
     """
-    Safely wrap user content in *...* for Telegram MarkdownV2.
-    Escapes all special characters before wrapping.
+    groups: list[tuple[str, int]] = []
+    current = ""
+    count = 0
+    for text in texts:
+        for part in _split_text(text, limit):
+            if not current:
+                current = part
+            elif len(current) + len(MESSAGE_SEPARATOR) + len(part) <= limit:
+                current += MESSAGE_SEPARATOR + part
+            else:
+                groups.append((current, count))
+                current = part
+                count = 0
+        count += 1
+    if current:
+        groups.append((current, count))
+    return groups
+
+
+def _split_text(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split *text* into parts of at most *limit* characters.
+
+    Parts break at line ends – rendered entities never span lines, so the
+    MarkdownV2 markup stays valid.  A single longer line is cut hard, but
+    never inside an escape sequence.
     """
-    if not text:
-        return ""
-    text = _escape_markdown_v2(text)
-    return f"*{text}*"
-
-
-def _format_item_text(item) -> str:  # type: ignore[annotation-unreachable]
-    """Return Markdown-formatted text for *item* compatible with Telegram."""
-    # Handle both dict and object access patterns
-    description = (
-        item.get("description", "")
-        if isinstance(item, dict)
-        else getattr(item, "description", "")
-    )
-    desc_lines = description.strip().split("\n")
-    extra = {}
-    for line in desc_lines:
-        if line.startswith("price:"):
-            extra["price_info"] = line.replace("price:", "Price:").strip()
-        elif line.startswith("deposit:"):
-            extra["deposit_info"] = line.replace("deposit:", "Deposit:").strip()
-        elif line.startswith("animals_allowed:"):
-            animals_allowed = line.replace("animals_allowed:", "").strip()
-            if animals_allowed == "true":
-                extra["animals_info"] = "Pets: Allowed"
-            elif animals_allowed == "false":
-                extra["animals_info"] = "Pets: Not allowed"
-        elif line.startswith("rent:"):
-            extra["rent_info"] = line.replace("rent:", "Additional rent:").strip()
-
-    # Extract item fields with dict/object compatibility
-    title = (
-        item.get("title", "No title")
-        if isinstance(item, dict)
-        else getattr(item, "title", "No title")
-    )
-    price = (
-        item.get("price", "N/A")
-        if isinstance(item, dict)
-        else getattr(item, "price", "N/A")
-    )
-    location = (
-        item.get("location", "N/A")
-        if isinstance(item, dict)
-        else getattr(item, "location", "N/A")
-    )
-    created_at = (
-        item.get("created_at", "N/A")
-        if isinstance(item, dict)
-        else getattr(item, "created_at", "N/A")
-    )
-    item_url = (
-        item.get("item_url", "#")
-        if isinstance(item, dict)
-        else getattr(item, "item_url", "#")
-    )
-    source = (
-        item.get("source") if isinstance(item, dict) else getattr(item, "source", None)
-    )
-
-    # Format and escape all user-provided content for MarkdownV2
-    title_bold = bold_telegram_md(title)
-    price_escaped = _escape_markdown_v2(str(price))
-    location_escaped = _escape_markdown_v2(str(location))
-
-    # Format created_at from ISO format to readable format with bold time
-    if created_at and created_at != "N/A":
-        try:
-            dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-            date_part = dt.strftime("%d.%m.%Y")
-            time_part = dt.strftime("%H:%M")
-            # Build the full date string, then escape and bold appropriately
-            date_formatted = f"{_escape_markdown_v2(date_part)} {_escape_markdown_v2('-')} {bold_telegram_md(time_part)}"
-        except (ValueError, AttributeError):
-            date_formatted = _escape_markdown_v2(str(created_at))
-    else:
-        date_formatted = "N/A"
-
-    text = (
-        f"📦 {title_bold}\n\n"
-        f"💰 {bold_telegram_md('Price')}: {price_escaped}\n"
-        f"📍 {bold_telegram_md('Location')}: {location_escaped}\n"
-        f"🕒 {bold_telegram_md('Posted')}: {date_formatted}\n"
-    )
-    # Optional extras
-    if price_info := extra.get("price_info"):
-        text += f"💵 {bold_telegram_md('Price')}: {price_info}\n"
-    if (deposit := extra.get("deposit_info")) and deposit != "Deposit: 0":
-        text += f"🔐 {bold_telegram_md('Deposit')}: {deposit}\n"
-    if animals := extra.get("animals_info"):
-        text += f"🐾 {bold_telegram_md('Animals')}: {animals}\n"
-    if rent := extra.get("rent_info"):
-        text += f"💳 {bold_telegram_md('Rent')}: {rent}\n"
-
-    platform_name = _escape_markdown_v2(source if source else "Unknown source")
-    item_url_escaped = _escape_markdown_v2(item_url)
-    text += f"🔗 [View on {platform_name}]({item_url_escaped})"
-    return text
+    if len(text) <= limit:
+        return [text]
+    pieces = []
+    for line in text.split("\n"):
+        while len(line) > limit:
+            cut = limit
+            # An odd run of trailing backslashes would escape the next part
+            if (cut - len(line[:cut].rstrip("\\"))) % 2:
+                cut -= 1
+            pieces.append(line[:cut])
+            line = line[cut:]
+        pieces.append(line)
+    parts = [pieces[0]]
+    for piece in pieces[1:]:
+        if len(parts[-1]) + 1 + len(piece) <= limit:
+            parts[-1] += "\n" + piece
+        else:
+            parts.append(piece)
+    return parts
@@ -0,0 +1,249 @@
+"""Standalone multi-process notifier.
+
+Run with::
+
+    python -m services.notifier_worker [--workers N]
+
+The parent process starts ``N`` worker processes and restarts any that die.
+Every worker owns the chats hashed to its shard (see
+:func:`tools.sharding.shard_for`) and runs its own event loop, ``Bot`` session
+and Redis connection, so sending no longer competes with ``dp.start_polling``
+for the bot's loop and scales past one core.  Set ``RUN_NOTIFIER_IN_BOT=false``
+for the polling bot to only handle user interaction.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+from typing import Any, Final
+
+import redis.asyncio as redis
+from aiogram import Bot
+
+from core.config import settings
+from core.dependencies import get_monitoring_service
+from core.metrics import monitor_loop_lag, start_metrics_server
+from services.coordination import LeaseCoordinator
+from services.events import ItemEvents
+from services.freshness import FreshnessTracker
+from services.notifier import Notifier
+from services.outbox import NotificationOutbox
+from services.photo_cache import PhotoCache
+from services.rate_limiter import TelegramRateLimiter
+from services.scheduler import AdaptivePollingScheduler
+
+logger: Final = logging.getLogger(__name__)
+
+RESTART_DELAY_S: Final = 5.0
+
+
+def create_notifier(
+    bot: Bot,
+    redis_client: Any,
+    *,
+    shard: tuple[int, int] | None = None,
+) -> Notifier:
+    """Build a :class:`Notifier` configured from ``settings``.
+
+    With a *shard* ``(index, count)`` the global Telegram rate is split evenly
+    between the workers so together they stay under the bot-wide limit.  With
+    ``NOTIFIER_COORDINATION`` the static shard is replaced by Redis leases and
+    the rate is split between the workers of all ``NOTIFIER_HOSTS``.
+
+    The outbox gets one stream per shard; the worker only consumes the
+    streams of the shards it serves, so every chat is sent by one worker.
+    """
+    coordinator = (
+        LeaseCoordinator(
+            redis_client,
+            shards=settings.NOTIFIER_SHARDS,
+            lease_ms=settings.NOTIFIER_LEASE_SECONDS * 1000,
+        )
+        if settings.NOTIFIER_COORDINATION
+        else None
+    )
+    workers = shard[1] if shard else 1
+    if coordinator is not None:
+        workers *= max(1, settings.NOTIFIER_HOSTS)
+    limiter = TelegramRateLimiter(
+        global_rate=settings.TELEGRAM_GLOBAL_RATE / workers,
+        private_rate=settings.TELEGRAM_PRIVATE_CHAT_RATE,
+        group_rate=settings.TELEGRAM_GROUP_CHAT_PER_MINUTE / 60,
+    )
+    photo_cache = (
+        PhotoCache(
+            redis_client,
+            ttl_s=settings.PHOTO_CACHE_TTL_SECONDS,
+            max_entries=settings.PHOTO_CACHE_MAX_ENTRIES,
+        )
+        if settings.PHOTO_CACHE_ENABLED
+        else None
+    )
+    # Outbox streams per shard, consumed by the worker serving that shard
+    if coordinator is not None:
+        shards, serves = settings.NOTIFIER_SHARDS, lambda: coordinator.owned
+    elif shard is not None:
+        shards, serves = shard[1], lambda: (shard[0],)
+    else:
+        shards, serves = 1, None
+    outbox = (
+        NotificationOutbox(
+            redis_client,
+            stream=settings.OUTBOX_STREAM,
+            max_deliveries=settings.OUTBOX_MAX_DELIVERIES,
+            shards=shards,
+            serves=serves,
+        )
+        if settings.NOTIFIER_OUTBOX
+        else None
+    )
+    scheduler = (
+        AdaptivePollingScheduler(
+            min_interval_s=settings.ADAPTIVE_MIN_INTERVAL_SECONDS,
+            max_interval_s=settings.ADAPTIVE_MAX_INTERVAL_SECONDS,
+        )
+        if settings.ADAPTIVE_POLLING
+        else None
+    )
+    events = (
+        ItemEvents(redis_client, stream=settings.ITEM_EVENTS_STREAM)
+        if settings.NOTIFIER_PUSH
+        else None
+    )
+    freshness = (
+        FreshnessTracker(redis_client, ttl_s=settings.FRESHNESS_TTL_SECONDS)
+        if settings.FRESHNESS_TRACKING
+        else None
+    )
+    return Notifier(
+        bot,
+        get_monitoring_service(),
+        concurrency=settings.NOTIFIER_CONCURRENCY,
+        limiter=limiter,
+        album=settings.NOTIFIER_ALBUMS,
+        photo_cache=photo_cache,
+        outbox=outbox,
+        scheduler=scheduler,
+        shard=None if coordinator else shard,
+        coordinator=coordinator,
+        batch=settings.NOTIFIER_BATCH,
+        events=events,
+        freshness=freshness,
+    )
+
+
+async def run_notifier(notifier: Notifier) -> None:
+    """Run the periodic check (or push mode) and the outbox consumers forever."""
+    if notifier.events is not None:
+        jobs = [notifier.run_on_events(settings.NOTIFIER_SAFETY_POLL_SECONDS)]
+    else:
+        jobs = [notifier.run_periodically(settings.CHECK_FREQUENCY_SECONDS)]
+    if notifier.coordinator is not None:
+        # Claim shards before the first cycle so it is not skipped
+        await notifier.coordinator.heartbeat()
+        jobs.append(notifier.coordinator.run())
+    if notifier.outbox is not None:
+        logger.info("Starting %d outbox consumers...", settings.OUTBOX_CONSUMERS)
+        jobs.append(
+            notifier.outbox.run_consumers(
+                notifier.send_items, settings.OUTBOX_CONSUMERS
+            )
+        )
+    await asyncio.gather(*jobs)
+
+
+async def worker_main(index: int, count: int) -> None:
+    """Entry point of one worker process serving shard *index* of *count*."""
+    bot = Bot(token=settings.BOT_TOKEN)
+    redis_client = redis.Redis(
+        host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True
+    )
+    notifier = create_notifier(bot, redis_client, shard=(index, count))
+    logger.info("Notifier worker %d/%d started", index + 1, count)
+    metrics = None
+    if settings.METRICS_ENABLED:
+        metrics = await start_metrics_server(
+            settings.METRICS_HOST, settings.METRICS_PORT + 1 + index
+        )
+        lag = asyncio.create_task(monitor_loop_lag())
+    try:
+        await run_notifier(notifier)
+    finally:
+        if metrics is not None:
+            lag.cancel()
+            await metrics.cleanup()
+        await bot.session.close()
+        await redis_client.aclose()
+
+
+def _run_worker(index: int, count: int) -> None:
+    _configure_logging()
+    try:
+        asyncio.run(worker_main(index, count))
+    except KeyboardInterrupt:
+        pass
+
+
+def _configure_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+
+def supervise(count: int) -> None:
+    """Start *count* worker processes and restart them if they exit."""
+    ctx = multiprocessing.get_context("spawn")
+
+    def start(index: int):
+        process = ctx.Process(
+            target=_run_worker,
+            args=(index, count),
+            name=f"notifier-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    processes = [start(index) for index in range(count)]
+    try:
+        while True:
+            time.sleep(RESTART_DELAY_S)
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    logger.error(
+                        "Notifier worker %s exited with code %s, restarting",
+                        process.name,
+                        process.exitcode,
+                    )
+                    processes[index] = start(index)
+    except KeyboardInterrupt:
+        logger.info("Stopping notifier workers...")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.NOTIFIER_WORKERS,
+        help="number of worker processes (default: NOTIFIER_WORKERS)",
+    )
+    args = parser.parse_args(argv)
+    _configure_logging()
+    count = max(1, args.workers)
+    logger.info("Starting %d notifier workers...", count)
+    supervise(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Durable outbound notification queue on top of Redis Streams.
+
+The notifier acts as the *producer*: every batch of items found for a task is
+appended to a stream and only then is the task's bookkeeping updated, so a
+crash can no longer lose a batch.  Delivery is at-least-once: a consumer group
+of sender coroutines delivers entries, acknowledging them on success, and an
+entry interrupted mid-send (crash, error) is redelivered whole – including
+the messages that already went out.  Failed entries stay pending and are
+reclaimed after ``claim_idle_ms``; once an entry has been delivered
+``max_deliveries`` times it is moved to a dead-letter stream.
+
+The consumers of one process share their per-chat lanes and take turns
+reading, so entries of one chat are delivered in stream order even when they
+are read by different consumers.
+
+With ``shards > 1`` every chat's entries go to the stream of its shard
+(``<stream>:<shard>``, see :func:`tools.sharding.shard_for`) and a process
+only consumes the shards it ``serves`` – the same chats its notifier polls –
+so each chat is sent by one process, under that process' per-chat limits.
+Changing the shard count strands entries left in the old shard streams.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable, Final, Iterable, Sequence
+
+from redis.exceptions import ResponseError
+
+from repositories.monitoring import Item, MonitoringTask
+from services.lanes import ChatLanes
+from tools.sharding import shard_for
+
+__all__ = ["NotificationOutbox"]
+
+logger: Final = logging.getLogger(__name__)
+
+Handler = Callable[[MonitoringTask, list], Awaitable[None]]
+
+
+class NotificationOutbox:
+    """Producer / consumer-group wrapper around a Redis Stream."""
+
+    def __init__(
+        self,
+        redis: Any,
+        *,
+        stream: str = "notifier:outbox",
+        group: str = "notifier",
+        dead_letter_stream: str | None = None,
+        max_deliveries: int = 5,
+        claim_idle_ms: int = 60_000,
+        block_ms: int = 5_000,
+        batch_size: int = 20,
+        maxlen: int = 100_000,
+        shards: int = 1,
+        serves: Callable[[], Iterable[int]] | None = None,
+    ) -> None:
+        self._redis = redis
+        self._stream = stream
+        self._group = group
+        self._dead_letter_stream = dead_letter_stream or f"{stream}:dead"
+        self._max_deliveries = max_deliveries
+        self._claim_idle_ms = claim_idle_ms
+        self._block_ms = block_ms
+        self._batch_size = batch_size
+        self._maxlen = maxlen
+        self._shards = max(1, shards)
+        # Shards consumed by this process (all of them by default)
+        self._serves = serves
+        self._ready_streams: set[str] = set()
+        # Shared by the consumers of this process: reads happen one at a time
+        # and queue their entries on the same per-chat lanes in stream order
+        self._read_lock = asyncio.Lock()
+        self._lanes = ChatLanes()
+        # ``(stream, entry id)`` queued in a lane or being sent by this
+        # process; they look idle to XAUTOCLAIM while waiting but must not be
+        # submitted again
+        self._queued: set = set()
+
+    def stream_for(self, chat_id: Any) -> str:
+        """Return the stream holding the entries of *chat_id*."""
+        if self._shards == 1:
+            return self._stream
+        return f"{self._stream}:{shard_for(chat_id, self._shards)}"
+
+    # ------------------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------------------
+    async def enqueue(self, task: Any, items: Sequence[Any]) -> str:
+        """Append *items* found for *task* to the stream and return entry id."""
+        fields = {
+            "task_id": str(task.id),
+            "chat_id": str(task.chat_id),
+            "name": task.name or "",
+            "items": json.dumps(list(items), default=_json_default),
+        }
+        return await self._redis.xadd(
+            self.stream_for(task.chat_id),
+            fields,
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Consumers
+    # ------------------------------------------------------------------
+    async def run_consumers(self, handler: Handler, count: int) -> None:
+        """Run *count* consumer coroutines forever."""
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        await asyncio.gather(
+            *(self.consume(handler, f"{prefix}-{i}") for i in range(count))
+        )
+
+    async def consume(self, handler: Handler, consumer: str) -> None:
+        """Deliver stream entries with *handler* as group member *consumer*."""
+        while True:
+            try:
+                await self.consume_once(handler, consumer)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox consumer %s failed", consumer)
+                await asyncio.sleep(1)
+
+    async def consume_once(self, handler: Handler, consumer: str) -> int:
+        """Read one batch (stale entries first) and deliver it.
+
+        Entries for the same chat are delivered in stream order – also across
+        the consumers of this process – different chats in parallel.  Returns
+        the number of entries processed.
+        """
+        streams = self._served_streams()
+        if not streams:
+            # No shard served right now (e.g. leases not acquired yet)
+            await asyncio.sleep(self._block_ms / 1000)
+            return 0
+        await self._ensure_groups(streams)
+        async with self._read_lock:
+            entries = await self._claim_stale(streams, consumer)
+            if not entries:
+                response = await self._redis.xreadgroup(
+                    self._group,
+                    consumer,
+                    {stream: ">" for stream in streams},
+                    count=self._batch_size,
+                    block=self._block_ms,
+                )
+                entries = [
+                    (stream, entry_id, fields)
+                    for stream, batch in response or ()
+                    for entry_id, fields in batch
+                ]
+            entries = [e for e in entries if e[:2] not in self._queued]
+            # Queued before the next consumer may read, so lanes keep order
+            jobs = []
+            for stream, entry_id, fields in entries:
+                self._queued.add((stream, entry_id))
+                jobs.append(
+                    self._lanes.submit(
+                        fields.get("chat_id", ""),
+                        functools.partial(
+                            self._process, handler, stream, entry_id, fields
+                        ),
+                    )
+                )
+        await asyncio.gather(*jobs)
+        return len(entries)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _served_streams(self) -> list[str]:
+        if self._shards == 1:
+            return [self._stream]
+        shards = range(self._shards) if self._serves is None else self._serves()
+        return [f"{self._stream}:{shard}" for shard in sorted(shards)]
+
+    async def _ensure_groups(self, streams: list[str]) -> None:
+        for stream in streams:
+            if stream in self._ready_streams:
+                continue
+            try:
+                await self._redis.xgroup_create(
+                    stream, self._group, id="0", mkstream=True
+                )
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._ready_streams.add(stream)
+
+    async def _claim_stale(self, streams: list[str], consumer: str) -> list:
+        """Take over entries another consumer left pending for too long.
+
+        Returns up to ``batch_size`` ``(stream, entry id, fields)`` triples.
+        """
+        claimed: list = []
+        for stream in streams:
+            response = await self._redis.xautoclaim(
+                stream,
+                self._group,
+                consumer,
+                min_idle_time=self._claim_idle_ms,
+                start_id="0-0",
+                count=self._batch_size - len(claimed),
+            )
+            # [next_start_id, entries, deleted_ids]; deleted entries come as None
+            claimed.extend(
+                (stream, entry_id, fields)
+                for entry_id, fields in (e for e in response[1] if e and e[1])
+            )
+            if len(claimed) >= self._batch_size:
+                break
+        return claimed
+
+    async def _process(
+        self, handler: Handler, stream: str, entry_id: str, fields: dict
+    ) -> None:
+        try:
+            await self._deliver(handler, stream, entry_id, fields)
+        finally:
+            self._queued.discard((stream, entry_id))
+
+    async def _deliver(
+        self, handler: Handler, stream: str, entry_id: str, fields: dict
+    ) -> None:
+        try:
+            task = MonitoringTask(
+                {
+                    "id": int(fields["task_id"]),
+                    "chat_id": fields["chat_id"],
+                    "name": fields["name"],
+                }
+            )
+            items = json.loads(fields["items"])
+        except (KeyError, ValueError) as e:
+            logger.error("Malformed outbox entry %s: %s", entry_id, e)
+            await self._dead_letter(stream, entry_id, fields, f"malformed: {e}")
+            return
+
+        try:
+            await handler(task, items)
+        except Exception as e:
+            deliveries = await self._deliveries(stream, entry_id)
+            if deliveries >= self._max_deliveries:
+                logger.error(
+                    "Giving up on outbox entry %s after %d deliveries: %s",
+                    entry_id,
+                    deliveries,
+                    e,
+                )
+                await self._dead_letter(stream, entry_id, fields, repr(e))
+            else:
+                # Left pending – reclaimed and retried after claim_idle_ms
+                logger.warning(
+                    "Delivery of outbox entry %s failed (attempt %d): %s",
+                    entry_id,
+                    deliveries,
+                    e,
+                )
+            return
+
+        await self._redis.xack(stream, self._group, entry_id)
+
+    async def _deliveries(self, stream: str, entry_id: str) -> int:
+        pending = await self._redis.xpending_range(
+            stream, self._group, min=entry_id, max=entry_id, count=1
+        )
+        return pending[0]["times_delivered"] if pending else 1
+
+    async def _dead_letter(
+        self, stream: str, entry_id: str, fields: dict, error: str
+    ) -> None:
+        await self._redis.xadd(
+            self._dead_letter_stream,
+            {
+                **fields,
+                "original_stream": stream,
+                "original_id": entry_id,
+                "error": error,
+            },
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+        await self._redis.xack(stream, self._group, entry_id)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Item):
+        return value.to_dict()
+    return str(value)
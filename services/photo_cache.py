@@ -0,0 +1,141 @@
+"""Redis-backed cache of Telegram ``file_id``s keyed by source image URL.
+
+After a photo is uploaded from a URL, Telegram returns a ``file_id`` that can
+be reused for later sends of the same image.  Reusing it avoids Telegram
+re-downloading the image from slow third-party hosts.
+
+Entries expire after ``ttl_s`` and the cache is additionally bounded to
+``max_entries`` with least-recently-used eviction, tracked in a sorted set
+scored by last access time.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from typing import Any, Final, Iterable, Sequence
+
+__all__ = ["PhotoCache"]
+
+logger: Final = logging.getLogger(__name__)
+
+DAY: Final = 24 * 60 * 60
+
+
+class PhotoCache:
+    """Map image URL → Telegram ``file_id`` with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        redis: Any,
+        *,
+        ttl_s: int = 7 * DAY,
+        max_entries: int = 50_000,
+        prefix: str = "photo_cache",
+    ) -> None:
+        self._redis = redis
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._prefix = prefix
+        self._lru_key = f"{prefix}:lru"
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def get(self, url: str) -> str | None:
+        """Return cached ``file_id`` for *url* or None."""
+        return (await self.get_many([url]))[0]
+
+    async def get_many(self, urls: Sequence[str]) -> list[str | None]:
+        """Return cached ``file_id``s for *urls* (None for misses)."""
+        if not urls:
+            return []
+        digests = [self._digest(url) for url in urls]
+        try:
+            file_ids = await self._redis.mget([self._key(d) for d in digests])
+            now = time.time()
+            hits = {d: now for d, f in zip(digests, file_ids) if f}
+            misses = [d for d, f in zip(digests, file_ids) if not f]
+            async with self._redis.pipeline(transaction=False) as pipe:
+                if hits:
+                    pipe.zadd(self._lru_key, hits)
+                if misses:
+                    # Drop LRU entries whose value already expired
+                    pipe.zrem(self._lru_key, *misses)
+                await pipe.execute()
+            return [f or None for f in file_ids]
+        except Exception as e:
+            logger.error(f"Error reading photo cache: {e}")
+            return [None] * len(urls)
+
+    async def set(self, url: str, file_id: str) -> None:
+        """Remember *file_id* for *url* and evict least recently used entries."""
+        await self.set_many([(url, file_id)])
+
+    async def set_many(self, pairs: Iterable[tuple[str, str]]) -> None:
+        """Remember several ``(url, file_id)`` pairs at once."""
+        entries = {self._digest(url): file_id for url, file_id in pairs if file_id}
+        if not entries:
+            return
+        try:
+            now = time.time()
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for digest, file_id in entries.items():
+                    pipe.set(self._key(digest), file_id, ex=self._ttl_s)
+                pipe.zadd(self._lru_key, {d: now for d in entries})
+                pipe.zcard(self._lru_key)
+                *_, size = await pipe.execute()
+            if size > self._max_entries:
+                await self._evict(size - self._max_entries)
+        except Exception as e:
+            logger.error(f"Error writing photo cache: {e}")
+
+    async def remember(self, url: str, message: Any) -> None:
+        """Cache the largest photo size of a sent *message* under *url*."""
+        await self.remember_many([(url, message)])
+
+    async def remember_many(self, pairs: Iterable[tuple[str, Any]]) -> None:
+        """Cache file_ids of sent messages given ``(url, message)`` pairs."""
+        await self.set_many(
+            (url, file_id)
+            for url, message in pairs
+            if (file_id := _photo_file_id(message))
+        )
+
+    async def invalidate(self, *urls: str) -> None:
+        """Forget cached entries for *urls* (e.g. Telegram rejected the id)."""
+        if not urls:
+            return
+        digests = [self._digest(url) for url in urls]
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._key(d) for d in digests))
+                pipe.zrem(self._lru_key, *digests)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error invalidating photo cache: {e}")
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    async def _evict(self, count: int) -> None:
+        oldest = await self._redis.zpopmin(self._lru_key, count)
+        if oldest:
+            await self._redis.delete(*(self._key(d) for d, _ in oldest))
+
+    def _key(self, digest: str) -> str:
+        return f"{self._prefix}:{digest}"
+
+    @staticmethod
+    def _digest(url: str) -> str:
+        # Keys stay short and bounded regardless of URL length
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _photo_file_id(message: Any) -> str | None:
+    """Return the ``file_id`` of the largest photo in *message*, if any."""
+    photos = getattr(message, "photo", None)
+    if not photos:
+        return None
+    return photos[-1].file_id
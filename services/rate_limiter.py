@@ -0,0 +1,200 @@
+"""Token-bucket rate limiting for outgoing Telegram Bot API calls.
+
+Telegram enforces roughly 30 messages per second per bot, about one message
+per second in a private chat and 20 messages per minute in a group.  Going
+over those limits results in ``429 Too Many Requests`` with a ``retry_after``
+hint.  :class:`TelegramRateLimiter` keeps one global bucket plus one bucket
+per chat so throughput stays close to the real limits without flood-waits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Final, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from core.metrics import Counter, Histogram
+
+__all__ = [
+    "SEND_FAILURES",
+    "WAIT_SECONDS",
+    "TokenBucket",
+    "TelegramRateLimiter",
+]
+
+logger: Final = logging.getLogger(__name__)
+
+WAIT_SECONDS: Final = Histogram(
+    "telegram_rate_limiter_wait_seconds",
+    "Time a Bot API call waited for rate-limit tokens",
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+SEND_FAILURES: Final = Counter(
+    "telegram_send_failures_total",
+    "Bot API calls that failed for good, by exception class",
+    ("error",),
+)
+_WAIT: Final = WAIT_SECONDS.labels()
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Reservation based token bucket.
+
+    Tokens may go negative: :meth:`reserve` always books the tokens and
+    returns how long the caller must wait before using them.  This keeps the
+    bucket lock-free under asyncio – no coroutine ever holds it while
+    sleeping.
+    """
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated", "_blocked_until", "_clock")
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Book *cost* tokens and return the seconds to wait before sending."""
+        now = self._clock()
+        self._refill(now)
+        self._tokens -= cost
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return max(wait, self._blocked_until - now)
+
+    def block(self, seconds: float) -> None:
+        """Refuse traffic for *seconds* (used for ``retry_after`` hints)."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def is_idle(self) -> bool:
+        """Return True if the bucket is full and not blocked (safe to drop)."""
+        now = self._clock()
+        self._refill(now)
+        return self._tokens >= self.capacity and self._blocked_until <= now
+
+
+class TelegramRateLimiter:
+    """Global + per-chat token buckets honouring Telegram ``retry_after``."""
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 30.0,
+        private_rate: float = 1.0,
+        private_burst: float = 3.0,
+        group_rate: float = 20 / 60,
+        group_burst: float = 3.0,
+        max_retries: int = 3,
+        max_chat_buckets: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_rate, clock)
+        self._private = (private_rate, private_burst)
+        self._group = (group_rate, group_burst)
+        self._max_retries = max_retries
+        self._max_chat_buckets = max_chat_buckets
+        self._chats: Dict[str, TokenBucket] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def acquire(self, chat_id: int | str, cost: int = 1) -> float:
+        """Wait until *cost* messages may be sent to *chat_id*.
+
+        Returns the total number of seconds spent waiting.
+        """
+        waited = 0.0
+        # Wait for the chat first so the global token is only taken when the
+        # message is actually about to leave.
+        wait = self._chat_bucket(chat_id).reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        wait = self._global.reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        _WAIT.observe(waited)
+        return waited
+
+    def penalize(self, chat_id: int | str, retry_after: float) -> None:
+        """Block *chat_id* for *retry_after* seconds after a 429 response."""
+        self._chat_bucket(chat_id).block(retry_after)
+
+    async def send(
+        self,
+        chat_id: int | str,
+        method: Callable[..., Awaitable[T]],
+        /,
+        *,
+        cost: int = 1,
+        handled: tuple[type[Exception], ...] = (),
+        **kwargs: Any,
+    ) -> T:
+        """Call Bot API *method* with *kwargs* once the buckets allow it.
+
+        ``TelegramRetryAfter`` is retried up to ``max_retries`` times after
+        waiting for the server supplied ``retry_after``.  Errors of the
+        *handled* types, which the caller recovers from, are raised without
+        being counted in ``SEND_FAILURES``.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(chat_id, cost)
+            try:
+                return await method(**kwargs)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self._max_retries:
+                    SEND_FAILURES.labels(type(e).__name__).inc()
+                    raise
+                logger.warning(
+                    "Flood-wait for chat_id %s, retrying in %s s (attempt %d)",
+                    chat_id,
+                    e.retry_after,
+                    attempt,
+                )
+                self.penalize(chat_id, e.retry_after)
+            except Exception as e:
+                if not isinstance(e, handled):
+                    SEND_FAILURES.labels(type(e).__name__).inc()
+                raise
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        key = str(chat_id)
+        bucket = self._chats.get(key)
+        if bucket is None:
+            if len(self._chats) >= self._max_chat_buckets:
+                self._prune()
+            # Groups, supergroups and channels have negative ids / @usernames
+            rate, burst = self._group if key.startswith(("-", "@")) else self._private
+            bucket = self._chats[key] = TokenBucket(rate, burst, self._clock)
+        return bucket
+
+    def _prune(self) -> None:
+        for key in [k for k, b in self._chats.items() if b.is_idle()]:
+            del self._chats[key]
@@ -0,0 +1,156 @@
+"""Cached reachability checks of listing URLs over a pooled HTTP client.
+
+A monitoring is created after the URL answers ``200`` – checked once while
+asking for the URL and again when the task is persisted.  :class:`ReachabilityChecker`
+keeps one long-lived ``httpx.AsyncClient`` so repeated checks reuse the
+TLS connection to olx.pl, probes with ``HEAD`` before falling back to a
+body-less ``GET``, and remembers results for a short time keyed by the
+normalized URL.  Negative results expire sooner so a transient failure does
+not block a user for long.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Callable, Dict, Final, Iterable, Optional, Tuple
+
+import httpx
+
+__all__ = ["ReachabilityChecker", "shared_checker"]
+
+logger: Final = logging.getLogger(__name__)
+
+BROWSER_HEADERS: Final = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+def _cache_key(url: str) -> str:
+    """Canonical form of *url*: lower-case scheme/host, sorted query, no fragment."""
+    parsed = urllib.parse.urlsplit(url.strip())
+    query = urllib.parse.urlencode(
+        sorted(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)),
+        doseq=True,
+    )
+    return urllib.parse.urlunsplit(
+        (parsed.scheme.lower(), parsed.netloc.lower(), parsed.path, query, "")
+    )
+
+
+class ReachabilityChecker:
+    """Answer "does *url* return 200?" with pooling, caching and batching."""
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        *,
+        ttl_s: float = 300.0,
+        negative_ttl_s: float = 30.0,
+        max_entries: int = 4096,
+        concurrency: int = 8,
+        timeout_s: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._client = client or httpx.AsyncClient(
+            headers=BROWSER_HEADERS,
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=concurrency),
+        )
+        self._own_client = client is None
+        self._ttl_s = ttl_s
+        self._negative_ttl_s = negative_ttl_s
+        self._max_entries = max_entries
+        self._concurrency = max(1, concurrency)
+        self._clock = clock
+        self._results: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def is_reachable(self, url: str) -> bool:
+        """Return True if *url* answers 200 (cached)."""
+        key = _cache_key(url)
+        cached = self._cached(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        result = await self._probe(url)
+        self._store(key, result)
+        return result
+
+    async def check_many(self, urls: Iterable[str]) -> Dict[str, bool]:
+        """Check *urls* concurrently (at most ``concurrency`` at a time)."""
+        urls = list(dict.fromkeys(urls))
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def check(url: str) -> bool:
+            async with semaphore:
+                return await self.is_reachable(url)
+
+        results = await asyncio.gather(*(check(url) for url in urls))
+        return dict(zip(urls, results))
+
+    def invalidate(self, url: str) -> None:
+        """Forget the cached result for *url*."""
+        self._results.pop(_cache_key(url), None)
+
+    async def aclose(self) -> None:
+        if self._own_client:
+            await self._client.aclose()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    async def _probe(self, url: str) -> bool:
+        try:
+            response = await self._client.head(url)
+            if response.status_code == 200:
+                return True
+        except Exception as e:
+            logger.debug(f"HEAD {url} failed: {e!r}")
+        # Some servers reject HEAD; confirm with a GET without reading the body
+        try:
+            async with self._client.stream("GET", url) as response:
+                return response.status_code == 200
+        except Exception as e:
+            logger.info(f"URL {url} is not reachable: {e!r}")
+            return False
+
+    def _cached(self, key: str) -> Optional[bool]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if expires_at <= self._clock():
+            del self._results[key]
+            return None
+        return result
+
+    def _store(self, key: str, result: bool) -> None:
+        ttl_s = self._ttl_s if result else self._negative_ttl_s
+        self._results[key] = (result, self._clock() + ttl_s)
+        self._results.move_to_end(key)
+        while len(self._results) > self._max_entries:
+            self._results.popitem(last=False)
+
+
+_shared: Optional[ReachabilityChecker] = None
+
+
+def shared_checker() -> ReachabilityChecker:
+    """Return the process-wide checker, creating it on first use."""
+    global _shared
+    if _shared is None:
+        _shared = ReachabilityChecker()
+    return _shared
@@ -0,0 +1,160 @@
+"""Telegram MarkdownV2 rendering of found items.
+
+Rendering sits on the notifier hot path – every found item is rendered once
+per recipient – so this module keeps it cheap:
+
+* escaping only touches the special characters actually present in the
+  string (a precomputed ``char → escaped`` table guarded by ``in`` checks;
+  measured faster than ``str.translate`` on typical non-ASCII listings);
+* the description ``key: value`` extras are parsed in one pass with a
+  dispatch table instead of ``startswith`` chains;
+* message lines are precompiled templates with the bold labels baked in.
+
+The output is byte-for-byte identical to the original per-call helpers.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Final, Iterable
+
+from clients.models import Item
+
+__all__ = [
+    "escape_markdown_v2",
+    "bold_markdown_v2",
+    "render_item",
+    "render_items",
+]
+
+# All special characters that need escaping in MarkdownV2
+_SPECIAL_CHARS: Final = r"_*[]()~`>#+-=|{}.!"
+_ESCAPE_TABLE: Final = tuple((c, "\\" + c) for c in _SPECIAL_CHARS)
+
+# Precompiled message templates (labels already bold, i.e. "*Price*")
+_HEADER: Final = "".join(
+    (
+        "📦 {}\n\n",
+        "💰 *Price*: {}\n",
+        "📍 *Location*: {}\n",
+        "🕒 *Posted*: {}\n",
+    )
+)
+_PRICE_LINE: Final = "💵 *Price*: {}\n"
+_DEPOSIT_LINE: Final = "🔐 *Deposit*: {}\n"
+_ANIMALS_LINE: Final = "🐾 *Animals*: {}\n"
+_RENT_LINE: Final = "💳 *Rent*: {}\n"
+_LINK_LINE: Final = "🔗 [View on {}]({})"
+# "dd.mm.YYYY - *HH:MM*" with the dots and dash already escaped
+_POSTED: Final = "{:02d}\\.{:02d}\\.{} \\- *{:02d}:{:02d}*"
+
+_NO_DEPOSIT: Final = "Deposit: 0"
+_ANIMALS: Final = {"true": "Pets: Allowed", "false": "Pets: Not allowed"}
+
+# ``key`` of a ``key: value`` description line → (slot, original, label)
+_EXTRAS: Final = {
+    "price": ("price", "price:", "Price:"),
+    "deposit": ("deposit", "deposit:", "Deposit:"),
+    "rent": ("rent", "rent:", "Additional rent:"),
+}
+
+_FIELDS: Final = (
+    ("description", ""),
+    ("title", "No title"),
+    ("price", "N/A"),
+    ("location", "N/A"),
+    ("created_at", "N/A"),
+    ("item_url", "#"),
+    ("source", None),
+)
+
+
+def escape_markdown_v2(text: str) -> str:
+    """Escape all special characters for Telegram MarkdownV2."""
+    if not text:
+        return text
+    # Inserted backslashes are never special, so one pass per char is exact
+    for char, escaped in _ESCAPE_TABLE:
+        if char in text:
+            text = text.replace(char, escaped)
+    return text
+
+
+def bold_markdown_v2(text: str) -> str:
+    """Escape *text* and wrap it in ``*...*`` (empty string for no text)."""
+    if not text:
+        return ""
+    return f"*{escape_markdown_v2(text)}*"
+
+
+def render_items(items: Iterable[Any]) -> list[str]:
+    """Render a batch of items (models, dicts or objects) in one call."""
+    return [render_item(item) for item in items]
+
+
+def render_item(item: Any) -> str:
+    """Return MarkdownV2 text for *item* compatible with Telegram."""
+    # Unset model fields fall back to the defaults, like missing dict keys
+    item = Item.coerce(item)
+    description, title, price, location, created_at, item_url, source = [
+        getattr(item, name, default) for name, default in _FIELDS
+    ]
+
+    parts = [
+        _HEADER.format(
+            bold_markdown_v2(title),
+            escape_markdown_v2(str(price)),
+            escape_markdown_v2(str(location)),
+            _render_posted(created_at),
+        )
+    ]
+
+    extra = _parse_description(description)
+    if price_info := extra.get("price"):
+        parts.append(_PRICE_LINE.format(price_info))
+    if (deposit := extra.get("deposit")) and deposit != _NO_DEPOSIT:
+        parts.append(_DEPOSIT_LINE.format(deposit))
+    if animals := extra.get("animals"):
+        parts.append(_ANIMALS_LINE.format(animals))
+    if rent := extra.get("rent"):
+        parts.append(_RENT_LINE.format(rent))
+
+    parts.append(
+        _LINK_LINE.format(
+            escape_markdown_v2(source if source else "Unknown source"),
+            escape_markdown_v2(item_url),
+        )
+    )
+    return "".join(parts)
+
+
+def _parse_description(description: str | None) -> dict[str, str]:
+    """Single pass over ``key: value`` lines of the item description."""
+    extra: dict[str, str] = {}
+    if not description:
+        return extra
+    for line in description.strip().split("\n"):
+        key, sep, rest = line.partition(":")
+        if not sep:
+            continue
+        if spec := _EXTRAS.get(key):
+            slot, original, label = spec
+            # Same as line.replace(original, label).strip(); the line starts
+            # with the label so only trailing whitespace can be stripped.
+            extra[slot] = (label + rest.replace(original, label)).rstrip()
+        elif key == "animals_allowed":
+            value = rest.replace("animals_allowed:", "").strip()
+            if animals := _ANIMALS.get(value):
+                extra["animals"] = animals
+    return extra
+
+
+def _render_posted(created_at: Any) -> str:
+    """Format ISO *created_at* as ``dd.mm.YYYY - *HH:MM*`` (escaped)."""
+    if not created_at or created_at == "N/A":
+        return "N/A"
+    try:
+        dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return escape_markdown_v2(str(created_at))
+    return _POSTED.format(dt.day, dt.month, dt.year, dt.hour, dt.minute)
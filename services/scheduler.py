@@ -0,0 +1,164 @@
+"""Adaptive per-task polling intervals.
+
+Instead of checking every task each ``CHECK_FREQUENCY_SECONDS``, the
+:class:`AdaptivePollingScheduler` learns how often new listings arrive for
+each task and polls hot searches more often than cold ones.
+
+Per task it keeps an exponentially weighted mean of listing inter-arrival
+gaps plus a decayed 24-bucket time-of-day profile (Europe/Warsaw hours).  The
+next interval is a fraction of the gap expected at the current hour, clamped
+to ``[min_interval_s, max_interval_s]``.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Final, Iterable, Sequence
+
+from tools.datetime_utils import WARSAW_TZ, to_utc
+
+__all__ = ["AdaptivePollingScheduler"]
+
+logger: Final = logging.getLogger(__name__)
+
+HOURS: Final = 24
+HOURLY_PRIOR: Final = 2.0
+# Forget tasks that were not observed for a week (deleted monitorings)
+STALE_AFTER_S: Final = 7 * 24 * 60 * 60
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _item_created_at(item: Any) -> Any:
+    if isinstance(item, dict):
+        return item.get("created_at")
+    return getattr(item, "created_at", None)
+
+
+@dataclass(slots=True)
+class _TaskStats:
+    interval_s: float
+    next_check: float = 0.0
+    last_seen: float = 0.0
+    mean_gap_s: float | None = None
+    last_arrival: datetime | None = None
+    hourly: list[float] = field(default_factory=lambda: [0.0] * HOURS)
+
+
+class AdaptivePollingScheduler:
+    """Decide which tasks are due and how long to wait before the next check."""
+
+    def __init__(
+        self,
+        *,
+        min_interval_s: float,
+        max_interval_s: float,
+        alpha: float = 0.3,
+        poll_fraction: float = 0.25,
+        backoff: float = 1.5,
+        hourly_decay: float = 0.98,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        self._min = min_interval_s
+        self._max = max_interval_s
+        self._alpha = alpha
+        # Poll ~4x per expected arrival so a new listing waits <= 1/4 gap
+        self._poll_fraction = poll_fraction
+        self._backoff = backoff
+        self._hourly_decay = hourly_decay
+        self._clock = clock
+        self._stats: Dict[Any, _TaskStats] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def due(self, tasks: Iterable[Any]) -> list:
+        """Return the subset of *tasks* whose next check time has come."""
+        now = self._clock().timestamp()
+        self._prune(now)
+        return [
+            task
+            for task in tasks
+            if (stats := self._stats.get(task.id)) is None or stats.next_check <= now
+        ]
+
+    def observe(self, task: Any, items: Sequence[Any]) -> float:
+        """Record the result of checking *task* and schedule the next check.
+
+        Returns the chosen interval in seconds.
+        """
+        now_dt = self._clock()
+        now = now_dt.timestamp()
+        stats = self._stats.get(task.id)
+        if stats is None:
+            stats = self._stats[task.id] = _TaskStats(interval_s=self._min)
+            stats.last_arrival = to_utc(getattr(task, "last_got_item", None))
+
+        arrivals = sorted(
+            filter(None, (to_utc(_item_created_at(item)) for item in items))
+        )
+        for arrival in arrivals:
+            self._record_arrival(stats, arrival)
+
+        if stats.mean_gap_s is None:
+            # Nothing learned yet – back off gradually from the minimum
+            interval = (
+                stats.interval_s if arrivals else stats.interval_s * self._backoff
+            )
+        else:
+            interval = self._poll_fraction * self._expected_gap(stats, now_dt)
+
+        stats.interval_s = min(self._max, max(self._min, interval))
+        stats.next_check = now + stats.interval_s
+        stats.last_seen = now
+        return stats.interval_s
+
+    def interval_for(self, task_id: Any) -> float | None:
+        """Return the current interval for *task_id* (None if unknown)."""
+        stats = self._stats.get(task_id)
+        return stats.interval_s if stats else None
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _record_arrival(self, stats: _TaskStats, arrival: datetime) -> None:
+        if stats.last_arrival is not None:
+            if arrival <= stats.last_arrival:
+                return
+            gap = (arrival - stats.last_arrival).total_seconds()
+            if stats.mean_gap_s is None:
+                stats.mean_gap_s = gap
+            else:
+                stats.mean_gap_s += self._alpha * (gap - stats.mean_gap_s)
+        stats.last_arrival = arrival
+
+        hourly = stats.hourly
+        for hour in range(HOURS):
+            hourly[hour] *= self._hourly_decay
+        hourly[arrival.astimezone(WARSAW_TZ).hour] += 1.0
+
+    def _expected_gap(self, stats: _TaskStats, now: datetime) -> float:
+        gap = stats.mean_gap_s
+        # A search that went quiet for longer than usual is cooling down
+        if stats.last_arrival is not None:
+            gap = max(gap, (now - stats.last_arrival).total_seconds() / 2)
+
+        # Uniform prior keeps a handful of arrivals from dominating the profile
+        total = sum(stats.hourly) + HOURS * HOURLY_PRIOR
+        hour = now.astimezone(WARSAW_TZ).hour
+        share = (stats.hourly[hour] + HOURLY_PRIOR) * HOURS / total
+        # Busy hours shorten the gap, quiet hours stretch it (bounded)
+        return gap / min(4.0, max(0.25, share))
+
+    def _prune(self, now: float) -> None:
+        stale = [
+            task_id
+            for task_id, stats in self._stats.items()
+            if stats.last_seen and now - stats.last_seen > STALE_AFTER_S
+        ]
+        for task_id in stale:
+            del self._stats[task_id]
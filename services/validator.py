@@ -8,7 +8,8 @@ from __future__ import annotations
 import urllib.parse
 from typing import Protocol
 
-from tools.texts import is_valid_and_accessible
+from services.reachability import ReachabilityChecker, shared_checker
+from tools.tracing import traced
 
 __all__ = [
     "UrlValidatorProtocol",
@@ -32,6 +33,10 @@ class UrlValidatorProtocol(Protocol):
 class UrlValidator(UrlValidatorProtocol):
     """Validator/normaliser for OLX URLs."""
 
+    def __init__(self, checker: ReachabilityChecker | None = None) -> None:
+        # Validators are created per request; they share one pooled checker
+        self._checker = checker
+
     _OLX_PREFIXES: tuple[str, ...] = (
         "https://olx.pl/",
         "https://www.olx.pl/",
@@ -59,5 +64,6 @@ class UrlValidator(UrlValidatorProtocol):
             url = urllib.parse.urlunparse(parsed._replace(query=query))
         return url
 
+    @traced("validator")
     async def is_reachable(self, url: str) -> bool:  # noqa: D401 – simple name
-        return await is_valid_and_accessible(url)
+        return await (self._checker or shared_checker()).is_reachable(url)
@@ -0,0 +1,76 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from aiogram import Bot, Dispatcher, types
+
+from bot.middlewares import (
+    HANDLER_DOWNSTREAM_SECONDS,
+    HANDLER_SECONDS,
+    setup_instrumentation,
+)
+from tools.tracing import traced
+
+UPDATE = {
+    "update_id": 7,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "text": "hi",
+    },
+}
+
+
+@traced("repository")
+async def _lookup():
+    return True
+
+
+class TestInstrumentationMiddleware(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dp = Dispatcher()
+        self.bot = Bot(token="42:TEST")
+
+    async def asyncTearDown(self):
+        await self.bot.session.close()
+
+    async def _feed(self):
+        update = types.Update.model_validate(UPDATE, context={"bot": self.bot})
+        return await self.dp.feed_update(self.bot, update)
+
+    async def test_records_handler_latency_and_downstream_calls(self):
+        @self.dp.message()
+        async def greet(message: types.Message):
+            await _lookup()
+
+        setup_instrumentation(self.dp, slow_threshold_s=0)
+        with self.assertLogs("bot.middlewares", "WARNING") as logs:
+            await self._feed()
+        self.assertEqual(HANDLER_SECONDS.labels("greet", "ok").count, 1)
+        self.assertEqual(
+            HANDLER_DOWNSTREAM_SECONDS.labels("greet", "repository").count, 1
+        )
+        (line,) = logs.output
+        self.assertIn("handler=greet", line)
+        self.assertIn("state=None", line)
+        self.assertIn("repository=1 calls/", line)
+
+    async def test_errors_are_recorded(self):
+        @self.dp.message()
+        async def broken(message: types.Message):
+            raise RuntimeError("boom")
+
+        setup_instrumentation(self.dp, slow_threshold_s=60)
+        with self.assertRaises(RuntimeError):
+            await self._feed()
+        self.assertEqual(HANDLER_SECONDS.labels("broken", "error").count, 1)
+
+    async def test_fast_updates_are_not_logged(self):
+        @self.dp.message()
+        async def quick(message: types.Message):
+            pass
+
+        setup_instrumentation(self.dp, slow_threshold_s=60)
+        with patch("bot.middlewares.logger") as logger:
+            await self._feed()
+        logger.warning.assert_not_called()
@@ -0,0 +1,90 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from aiogram import Bot, Dispatcher, types
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import create_webhook_app, mark_ready, run_webhook
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "text": "/start",
+    },
+}
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class TestWebhookApp(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.received = []
+        self.dp = Dispatcher()
+
+        @self.dp.message()
+        async def record(message: types.Message):
+            self.received.append(message.text)
+
+        self.bot = Bot(token="42:TEST")
+        self.check = AsyncMock()
+        self.app = create_webhook_app(
+            self.dp,
+            self.bot,
+            secret_token="s3cret",
+            handle_in_background=False,
+            checks=[self.check],
+        )
+        self.client = TestClient(TestServer(self.app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.bot.session.close()
+
+    async def test_update_is_dispatched(self):
+        response = await self.client.post(
+            "/webhook", json=UPDATE, headers={SECRET_HEADER: "s3cret"}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.received, ["/start"])
+
+    async def test_wrong_secret_is_rejected(self):
+        response = await self.client.post(
+            "/webhook", json=UPDATE, headers={SECRET_HEADER: "nope"}
+        )
+        self.assertEqual(response.status, 401)
+        self.assertEqual(self.received, [])
+
+    async def test_background_processing(self):
+        app = create_webhook_app(self.dp, self.bot, path="/hook", secret_token="s")
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(
+                "/hook", json=UPDATE, headers={SECRET_HEADER: "s"}
+            )
+            self.assertEqual(response.status, 200)
+            for _ in range(50):
+                if self.received:
+                    break
+                await asyncio.sleep(0.01)
+        self.assertEqual(self.received, ["/start"])
+
+    async def test_readiness(self):
+        response = await self.client.get("/ready")
+        self.assertEqual(response.status, 503)
+        mark_ready(self.app)
+        response = await self.client.get("/ready")
+        self.assertEqual(
+            (response.status, await response.json()), (200, {"status": "ready"})
+        )
+        self.check.side_effect = ConnectionError("redis down")
+        response = await self.client.get("/ready")
+        self.assertEqual(response.status, 503)
+
+    async def test_secret_is_required(self):
+        with self.assertRaises(ValueError):
+            create_webhook_app(self.dp, self.bot)
+        with self.assertRaises(ValueError):
+            await run_webhook(self.dp, self.bot, base_url="https://bot.example")
@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from clients.models import Item, MonitoringTask, decode_items, decode_tasks
+
+
+class TestItem(unittest.TestCase):
+    def test_unset_fields_fall_back_to_defaults(self):
+        item = Item.from_dict({"title": None})
+        self.assertIsNone(item.title)
+        self.assertEqual(getattr(item, "price", "N/A"), "N/A")
+        self.assertEqual(item.get("price", "N/A"), "N/A")
+        with self.assertRaises(AttributeError):
+            item.price
+
+    def test_dict_compatibility_and_round_trip(self):
+        data = {"title": "A", "image_url": "IMG", "rooms": 2}
+        item = Item.from_dict(data)
+        self.assertEqual(item["image_url"], "IMG")
+        self.assertEqual(item.get("rooms"), 2)
+        self.assertEqual(item.to_dict(), data)
+        self.assertEqual(item, data)
+        self.assertEqual(item, Item(**data))
+        self.assertNotEqual(item, {"title": "B"})
+        with self.assertRaises(KeyError):
+            item["price"]
+        self.assertEqual(json.loads(json.dumps(item.to_dict())), data)
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(Item.from_dict({"title": "A"}), "__dict__"))
+
+    def test_coerce(self):
+        item = Item.from_dict({"title": "A"})
+        self.assertIs(Item.coerce(item), item)
+        self.assertIsInstance(Item.coerce({"title": "A"}), Item)
+
+
+class TestMonitoringTaskModel(unittest.TestCase):
+    def test_fields_and_defaults(self):
+        task = MonitoringTask({"id": 1, "chat_id": "2", "unknown": "x"})
+        self.assertEqual((task.id, task.chat_id, task.url), (1, "2", None))
+        self.assertTrue(task.is_active)
+        self.assertFalse(hasattr(task, "__dict__"))
+        self.assertEqual(task.to_dict()["id"], 1)
+        self.assertIs(MonitoringTask.coerce(task), task)
+
+
+class TestDecoders(unittest.TestCase):
+    def test_decode_items_list_and_batch(self):
+        self.assertIsInstance(
+            decode_items(b'{"items": [{"title": "A"}]}')["items"][0], Item
+        )
+        batch = decode_items(b'{"items": {"7": [{"title": "A"}]}}')
+        self.assertEqual(batch["items"]["7"], [{"title": "A"}])
+
+    def test_decode_passes_other_payloads_through(self):
+        self.assertEqual(decode_items(b'{"total": 0}'), {"total": 0})
+        self.assertEqual(decode_tasks(b'{"tasks": null}'), {"tasks": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
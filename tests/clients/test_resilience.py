@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import MagicMock
+
+import httpx
+
+from clients.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    is_server_failure,
+)
+
+
+def _status_error(status):
+    response = MagicMock(status_code=status)
+    return httpx.HTTPStatusError("err", request=MagicMock(), response=response)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_retries_idempotent_transient_failures(self):
+        policy = RetryPolicy(attempts=3)
+        timeout = httpx.ConnectTimeout("slow")
+        self.assertTrue(policy.should_retry("GET", timeout, 0))
+        self.assertTrue(policy.should_retry("PUT", _status_error(503), 1))
+        self.assertFalse(policy.should_retry("GET", timeout, 2))  # attempts used
+
+    def test_does_not_retry_other_failures(self):
+        policy = RetryPolicy()
+        self.assertFalse(policy.should_retry("POST", httpx.ConnectError("x"), 0))
+        self.assertFalse(policy.should_retry("GET", _status_error(404), 0))
+        self.assertFalse(policy.should_retry("GET", _status_error(500), 0))
+        self.assertFalse(policy.should_retry("GET", ValueError("bad json"), 0))
+
+    def test_delay_is_jittered_and_capped(self):
+        policy = RetryPolicy(base_delay_s=1.0, max_delay_s=3.0)
+        for attempt in range(6):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(3.0, 2**attempt))
+
+
+class TestIsServerFailure(unittest.TestCase):
+    def test_classification(self):
+        self.assertTrue(is_server_failure(httpx.ReadTimeout("t")))
+        self.assertTrue(is_server_failure(_status_error(502)))
+        self.assertFalse(is_server_failure(_status_error(404)))
+        self.assertFalse(is_server_failure(ValueError("x")))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout_s=10, clock=self.clock
+        )
+
+    def _open(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.assertEqual(self.breaker.snapshot()["rejected"], 1)
+        self.assertEqual(self.breaker.snapshot()["retry_in_s"], 10)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_allows_single_probe(self):
+        self._open()
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, "half_open")
+        self.breaker.before_call()  # the probe
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.before_call()
+
+    def test_failed_probe_reopens(self):
+        self._open()
+        self.clock.now = 10
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.now = 15
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_abandoned_probe_frees_the_slot(self):
+        self._open()
+        self.clock.now = 10
+        self.breaker.before_call()
+        self.breaker.record_abandoned()
+        self.breaker.before_call()
+
+
+if __name__ == "__main__":
+    unittest.main()
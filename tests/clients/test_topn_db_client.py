@@ -1,10 +1,14 @@
+import asyncio
+import json
 import os
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 
-from clients.topn_db_client import TopnDbClient
+from clients.models import Item, MonitoringTask, decode_items, decode_tasks
+from clients.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from clients.topn_db_client import REQUEST_SECONDS, TopnDbClient, _endpoint_template
 
 
 class TestTopnDbClient(IsolatedAsyncioTestCase):
@@ -54,7 +58,7 @@ class TestTopnDbClient(IsolatedAsyncioTestCase):
     async def test_endpoint_wrappers_delegate(self):
         with patch.object(self.client, "_make_request", new_callable=AsyncMock) as mr:
             await self.client.get_all_tasks()
-            mr.assert_awaited_with("GET", "/api/v1/tasks/")
+            mr.assert_awaited_with("GET", "/api/v1/tasks/", decoder=decode_tasks)
             await self.client.create_task({"a": 1})
             mr.assert_awaited_with("POST", "/api/v1/tasks/", json_data={"a": 1})
             await self.client.update_task(5, {"b": 2})
@@ -62,10 +66,15 @@ class TestTopnDbClient(IsolatedAsyncioTestCase):
             await self.client.delete_task_by_id(9)
             mr.assert_awaited_with("DELETE", "/api/v1/tasks/9")
             await self.client.get_items_to_send_for_task(3)
-            mr.assert_awaited_with("GET", "/api/v1/tasks/3/items-to-send")
+            mr.assert_awaited_with(
+                "GET", "/api/v1/tasks/3/items-to-send", decoder=decode_items
+            )
             await self.client.get_items_by_source_url("u", limit=7)
             mr.assert_awaited_with(
-                "GET", "/api/v1/items/by-source", params={"source_url": "u", "limit": 7}
+                "GET",
+                "/api/v1/items/by-source",
+                params={"source_url": "u", "limit": 7},
+                decoder=decode_items,
             )
             await self.client.delete_old_items(30)
             mr.assert_awaited_with("DELETE", "/api/v1/items/cleanup/older-than/30")
@@ -110,20 +119,29 @@ class TestTopnDbClientMore(IsolatedAsyncioTestCase):
                 "DELETE", f"/api/v1/tasks/chat/42", params={"name": "m"}
             )
             await c.get_pending_tasks()
-            mr.assert_awaited_with("GET", "/api/v1/tasks/pending")
+            mr.assert_awaited_with("GET", "/api/v1/tasks/pending", decoder=decode_tasks)
             await c.update_last_got_item_timestamp(3)
             mr.assert_awaited_with("POST", f"/api/v1/tasks/3/update-last-got-item")
             await c.get_all_items()
             mr.assert_awaited_with(
-                "GET", "/api/v1/items/", params={"skip": 0, "limit": 100}
+                "GET",
+                "/api/v1/items/",
+                params={"skip": 0, "limit": 100},
+                decoder=decode_items,
             )
             await c.get_all_items(skip=10, limit=5)
             mr.assert_awaited_with(
-                "GET", "/api/v1/items/", params={"skip": 10, "limit": 5}
+                "GET",
+                "/api/v1/items/",
+                params={"skip": 10, "limit": 5},
+                decoder=decode_items,
             )
             await c.get_recent_items(hours=12, limit=2)
             mr.assert_awaited_with(
-                "GET", "/api/v1/items/recent", params={"hours": 12, "limit": 2}
+                "GET",
+                "/api/v1/items/recent",
+                params={"hours": 12, "limit": 2},
+                decoder=decode_items,
             )
             await c.get_item_by_id(8)
             mr.assert_awaited_with("GET", f"/api/v1/items/8")
@@ -134,9 +152,330 @@ class TestTopnDbClientMore(IsolatedAsyncioTestCase):
             await c.delete_item_by_id(9)
             mr.assert_awaited_with("DELETE", f"/api/v1/items/9")
 
+    async def test_batch_endpoint_wrappers(self):
+        c = self.client
+        with patch.object(c, "_make_request", new_callable=AsyncMock) as mr:
+            await c.get_items_to_send_for_tasks([1, 2])
+            mr.assert_awaited_with(
+                "POST",
+                "/api/v1/tasks/items-to-send/batch",
+                json_data={"task_ids": [1, 2]},
+                decoder=decode_items,
+            )
+            await c.update_tasks_bulk([{"id": 1, "last_updated": "t"}])
+            mr.assert_awaited_with(
+                "PATCH",
+                "/api/v1/tasks/batch",
+                json_data={"tasks": [{"id": 1, "last_updated": "t"}]},
+            )
+            await c.update_last_got_item_timestamps([3])
+            mr.assert_awaited_with(
+                "POST",
+                "/api/v1/tasks/update-last-got-item/batch",
+                json_data={"task_ids": [3]},
+            )
+
     async def test_deprecated_add_item_calls_create_item(self):
         with patch.object(self.client, "create_item", new_callable=AsyncMock) as ci:
             ci.return_value = {"ok": True}
             res = await self.client.add_item({"x": 1})
             self.assertEqual(res, {"ok": True})
             ci.assert_awaited_with({"x": 1})
+
+
+class TestTopnDbClientSingleFlight(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.httpx_client = AsyncMock(spec=httpx.AsyncClient)
+        self.release = asyncio.Event()
+
+        async def request(**kwargs):
+            await self.release.wait()
+            resp = MagicMock(status_code=200)
+            resp.json.return_value = {"url": kwargs["url"]}
+            resp.content = json.dumps({"url": kwargs["url"]}).encode()
+            return resp
+
+        self.httpx_client.request.side_effect = request
+        self.client = TopnDbClient("http://api", client=self.httpx_client)
+
+    async def _gather(self, *coros):
+        tasks = [asyncio.ensure_future(c) for c in coros]
+        await asyncio.sleep(0)
+        self.release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_identical_gets_share_one_request(self):
+        results = await self._gather(
+            *(self.client.get_tasks_by_chat_id("1") for _ in range(5))
+        )
+        self.assertEqual(self.httpx_client.request.await_count, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(
+            self.client.single_flight_stats,
+            {"sent": 1, "coalesced": 4, "in_flight": 0},
+        )
+
+    async def test_different_requests_are_not_coalesced(self):
+        await self._gather(
+            self.client.get_tasks_by_chat_id("1"),
+            self.client.get_tasks_by_chat_id("2"),
+            self.client.get_all_items(skip=0),
+            self.client.get_all_items(skip=100),
+            self.client.create_task({"a": 1}),
+            self.client.create_task({"a": 1}),
+        )
+        self.assertEqual(self.httpx_client.request.await_count, 6)
+        self.assertEqual(self.client.requests_coalesced, 0)
+
+    async def test_sequential_gets_are_sent_again(self):
+        self.release.set()
+        await self.client.get_pending_tasks()
+        await self.client.get_pending_tasks()
+        self.assertEqual(self.httpx_client.request.await_count, 2)
+
+    async def test_error_is_shared(self):
+        self.httpx_client.request.side_effect = ValueError("boom")
+        results = await self._gather(
+            self.client.get_pending_tasks(), self.client.get_pending_tasks()
+        )
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(self.httpx_client.request.await_count, 1)
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        first = asyncio.ensure_future(self.client.get_pending_tasks())
+        second = asyncio.ensure_future(self.client.get_pending_tasks())
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await second, {"url": "http://api/api/v1/tasks/pending"})
+        self.assertTrue(first.cancelled())
+
+    async def test_disabled(self):
+        client = TopnDbClient(
+            "http://api", client=self.httpx_client, single_flight=False
+        )
+        await self._gather(client.get_pending_tasks(), client.get_pending_tasks())
+        self.assertEqual(self.httpx_client.request.await_count, 2)
+
+
+class TestTopnDbClientResilience(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.httpx_client = AsyncMock(spec=httpx.AsyncClient)
+        self.ok = MagicMock(status_code=200)
+        self.ok.json.return_value = {"ok": True}
+        self.ok.content = b'{"ok": true}'
+        self.client = TopnDbClient(
+            "http://api",
+            client=self.httpx_client,
+            retry=RetryPolicy(attempts=3, base_delay_s=0),
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout_s=60),
+            timeouts={"": 5.0, "/api/v1/tasks/pending": 1.0},
+        )
+
+    async def test_retries_transient_get_failures(self):
+        self.httpx_client.request.side_effect = [
+            httpx.ConnectTimeout("slow"),
+            httpx.ConnectError("refused"),
+            self.ok,
+        ]
+        self.assertEqual(await self.client.get_pending_tasks(), {"ok": True})
+        self.assertEqual(self.httpx_client.request.await_count, 3)
+        self.assertEqual(self.client.breaker.state, "closed")
+
+    async def test_post_is_not_retried(self):
+        self.httpx_client.request.side_effect = httpx.ConnectError("refused")
+        with self.assertRaises(httpx.ConnectError):
+            await self.client.create_task({"a": 1})
+        self.httpx_client.request.assert_awaited_once()
+
+    async def test_per_endpoint_timeouts(self):
+        self.httpx_client.request.return_value = self.ok
+        await self.client.get_pending_tasks()
+        self.assertEqual(self.httpx_client.request.await_args.kwargs["timeout"], 1.0)
+        await self.client.get_tasks_by_chat_id("1")
+        self.assertEqual(self.httpx_client.request.await_args.kwargs["timeout"], 5.0)
+
+    async def test_open_circuit_fails_fast(self):
+        self.httpx_client.request.side_effect = httpx.ConnectError("down")
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                await self.client.get_pending_tasks()
+        calls = self.httpx_client.request.await_count
+
+        with self.assertRaises(CircuitOpenError):
+            await self.client.get_pending_tasks()
+        self.assertEqual(self.httpx_client.request.await_count, calls)
+        self.assertEqual(self.client.breaker.snapshot()["state"], "open")
+
+    async def test_client_errors_do_not_open_circuit(self):
+        response = MagicMock(status_code=404, text="nope")
+        error = httpx.HTTPStatusError("err", request=MagicMock(), response=response)
+        self.httpx_client.request.side_effect = error
+        for _ in range(3):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await self.client.get_task_by_id(1)
+        self.assertEqual(self.client.breaker.state, "closed")
+        self.assertEqual(self.httpx_client.request.await_count, 3)
+
+
+class TestTopnDbClientMetrics(IsolatedAsyncioTestCase):
+    def test_endpoint_template_hides_ids(self):
+        self.assertEqual(
+            _endpoint_template("/api/v1/tasks/42/items-to-send"),
+            "/api/v1/tasks/{id}/items-to-send",
+        )
+        self.assertEqual(
+            _endpoint_template("/api/v1/tasks/chat/-100"), "/api/v1/tasks/chat/{id}"
+        )
+        self.assertEqual(
+            _endpoint_template("/api/v1/items/by-url/https://olx.pl/d/1"),
+            "/api/v1/items/by-url/{url}",
+        )
+        self.assertEqual(
+            _endpoint_template("/api/v1/tasks/pending"), "/api/v1/tasks/pending"
+        )
+
+    async def test_latency_is_recorded_per_endpoint(self):
+        httpx_client = AsyncMock(spec=httpx.AsyncClient)
+        response = MagicMock(status_code=404, text="nope")
+        httpx_client.request.side_effect = httpx.HTTPStatusError(
+            "err", request=MagicMock(), response=response
+        )
+        client = TopnDbClient("http://api", client=httpx_client)
+        child = REQUEST_SECONDS.labels("GET", "/api/v1/tasks/{id}")
+        before = child.count
+        for task_id in (7, 8):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.get_task_by_id(task_id)
+        self.assertEqual(child.count, before + 2)
+
+
+class TestTopnDbClientDecoding(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.httpx_client = AsyncMock(spec=httpx.AsyncClient)
+        self.client = TopnDbClient("http://api", client=self.httpx_client)
+
+    def _respond(self, body: bytes):
+        resp = MagicMock(status_code=200, content=body)
+        resp.json.side_effect = AssertionError("generic JSON decoding not used")
+        self.httpx_client.request.return_value = resp
+
+    async def test_items_decoded_into_models(self):
+        self._respond(b'{"items": [{"title": "A", "image_url": null, "extra": 1}]}')
+        response = await self.client.get_items_to_send_for_task(1)
+        (item,) = response["items"]
+        self.assertIsInstance(item, Item)
+        self.assertEqual(item.title, "A")
+        self.assertIsNone(item.image_url)
+
+    async def test_batch_items_decoded_per_task(self):
+        self._respond(b'{"items": {"1": [{"title": "A"}], "2": []}}')
+        response = await self.client.get_items_to_send_for_tasks([1, 2])
+        self.assertEqual(response["items"]["1"], [{"title": "A"}])
+        self.assertIsInstance(response["items"]["1"][0], Item)
+        self.assertEqual(response["items"]["2"], [])
+
+    async def test_pending_tasks_decoded_into_models(self):
+        self._respond(b'{"tasks": [{"id": 3, "chat_id": "9", "name": "n"}]}')
+        response = await self.client.get_pending_tasks()
+        (task,) = response["tasks"]
+        self.assertIsInstance(task, MonitoringTask)
+        self.assertEqual((task.id, task.chat_id, task.is_active), (3, "9", True))
+
+    async def test_conditional_pending_tasks(self):
+        self._respond(b'{"tasks": [{"id": 3}]}')
+        self.httpx_client.request.return_value.headers = {"ETag": '"v1"'}
+        response = await self.client.get_pending_tasks_if_changed()
+        self.assertEqual(response["etag"], '"v1"')
+        self.assertIsNone(self.httpx_client.request.await_args.kwargs["headers"])
+
+        self.httpx_client.request.return_value = MagicMock(status_code=304)
+        response = await self.client.get_pending_tasks_if_changed('"v1"')
+        self.assertEqual(response, {"not_modified": True})
+        self.assertEqual(
+            self.httpx_client.request.await_args.kwargs["headers"],
+            {"If-None-Match": '"v1"'},
+        )
+
+    async def test_pending_task_changes(self):
+        self._respond(b'{"tasks": [{"id": 3}], "removed": [4], "cursor": "c2"}')
+        response = await self.client.get_pending_task_changes("c1")
+        self.assertEqual(
+            self.httpx_client.request.await_args.kwargs["params"], {"since": "c1"}
+        )
+        self.assertIsInstance(response["tasks"][0], MonitoringTask)
+        self.assertEqual((response["removed"], response["cursor"]), ([4], "c2"))
+
+
+class TestTopnDbClientPagination(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = TopnDbClient(
+            "http://api", client=AsyncMock(spec=httpx.AsyncClient)
+        )
+        self.rows = [Item(id=i) for i in range(7)]
+        self.calls = []
+
+        async def get_all_items(skip=0, limit=100):
+            self.calls.append((skip, limit))
+            return {"items": self.rows[skip : skip + limit]}
+
+        self.client.get_all_items = get_all_items
+
+    async def test_streams_all_pages(self):
+        items = [item async for item in self.client.iter_all_items(page_size=3)]
+        self.assertEqual([item.id for item in items], list(range(7)))
+        self.assertEqual(self.calls, [(0, 3), (3, 3), (6, 3)])
+
+    async def test_exact_multiple_ends_on_empty_page(self):
+        self.rows = self.rows[:6]
+        items = [item async for item in self.client.iter_all_items(page_size=3)]
+        self.assertEqual(len(items), 6)
+        self.assertEqual(self.calls[-1], (6, 3))
+
+    async def test_prefetches_next_page(self):
+        iterator = self.client.iter_all_items(page_size=3)
+        await anext(iterator)
+        await asyncio.sleep(0)
+        self.assertEqual(self.calls, [(0, 3), (3, 3)])
+        await iterator.aclose()
+
+    async def test_without_prefetch_fetches_on_demand(self):
+        iterator = self.client.iter_all_items(page_size=3, prefetch=False)
+        await anext(iterator)
+        await asyncio.sleep(0)
+        self.assertEqual(self.calls, [(0, 3)])
+        await iterator.aclose()
+
+    async def test_stops_when_server_ignores_skip(self):
+        async def get_all_items(skip=0, limit=100):
+            self.calls.append((skip, limit))
+            return {"items": self.rows[:limit]}
+
+        self.client.get_all_items = get_all_items
+        items = [item async for item in self.client.iter_all_items(page_size=3)]
+        self.assertEqual([item.id for item in items], [0, 1, 2])
+        self.assertEqual(self.calls[:2], [(0, 3), (3, 3)])
+
+    async def test_shifted_page_with_new_items_continues(self):
+        pages = [self.rows[0:3], self.rows[2:5], self.rows[5:7]]
+
+        async def get_all_items(skip=0, limit=100):
+            return {"items": pages.pop(0)}
+
+        self.client.get_all_items = get_all_items
+        items = [item async for item in self.client.iter_all_items(page_size=3)]
+        self.assertEqual([item.id for item in items], [0, 1, 2, 2, 3, 4, 5, 6])
+
+    async def test_source_and_recent_pass_offsets(self):
+        with patch.object(self.client, "_make_request", new_callable=AsyncMock) as mr:
+            mr.side_effect = [{"items": [Item(id=1)]}, {"items": []}]
+            items = [i async for i in self.client.iter_items_by_source_url("u", 1)]
+            self.assertEqual(len(items), 1)
+            self.assertEqual(
+                mr.await_args.kwargs["params"],
+                {"source_url": "u", "limit": 1, "skip": 1},
+            )
+            mr.side_effect = [{"items": []}]
+            self.assertEqual([i async for i in self.client.iter_recent_items(6)], [])
+            self.assertEqual(mr.await_args.kwargs["params"], {"hours": 6, "limit": 100})
@@ -1,6 +1,6 @@
 import importlib
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 
 class TestDependencies(IsolatedAsyncioTestCase):
@@ -21,7 +21,7 @@ class TestDependencies(IsolatedAsyncioTestCase):
                     svc = deps.get_monitoring_service()
 
                     # Constructed exactly once and wired together
-                    Repo.assert_called_once_with()
+                    Repo.assert_called_once_with(cache=ANY, delta_sync=ANY)
                     Validator.assert_called_once_with()
                     Service.assert_called_once()
                     repo_inst = Repo.return_value
@@ -57,3 +57,22 @@ class TestDependencies(IsolatedAsyncioTestCase):
 
         self.assertIs(deps.get_monitoring_service(), fake_svc)
         self.assertIs(deps.get_repository(), fake_repo)
+
+    async def test_create_task_cache_follows_settings(self):
+        import core.dependencies as deps
+
+        with patch.object(deps.settings, "TASK_CACHE_ENABLED", False):
+            self.assertIsNone(deps.create_task_cache())
+        with patch.object(deps.settings, "TASK_CACHE_ENABLED", True):
+            with patch.object(deps.settings, "TASK_CACHE_REDIS", False):
+                self.assertIsInstance(deps.create_task_cache(), deps.TaskListCache)
+
+    async def test_create_repository_follows_backend(self):
+        import core.dependencies as deps
+
+        with patch.object(deps.settings, "REPOSITORY_BACKEND", "topn_db"):
+            self.assertIsInstance(deps.create_repository(), deps.MonitoringRepository)
+        with patch.object(deps.settings, "REPOSITORY_BACKEND", "sqlite"):
+            from repositories.sqlite import SqliteMonitoringRepository
+
+            self.assertIsInstance(deps.create_repository(), SqliteMonitoringRepository)
@@ -0,0 +1,89 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from core.metrics import (
+    EVENT_LOOP_LAG_SECONDS,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    create_metrics_app,
+    monitor_loop_lag,
+)
+
+
+class TestHistogram(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram("h", "help", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        (child,) = histogram.children().values()
+        self.assertEqual(child.cumulative(), [(0.1, 2), (1.0, 3), (float("inf"), 4)])
+        self.assertEqual((child.count, child.sum), (4, 3.65))
+
+    def test_labelled_children_are_cached(self):
+        histogram = Histogram("h", "help", ("handler",))
+        self.assertIs(histogram.labels("a"), histogram.labels("a"))
+        with self.assertRaises(ValueError):
+            histogram.labels("a", "b")
+
+
+class TestRegistry(TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_text_exposition(self):
+        counter = Counter("sent_total", "Sent", ("chat",), registry=self.registry)
+        counter.labels('a"b').inc(2)
+        Gauge("up", "Up", registry=self.registry, function=lambda: 1)
+        histogram = Histogram("t", "T", buckets=(1.0,), registry=self.registry)
+        histogram.observe(0.5)
+        self.assertEqual(
+            self.registry.expose().splitlines(),
+            [
+                "# HELP sent_total Sent",
+                "# TYPE sent_total counter",
+                'sent_total{chat="a\\"b"} 2.0',
+                "# HELP up Up",
+                "# TYPE up gauge",
+                "up 1.0",
+                "# HELP t T",
+                "# TYPE t histogram",
+                't_bucket{le="1.0"} 1',
+                't_bucket{le="+Inf"} 1',
+                "t_sum 0.5",
+                "t_count 1",
+            ],
+        )
+
+    def test_failing_gauge_function_is_skipped(self):
+        Gauge("broken", "Broken", registry=self.registry, function=lambda: 1 / 0)
+        self.assertNotIn("broken 1", self.registry.expose())
+
+    def test_function_gauges_are_unlabelled(self):
+        with self.assertRaises(ValueError):
+            Gauge("g", "G", ("a",), registry=None, function=lambda: 1)
+
+
+class TestMetricsServer(IsolatedAsyncioTestCase):
+    async def test_metrics_endpoint(self):
+        registry = Registry()
+        Counter("hits_total", "Hits", registry=registry).inc()
+        client = TestClient(TestServer(create_metrics_app(registry)))
+        await client.start_server()
+        try:
+            response = await client.get("/metrics")
+            self.assertEqual(response.status, 200)
+            self.assertIn("hits_total 1.0", await response.text())
+        finally:
+            await client.close()
+
+    async def test_loop_lag_is_observed(self):
+        child = EVENT_LOOP_LAG_SECONDS.labels()
+        before = child.count
+        task = asyncio.create_task(monitor_loop_lag(0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        self.assertGreater(child.count, before)
@@ -0,0 +1,100 @@
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from repositories.cache import TaskListCache
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover – optional test dependency
+    fakeredis = None
+
+TASKS = [
+    {"id": 1, "name": "flats", "url": "https://www.olx.pl/a/"},
+    {"id": 2, "name": "rooms", "url": "https://www.olx.pl/b/"},
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTaskListCacheLocal(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+        self.cache = TaskListCache(ttl_s=10, max_chats=2, clock=self.clock)
+
+    async def test_miss_then_hit(self):
+        self.assertIsNone(await self.cache.get("1"))
+        self.assertIsNone(await self.cache.has_name("1", "flats"))
+
+        await self.cache.set("1", TASKS)
+
+        self.assertEqual(await self.cache.get("1"), TASKS)
+        self.assertTrue(await self.cache.has_name("1", "flats"))
+        self.assertFalse(await self.cache.has_name("1", "cars"))
+        self.assertTrue(await self.cache.has_url("1", "https://www.olx.pl/b/"))
+        self.assertFalse(await self.cache.has_url("1", "https://www.olx.pl/c/"))
+
+    async def test_empty_list_is_cached(self):
+        await self.cache.set("1", [])
+        self.assertEqual(await self.cache.get("1"), [])
+        self.assertFalse(await self.cache.has_name("1", "flats"))
+
+    async def test_expires_after_ttl(self):
+        await self.cache.set("1", TASKS)
+        self.clock.now = 10
+        self.assertIsNone(await self.cache.get("1"))
+        self.assertEqual(len(self.cache), 0)
+
+    async def test_lru_bound(self):
+        await self.cache.set("1", TASKS)
+        await self.cache.set("2", TASKS)
+        await self.cache.get("1")  # "2" becomes least recently used
+        await self.cache.set("3", TASKS)
+
+        self.assertIsNone(await self.cache.get("2"))
+        self.assertIsNotNone(await self.cache.get("1"))
+        self.assertEqual(len(self.cache), 2)
+
+    async def test_invalidate(self):
+        await self.cache.set("1", TASKS)
+        await self.cache.invalidate("1", "unknown")
+        self.assertIsNone(await self.cache.get("1"))
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestTaskListCacheRedis(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.cache = TaskListCache(ttl_s=10, redis=self.redis)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_shared_between_instances(self):
+        await self.cache.set("1", TASKS)
+        other = TaskListCache(ttl_s=10, redis=self.redis)
+
+        self.assertEqual(await other.get("1"), TASKS)
+        self.assertTrue(await other.has_name("1", "rooms"))
+        self.assertFalse(await other.has_url("1", "https://www.olx.pl/c/"))
+        self.assertEqual(await self.redis.ttl("task_cache:1:names"), 10)
+
+    async def test_miss_and_empty_list(self):
+        self.assertIsNone(await self.cache.has_url("1", "u"))
+        await self.cache.set("1", [])
+        self.assertFalse(await self.cache.has_url("1", "u"))
+
+    async def test_invalidate_removes_all_keys(self):
+        await self.cache.set("1", TASKS)
+        await self.cache.invalidate("1")
+        self.assertEqual(await self.redis.keys("task_cache:*"), [])
+        self.assertIsNone(await self.cache.has_name("1", "flats"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,17 @@ import os
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+
+from repositories.cache import TaskListCache
 from repositories.monitoring import MonitoringRepository, MonitoringTask
 
 
+def _http_error(status):
+    response = MagicMock(status_code=status, text="")
+    return httpx.HTTPStatusError("err", request=MagicMock(), response=response)
+
+
 class TestMonitoringRepository(IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
         os.environ.setdefault("TOPN_DB_BASE_URL", "http://localhost:8000")
@@ -60,14 +68,11 @@ class TestMonitoringRepository(IsolatedAsyncioTestCase):
         items = await self.repo.items_to_send(MagicMock(id=7))
         self.assertEqual(items, [1, 2, 3])
 
-    async def test_update_last_got_item_updates_each_task(self):
-        # list_tasks() internally calls the client again; set up its return
-        self.client.get_tasks_by_chat_id.return_value = {
-            "tasks": [{"id": 1}, {"id": 2}]
-        }
-        await self.repo.update_last_got_item("77")
-        self.client.update_last_got_item_timestamp.assert_any_await(1)
-        self.client.update_last_got_item_timestamp.assert_any_await(2)
+    async def test_update_last_got_item_addresses_the_task(self):
+        await self.repo.update_last_got_item(MagicMock(id=1, chat_id="77"))
+        self.client.update_last_got_item_timestamp.assert_awaited_once_with(1)
+        # No listing of sibling tasks in the same chat
+        self.client.get_tasks_by_chat_id.assert_not_awaited()
 
     async def test_update_last_updated_sets_timestamp(self):
         with patch("repositories.monitoring.now_warsaw") as n:
@@ -125,9 +130,9 @@ class TestMonitoringRepository(IsolatedAsyncioTestCase):
         self.assertEqual(items, [])
 
     async def test_update_last_got_item_handles_exception(self):
-        # If listing tasks fails, method should swallow the error
-        self.client.get_tasks_by_chat_id.side_effect = Exception("u-error")
-        await self.repo.update_last_got_item("77")
+        # If the update fails, method should swallow the error
+        self.client.update_last_got_item_timestamp.side_effect = Exception("u-error")
+        await self.repo.update_last_got_item(MagicMock(id=1))
 
     async def test_update_last_updated_handles_exception(self):
         self.client.update_task.side_effect = Exception("upd-error")
@@ -144,3 +149,189 @@ class TestMonitoringRepository(IsolatedAsyncioTestCase):
             with self.assertRaises(asyncio.CancelledError):
                 await self.repo.remove_old_items_data_infinitely(5)
         self.client.delete_old_items.assert_awaited_with(5)
+
+
+class TestMonitoringRepositoryBatch(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = AsyncMock()
+        self.repo = MonitoringRepository(client=self.client)
+        self.tasks = [MagicMock(id=1), MagicMock(id=2)]
+
+    async def test_items_to_send_many_single_request(self):
+        self.client.get_items_to_send_for_tasks.return_value = {
+            "items": {"1": [{"title": "a"}]}
+        }
+        result = await self.repo.items_to_send_many(self.tasks)
+        self.assertEqual(result, {1: [{"title": "a"}], 2: []})
+        self.client.get_items_to_send_for_tasks.assert_awaited_once_with([1, 2])
+        self.client.get_items_to_send_for_task.assert_not_awaited()
+
+    async def test_items_to_send_many_falls_back_when_unsupported(self):
+        self.client.get_items_to_send_for_tasks.side_effect = _http_error(404)
+        self.client.get_items_to_send_for_task.side_effect = lambda task_id: {
+            "items": [task_id]
+        }
+        self.assertEqual(
+            await self.repo.items_to_send_many(self.tasks), {1: [1], 2: [2]}
+        )
+        # The unsupported endpoint is not probed again
+        await self.repo.items_to_send_many(self.tasks)
+        self.client.get_items_to_send_for_tasks.assert_awaited_once()
+        self.assertEqual(self.client.get_items_to_send_for_task.await_count, 4)
+
+    async def test_items_to_send_many_error_returns_empty(self):
+        self.client.get_items_to_send_for_tasks.side_effect = _http_error(500)
+        self.assertEqual(await self.repo.items_to_send_many(self.tasks), {1: [], 2: []})
+        self.client.get_items_to_send_for_task.assert_not_awaited()
+
+    async def test_items_to_send_many_empty(self):
+        self.assertEqual(await self.repo.items_to_send_many([]), {})
+        self.client.get_items_to_send_for_tasks.assert_not_awaited()
+
+    async def test_update_last_got_item_many(self):
+        await self.repo.update_last_got_item_many(self.tasks)
+        self.client.update_last_got_item_timestamps.assert_awaited_once_with([1, 2])
+
+    async def test_update_last_got_item_many_fallback(self):
+        self.client.update_last_got_item_timestamps.side_effect = _http_error(405)
+        await self.repo.update_last_got_item_many(self.tasks)
+        self.client.update_last_got_item_timestamp.assert_any_await(1)
+        self.client.update_last_got_item_timestamp.assert_any_await(2)
+
+    async def test_update_last_got_item_many_at_fetch_times(self):
+        await self.repo.update_last_got_item_many(self.tasks, {1: "t1", 2: "t2"})
+        self.client.update_tasks_bulk.assert_awaited_once_with(
+            [{"id": 1, "last_got_item": "t1"}, {"id": 2, "last_got_item": "t2"}]
+        )
+        self.client.update_last_got_item_timestamps.assert_not_awaited()
+
+    async def test_update_last_got_item_many_at_fetch_times_fallback(self):
+        self.client.update_tasks_bulk.side_effect = _http_error(405)
+        await self.repo.update_last_got_item_many(self.tasks, {1: "t1", 2: "t2"})
+        self.client.update_task.assert_any_await(1, {"last_got_item": "t1"})
+        self.client.update_task.assert_any_await(2, {"last_got_item": "t2"})
+
+    async def test_update_last_updated_many(self):
+        with patch("repositories.monitoring.now_warsaw") as n:
+            n.return_value.isoformat.return_value = "2020-01-01T00:00:00"
+            await self.repo.update_last_updated_many(self.tasks)
+        self.client.update_tasks_bulk.assert_awaited_once_with(
+            [
+                {"id": 1, "last_updated": "2020-01-01T00:00:00"},
+                {"id": 2, "last_updated": "2020-01-01T00:00:00"},
+            ]
+        )
+
+    async def test_update_last_updated_many_fallback(self):
+        self.client.update_tasks_bulk.side_effect = _http_error(501)
+        await self.repo.update_last_updated_many(self.tasks)
+        self.assertEqual(self.client.update_task.await_count, 2)
+
+
+class TestMonitoringRepositoryCache(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = AsyncMock()
+        self.client.get_tasks_by_chat_id.return_value = {
+            "tasks": [{"id": 1, "name": "flats", "url": "u1"}]
+        }
+        self.repo = MonitoringRepository(client=self.client, cache=TaskListCache())
+
+    async def test_lookups_share_one_fetch(self):
+        self.assertTrue(await self.repo.has_url("1", "u1"))
+        self.assertFalse(await self.repo.has_url("1", "u2"))
+        self.assertTrue(await self.repo.task_exists("1", "flats"))
+        self.assertFalse(await self.repo.task_exists("1", "rooms"))
+        self.assertEqual([t.id for t in await self.repo.list_tasks("1")], [1])
+        self.client.get_tasks_by_chat_id.assert_awaited_once_with("1")
+
+    async def test_writes_invalidate(self):
+        await self.repo.list_tasks("1")
+        self.client.create_task.return_value = {"task": {"id": 2}}
+        await self.repo.create_task("1", "rooms", "u2")
+        await self.repo.list_tasks("1")
+        await self.repo.delete_task("1", "rooms")
+        await self.repo.list_tasks("1")
+        self.assertEqual(self.client.get_tasks_by_chat_id.await_count, 3)
+
+    async def test_failed_create_still_invalidates(self):
+        await self.repo.list_tasks("1")
+        self.client.create_task.side_effect = Exception("create-error")
+        with self.assertRaises(Exception):
+            await self.repo.create_task("1", "rooms", "u2")
+        await self.repo.list_tasks("1")
+        self.assertEqual(self.client.get_tasks_by_chat_id.await_count, 2)
+
+    async def test_fetch_errors_are_not_cached(self):
+        self.client.get_tasks_by_chat_id.side_effect = [
+            Exception("boom"),
+            {"tasks": []},
+        ]
+        self.assertFalse(await self.repo.has_url("1", "u1"))
+        self.assertEqual(await self.repo.list_tasks("1"), [])
+        self.assertEqual(self.client.get_tasks_by_chat_id.await_count, 2)
+
+
+class TestMonitoringRepositoryDeltaSync(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = AsyncMock()
+        self.client.get_pending_tasks_if_changed.return_value = {
+            "tasks": [{"id": 1}, {"id": 2}],
+            "cursor": "c1",
+            "etag": "e1",
+        }
+        self.repo = MonitoringRepository(client=self.client, delta_sync=True)
+
+    async def test_applies_changes_since_cursor(self):
+        self.assertEqual([t.id for t in await self.repo.pending_tasks()], [1, 2])
+        self.client.get_pending_task_changes.return_value = {
+            "tasks": [{"id": 3}],
+            "removed": [1],
+            "cursor": "c2",
+        }
+        self.assertEqual([t.id for t in await self.repo.pending_tasks()], [2, 3])
+        self.client.get_pending_task_changes.assert_awaited_once_with("c1")
+        self.client.get_pending_tasks_if_changed.assert_awaited_once_with(None)
+        self.client.get_pending_tasks.assert_not_awaited()
+
+    async def test_not_modified_keeps_snapshot(self):
+        self.client.get_pending_tasks_if_changed.return_value = {
+            "tasks": [{"id": 1}],
+            "etag": "e1",
+        }
+        await self.repo.pending_tasks()
+        self.client.get_pending_tasks_if_changed.return_value = {"not_modified": True}
+        self.assertEqual([t.id for t in await self.repo.pending_tasks()], [1])
+        self.client.get_pending_tasks_if_changed.assert_awaited_with("e1")
+        self.client.get_pending_task_changes.assert_not_awaited()
+
+    async def test_falls_back_to_etag_without_delta_endpoint(self):
+        await self.repo.pending_tasks()
+        self.client.get_pending_task_changes.side_effect = _http_error(404)
+        self.client.get_pending_tasks_if_changed.return_value = {"not_modified": True}
+        await self.repo.pending_tasks()
+        await self.repo.pending_tasks()
+        self.client.get_pending_task_changes.assert_awaited_once()
+        self.client.get_pending_tasks_if_changed.assert_awaited_with("e1")
+
+    async def test_expired_cursor_resyncs(self):
+        await self.repo.pending_tasks()
+        self.client.get_pending_task_changes.side_effect = _http_error(410)
+        self.client.get_pending_tasks_if_changed.return_value = {"tasks": [{"id": 5}]}
+        self.assertEqual([t.id for t in await self.repo.pending_tasks()], [5])
+        self.client.get_pending_tasks_if_changed.assert_awaited_with(None)
+
+    async def test_error_returns_empty(self):
+        self.client.get_pending_tasks_if_changed.side_effect = _http_error(500)
+        self.assertEqual(await self.repo.pending_tasks(), [])
+
+
+class TestMonitoringRepositoryActiveTasks(IsolatedAsyncioTestCase):
+    async def test_active_tasks(self):
+        client = AsyncMock()
+        client.get_all_tasks.return_value = {
+            "tasks": [{"id": 1}, {"id": 2, "is_active": False}]
+        }
+        repo = MonitoringRepository(client=client)
+        self.assertEqual([t.id for t in await repo.active_tasks()], [1])
+        client.get_all_tasks.side_effect = _http_error(500)
+        self.assertEqual(await repo.active_tasks(), [])
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from repositories.monitoring import MonitoringTask
+from repositories.snapshot import PendingTaskSnapshot
+
+
+class TestPendingTaskSnapshot(TestCase):
+    def setUp(self):
+        self.snapshot = PendingTaskSnapshot()
+        self.snapshot.replace(
+            [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}], cursor="c1", etag="e1"
+        )
+
+    def test_replace_keeps_objects_of_remaining_tasks(self):
+        first = self.snapshot.tasks[0]
+        self.snapshot.replace([MonitoringTask({"id": 1, "name": "a2"})], etag="e2")
+        (task,) = self.snapshot.tasks
+        self.assertIs(task, first)
+        self.assertEqual(task.name, "a2")
+        self.assertEqual((self.snapshot.cursor, self.snapshot.etag), (None, "e2"))
+        self.assertEqual(self.snapshot.full_syncs, 2)
+
+    def test_apply_patches_in_place(self):
+        second = self.snapshot.tasks[1]
+        self.snapshot.apply(
+            [{"id": 2, "name": "b2"}, {"id": 3, "name": "c"}], removed=[1], cursor="c2"
+        )
+        self.assertEqual([t.id for t in self.snapshot.tasks], [2, 3])
+        self.assertIs(self.snapshot.tasks[0], second)
+        self.assertEqual(second.name, "b2")
+        self.assertEqual((self.snapshot.cursor, self.snapshot.etag), ("c2", None))
+
+    def test_reset_drops_validators_only(self):
+        self.snapshot.reset()
+        self.assertEqual((self.snapshot.cursor, self.snapshot.etag), (None, None))
+        self.assertEqual(len(self.snapshot), 2)
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+try:
+    import aiosqlite
+except ImportError:  # pragma: no cover – optional backend
+    aiosqlite = None
+
+if aiosqlite is not None:
+    from repositories.sqlite import _SCHEMA, SqliteMonitoringRepository
+
+
+@unittest.skipUnless(aiosqlite, "aiosqlite not installed")
+class TestSqliteMonitoringRepository(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = SqliteMonitoringRepository(
+            os.path.join(self.tmp.name, "test.db"), pending_interval_s=60
+        )
+
+    async def asyncTearDown(self):
+        await self.repo.close()
+        self.tmp.cleanup()
+
+    async def test_wal_mode_and_indexes(self):
+        db = await self.repo.connect()
+        async with db.execute("PRAGMA journal_mode") as cursor:
+            self.assertEqual((await cursor.fetchone())[0], "wal")
+        async with db.execute("PRAGMA index_list(tasks)") as cursor:
+            indexes = {row["name"] for row in await cursor.fetchall()}
+        self.assertTrue({"ix_tasks_chat_name", "ix_tasks_chat_url"} <= indexes)
+
+    async def test_crud(self):
+        task = await self.repo.create_task("1", "flats", "https://www.olx.pl/a")
+        self.assertEqual(
+            (task.chat_id, task.name, task.is_active), ("1", "flats", True)
+        )
+        self.assertTrue(await self.repo.task_exists("1", "flats"))
+        self.assertFalse(await self.repo.task_exists("2", "flats"))
+        self.assertTrue(await self.repo.has_url("1", "https://www.olx.pl/a"))
+        self.assertFalse(await self.repo.has_url("1", "https://www.olx.pl/b"))
+        self.assertEqual([t.id for t in await self.repo.list_tasks("1")], [task.id])
+        with self.assertRaises(aiosqlite.IntegrityError):
+            await self.repo.create_task("1", "flats", "https://www.olx.pl/b")
+        await self.repo.delete_task("1", "flats")
+        self.assertEqual(await self.repo.list_tasks("1"), [])
+
+    async def test_active_tasks(self):
+        task = await self.repo.create_task("1", "flats", "u")
+        self.assertEqual([t.id for t in await self.repo.active_tasks()], [task.id])
+
+    async def test_pending_until_checked(self):
+        task = await self.repo.create_task("1", "flats", "u")
+        self.assertEqual([t.id for t in await self.repo.pending_tasks()], [task.id])
+        await self.repo.update_last_updated_many([task])
+        self.assertEqual(await self.repo.pending_tasks(), [])
+        self.repo._pending_interval_s = 0
+        self.assertEqual(len(await self.repo.pending_tasks()), 1)
+
+    async def test_items_to_send_after_task_creation(self):
+        await self.repo.add_items([{"item_url": "i0", "source_url": "u1"}])
+        a = await self.repo.create_task("1", "a", "u1")
+        b = await self.repo.create_task("2", "b", "u1")
+        c = await self.repo.create_task("3", "c", "u2")
+        added = await self.repo.add_items(
+            [
+                {
+                    "item_url": "i1",
+                    "source_url": "u1",
+                    "created_at": "2024-01-01T14:00:00",
+                },
+                {
+                    "item_url": "i2",
+                    "source_url": "u1",
+                    "created_at": "2024-01-01T12:30:00",
+                },
+                {
+                    "item_url": "i2",
+                    "source_url": "u1",
+                    "created_at": "2024-01-01T12:30:00",
+                },
+                {
+                    "item_url": "i3",
+                    "source_url": "u9",
+                    "created_at": "2024-01-01T14:00:00",
+                },
+            ]
+        )
+        self.assertEqual(added, 3)
+        result = await self.repo.items_to_send_many([a, b, c])
+        self.assertEqual([i.item_url for i in result[a.id]], ["i2", "i1"])
+        self.assertEqual(result[b.id], result[a.id])
+        self.assertEqual(result[c.id], [])
+        self.assertEqual(await self.repo.items_to_send(b), result[b.id])
+
+    async def test_items_inserted_late_are_still_sent(self):
+        task = await self.repo.create_task("1", "a", "u")
+        await self.repo.add_items([{"item_url": "a", "source_url": "u"}])
+        self.assertEqual(len(await self.repo.items_to_send(task)), 1)
+        # Scraped between the fetch and the bookkeeping flush
+        await self.repo.add_items([{"item_url": "b", "source_url": "u"}])
+        await self.repo.update_last_got_item_many([task])
+        # Scraped after the flush, but listed before it
+        await self.repo.add_items(
+            [{"item_url": "c", "source_url": "u", "created_at": "2000-01-01T00:00"}]
+        )
+        items = await self.repo.items_to_send(task)
+        self.assertEqual([i.item_url for i in items], ["c", "b"])
+
+    async def test_shared_url_subscribers_advance_with_the_fetch(self):
+        a = await self.repo.create_task("1", "a", "u")
+        b = await self.repo.create_task("2", "b", "u")
+        await self.repo.add_items([{"item_url": "x", "source_url": "u"}])
+        await self.repo.items_to_send_many([a])
+        await self.repo.update_last_got_item_many([a, b])
+        self.assertEqual(
+            await self.repo.items_to_send_many([a, b]), {a.id: [], b.id: []}
+        )
+
+    async def test_migrates_databases_without_item_marks(self):
+        await self.repo.close()
+        path = os.path.join(self.tmp.name, "old.db")
+        old_schema = _SCHEMA.replace(
+            ",\n    last_item_id INTEGER NOT NULL DEFAULT 0", ""
+        )
+        self.assertNotEqual(old_schema, _SCHEMA)
+        async with aiosqlite.connect(path) as db:
+            await db.executescript(old_schema)
+            await db.execute(
+                "INSERT INTO tasks (chat_id, name, url, last_got_item, created_at)"
+                " VALUES ('1', 'a', 'u', '2024-01-01T12:00:00+00:00',"
+                " '2024-01-01T10:00:00+00:00')"
+            )
+            await db.executemany(
+                "INSERT INTO items (item_url, source_url, created_ts) VALUES (?, ?, ?)",
+                [
+                    (url, "u", datetime.fromisoformat(created).timestamp())
+                    for url, created in (
+                        ("sent", "2024-01-01T11:00:00+00:00"),
+                        ("new", "2024-01-01T13:00:00+00:00"),
+                    )
+                ],
+            )
+            await db.commit()
+
+        self.repo = SqliteMonitoringRepository(path)
+        (task,) = await self.repo.list_tasks("1")
+        items = await self.repo.items_to_send(task)
+        self.assertEqual([i.item_url for i in items], ["new"])
+
+    async def test_batched_last_got_item(self):
+        tasks = [await self.repo.create_task("1", n, "u") for n in ("a", "b")]
+        await self.repo.update_last_got_item_many(tasks)
+        self.assertTrue(all(t.last_got_item for t in await self.repo.list_tasks("1")))
+
+    async def test_last_got_item_at_fetch_time(self):
+        a, b = [await self.repo.create_task("1", n, "u") for n in ("a", "b")]
+        fetched_at = "2024-01-01T12:00:00.000000+01:00"
+        await self.repo.update_last_got_item_many([a, b], {a.id: fetched_at})
+        stored = {t.id: t.last_got_item for t in await self.repo.list_tasks("1")}
+        self.assertEqual(stored[a.id], fetched_at)
+        self.assertNotEqual(stored[b.id], fetched_at)
+
+    async def test_delete_old_items(self):
+        await self.repo.add_items(
+            [
+                {
+                    "item_url": "old",
+                    "source_url": "u",
+                    "created_at": "2000-01-01T00:00:00",
+                },
+                {"item_url": "new", "source_url": "u"},
+            ]
+        )
+        self.assertEqual(await self.repo.delete_old_items(7), 1)
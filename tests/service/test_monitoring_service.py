@@ -69,7 +69,20 @@ class TestMonitoringService(IsolatedAsyncioTestCase):
         self.repo.pending_tasks.assert_awaited()
         await self.svc.items_to_send(MagicMock())
         self.repo.items_to_send.assert_awaited()
-        await self.svc.update_last_got_item("1")
-        self.repo.update_last_got_item.assert_awaited_with("1")
+        task = MagicMock(id=3)
+        await self.svc.update_last_got_item(task)
+        self.repo.update_last_got_item.assert_awaited_with(task)
         await self.svc.update_last_updated(MagicMock())
         self.repo.update_last_updated.assert_awaited()
+
+    async def test_batch_passthroughs(self):
+        tasks = [MagicMock(id=1), MagicMock(id=2)]
+        self.repo.items_to_send_many.return_value = {1: [], 2: ["x"]}
+        self.assertEqual(await self.svc.items_to_send_many(tasks), {1: [], 2: ["x"]})
+        self.repo.items_to_send_many.assert_awaited_with(tasks)
+        await self.svc.update_last_got_item_many(tasks)
+        self.repo.update_last_got_item_many.assert_awaited_with(tasks, None)
+        await self.svc.update_last_got_item_many(tasks, {1: "t"})
+        self.repo.update_last_got_item_many.assert_awaited_with(tasks, {1: "t"})
+        await self.svc.update_last_updated_many(tasks)
+        self.repo.update_last_updated_many.assert_awaited_with(tasks)
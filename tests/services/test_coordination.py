@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from services.coordination import LeaseCoordinator
+from tools.sharding import shard_for
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover – optional test dependency
+    fakeredis = None
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestLeaseCoordinator(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    def _node(self, node_id, lease_ms=30_000):
+        return LeaseCoordinator(
+            self.redis, shards=8, lease_ms=lease_ms, node_id=node_id
+        )
+
+    async def test_single_node_owns_every_shard(self):
+        node = self._node("a")
+
+        owned = await node.heartbeat()
+
+        self.assertEqual(owned, frozenset(range(8)))
+        self.assertTrue(node.owns("12345"))
+
+    async def test_two_nodes_split_shards_without_overlap(self):
+        a, b = self._node("a"), self._node("b")
+        await a.heartbeat()
+        await b.heartbeat()  # nothing free yet
+        await a.heartbeat()  # a hands back above its fair share
+        await b.heartbeat()
+
+        self.assertEqual(len(a.owned), 4)
+        self.assertEqual(len(b.owned), 4)
+        self.assertFalse(a.owned & b.owned)
+        self.assertEqual(a.owned | b.owned, frozenset(range(8)))
+        for chat_id in ("1", "2", "-100300"):
+            self.assertNotEqual(a.owns(chat_id), b.owns(chat_id))
+            self.assertIn(shard_for(chat_id, 8), a.owned | b.owned)
+
+    async def test_dead_node_shards_are_taken_over_after_lease(self):
+        a, b = self._node("a", lease_ms=100), self._node("b", lease_ms=100)
+        for node in (a, b, a, b):
+            await node.heartbeat()
+        self.assertEqual(len(a.owned), 4)
+
+        # b stops heartbeating; its leases and liveness expire
+        await asyncio.sleep(0.15)
+        await a.heartbeat()
+
+        self.assertEqual(a.owned, frozenset(range(8)))
+
+    async def test_renew_keeps_leases(self):
+        a = self._node("a", lease_ms=100)
+        await a.heartbeat()
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            await a.heartbeat()
+
+        self.assertEqual(a.owned, frozenset(range(8)))
+        self.assertEqual(await self.redis.get("notifier:lease:0"), "a")
+
+    async def test_release_all_frees_shards(self):
+        a, b = self._node("a"), self._node("b")
+        await a.heartbeat()
+
+        await a.release_all()
+        await b.heartbeat()
+
+        self.assertEqual(a.owned, frozenset())
+        self.assertEqual(b.owned, frozenset(range(8)))
+
+    async def test_redis_error_drops_ownership(self):
+        node = self._node("a")
+        await node.heartbeat()
+        node._redis = MagicMock()
+        node._redis.pipeline.side_effect = ConnectionError("down")
+
+        owned = await node.heartbeat()
+
+        self.assertEqual(owned, frozenset())
+        self.assertFalse(node.owns("1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from services.events import ItemEvents
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover – optional test dependency
+    fakeredis = None
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestItemEvents(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.events = ItemEvents(self.redis)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_reads_only_events_after_the_first_read(self):
+        await self.events.publish(task_id=1)
+        self.assertFalse(await self.events.next_batch(0.01))
+        await self.events.publish(task_id=2)
+        await self.events.publish(source_url="https://www.olx.pl/a")
+        await self.events.publish(task_id=2, source_url="https://www.olx.pl/b")
+        batch = await self.events.next_batch(0.01)
+        self.assertEqual(batch.task_ids, {"2"})
+        self.assertEqual(
+            batch.source_urls, {"https://www.olx.pl/a", "https://www.olx.pl/b"}
+        )
+        # Entries are not read twice
+        self.assertFalse(await self.events.next_batch(0.01))
+
+    async def test_publish_needs_a_target(self):
+        with self.assertRaises(ValueError):
+            await self.events.publish()
+
+
+class TestItemEventsErrors(IsolatedAsyncioTestCase):
+    async def test_redis_error_waits_and_returns_empty(self):
+        redis = AsyncMock()
+        redis.xread.side_effect = ConnectionError("down")
+        events = ItemEvents(redis)
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            for _ in range(6):
+                self.assertFalse(await events.next_batch(300))
+            self.assertFalse(await events.next_batch(0.5))
+        # Short backoff doubling up to a cap, never the whole timeout
+        self.assertEqual(
+            [c.args[0] for c in sleep.await_args_list], [1, 2, 4, 8, 8, 8, 0.5]
+        )
+
+    async def test_backoff_resets_after_a_successful_read(self):
+        redis = AsyncMock()
+        redis.xrevrange.return_value = []
+        redis.xread.side_effect = [ConnectionError("down"), [], ConnectionError("x")]
+        events = ItemEvents(redis)
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            for _ in range(3):
+                await events.next_batch(300)
+        self.assertEqual([c.args[0] for c in sleep.await_args_list], [1, 1])
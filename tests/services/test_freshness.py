@@ -0,0 +1,122 @@
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from clients.models import Item
+from services.freshness import (
+    FRESHNESS_SECONDS,
+    MAX_LAG_S,
+    RELATIVE_ACCURACY,
+    FreshnessTracker,
+    LagSketch,
+)
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover – optional test dependency
+    fakeredis = None
+
+SENT_AT = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _delivered(*lags_s):
+    """``(item, sent at)`` pairs for items created *lags_s* before SENT_AT."""
+    return [
+        (Item(created_at=(SENT_AT - timedelta(seconds=lag)).isoformat()), SENT_AT)
+        for lag in lags_s
+    ]
+
+
+class TestLagSketch(unittest.TestCase):
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        lags = sorted(rng.lognormvariate(5, 1.5) + 2 for _ in range(5000))
+        sketch = LagSketch()
+        for lag in lags:
+            sketch.add(lag)
+        for q in (0.5, 0.9, 0.99):
+            exact = lags[int(q * (len(lags) - 1))]
+            self.assertAlmostEqual(
+                sketch.quantile(q), exact, delta=exact * RELATIVE_ACCURACY
+            )
+
+    def test_bucket_count_is_bounded(self):
+        sketch = LagSketch()
+        for lag in (0.0, -5.0, 0.5, 10**9):
+            sketch.add(lag)
+        self.assertEqual(sorted(sketch.counts), [0, LagSketch.index(MAX_LAG_S)])
+        self.assertLess(LagSketch.index(MAX_LAG_S), 200)
+        self.assertIsNone(LagSketch().quantile(0.5))
+
+    def test_from_counts_round_trip(self):
+        sketch = LagSketch()
+        for lag in (3, 30, 300):
+            sketch.add(lag)
+        copy = LagSketch.from_counts({str(k): str(v) for k, v in sketch.counts.items()})
+        self.assertEqual((copy.counts, copy.count), (sketch.counts, 3))
+
+
+class TestFreshnessTracker(IsolatedAsyncioTestCase):
+    async def test_in_memory_summary(self):
+        tracker = FreshnessTracker()
+        task = MagicMock(id=7)
+        await tracker.record(task, _delivered(60, 120) + [(Item(), SENT_AT)])
+
+        summary = await tracker.summary(7)
+        self.assertEqual(summary.count, 2)
+        self.assertAlmostEqual(summary.p50, 60, delta=60 * RELATIVE_ACCURACY)
+        self.assertAlmostEqual(summary.p99, 120, delta=120 * RELATIVE_ACCURACY)
+        self.assertIsNone(await tracker.summary(8))
+
+    async def test_in_memory_tasks_are_bounded(self):
+        tracker = FreshnessTracker(max_tasks=2)
+        for task_id in (1, 2, 3):
+            await tracker.record(MagicMock(id=task_id), _delivered(10))
+        self.assertIsNone(await tracker.summary(1))
+        self.assertIsNotNone(await tracker.summary(3))
+
+    async def test_each_item_uses_its_own_send_time(self):
+        tracker = FreshnessTracker()
+        created = Item(created_at=SENT_AT.isoformat())
+        await tracker.record(
+            MagicMock(id=1),
+            [(created, SENT_AT + timedelta(seconds=s)) for s in (10, 100)],
+        )
+        summary = await tracker.summary(1)
+        self.assertAlmostEqual(summary.p50, 10, delta=10 * RELATIVE_ACCURACY)
+        self.assertAlmostEqual(summary.p99, 100, delta=100 * RELATIVE_ACCURACY)
+
+    async def test_lags_are_exported(self):
+        child = FRESHNESS_SECONDS.labels()
+        before = child.count
+        await FreshnessTracker().record(MagicMock(id=1), _delivered(5, 50))
+        self.assertEqual(child.count, before + 2)
+
+    async def test_redis_errors_are_swallowed(self):
+        redis = MagicMock()
+        redis.pipeline.side_effect = ConnectionError("down")
+        redis.hgetall = AsyncMock(side_effect=ConnectionError("down"))
+        tracker = FreshnessTracker(redis)
+        await tracker.record(MagicMock(id=1), _delivered(5))
+        self.assertIsNone(await tracker.summary(1))
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestFreshnessTrackerRedis(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_lags_are_shared_between_trackers(self):
+        writer = FreshnessTracker(self.redis, ttl_s=60)
+        reader = FreshnessTracker(self.redis)
+        await writer.record(MagicMock(id=7), _delivered(30, 30, 600))
+
+        summary = await reader.summary(7)
+        self.assertEqual(summary.count, 3)
+        self.assertAlmostEqual(summary.p50, 30, delta=30 * RELATIVE_ACCURACY)
+        self.assertLessEqual(await self.redis.ttl("freshness:7"), 60)
@@ -0,0 +1,55 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from services.lanes import ChatLanes
+
+
+class TestChatLanes(IsolatedAsyncioTestCase):
+    async def test_jobs_for_same_chat_run_in_order(self):
+        lanes = ChatLanes()
+        events = []
+
+        def job(tag, delay):
+            async def run():
+                await asyncio.sleep(delay)
+                events.append(tag)
+
+            return run
+
+        lanes.submit("1", job("a", 0.02))
+        lanes.submit("1", job("b", 0))
+        lanes.submit("1", job("c", 0.01))
+        await lanes.drain()
+        self.assertEqual(events, ["a", "b", "c"])
+
+    async def test_different_chats_run_concurrently(self):
+        lanes = ChatLanes()
+        events = []
+
+        async def slow():
+            await asyncio.sleep(0.03)
+            events.append("slow")
+
+        async def fast():
+            events.append("fast")
+
+        lanes.submit("1", slow)
+        lanes.submit("2", fast)
+        await lanes.drain()
+        self.assertEqual(events, ["fast", "slow"])
+        self.assertEqual(len(lanes), 0)
+
+    async def test_failed_job_does_not_block_lane(self):
+        lanes = ChatLanes()
+        events = []
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        async def after():
+            events.append("after")
+
+        lanes.submit("1", boom)
+        lanes.submit("1", after)
+        await lanes.drain()
+        self.assertEqual(events, ["after"])
@@ -4,11 +4,20 @@ from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from services.notifier import (
+    CYCLE_SECONDS,
+    CYCLE_TASKS,
+    ITEMS_SENT,
+    MESSAGE_LIMIT,
     Notifier,
     _escape_markdown_v2,
     _format_item_text,
+    _pack_text_groups,
+    _pack_texts,
+    _split_text,
     bold_telegram_md,
 )
+from services.rate_limiter import SEND_FAILURES
+from services.renderer import render_items
 
 
 class TestEscapeMarkdownV2(unittest.TestCase):
@@ -163,8 +172,11 @@ class TestNotifier(IsolatedAsyncioTestCase):
         n = Notifier(bot, svc)
         await n._check_and_send_items()
 
-        svc.update_last_updated.assert_awaited()  # called for empty items
-        svc.update_last_got_item.assert_not_called()
+        # called for empty items
+        svc.update_last_updated_many.assert_awaited_once_with(
+            svc.pending_tasks.return_value
+        )
+        svc.update_last_got_item_many.assert_not_called()
         bot.send_message.assert_not_awaited()
 
     async def test_check_and_send_items_with_items(self):
@@ -203,8 +215,91 @@ class TestNotifier(IsolatedAsyncioTestCase):
         # Then per-item messages/photos
         bot.send_message.assert_awaited()  # for item without image
         bot.send_photo.assert_awaited()  # for item with image
-        svc.update_last_got_item.assert_awaited_with("1")
-        svc.update_last_updated.assert_awaited_with(task)
+        svc.update_last_got_item_many.assert_awaited_once_with(
+            [task], unittest.mock.ANY
+        )
+        svc.update_last_updated_many.assert_awaited_once_with([task])
+
+    async def test_cycle_metrics(self):
+        svc = AsyncMock()
+        svc.pending_tasks.return_value = [MagicMock(chat_id="1", id=7, url=None)]
+        svc.items_to_send.return_value = [{"title": "A", "item_url": "U"}] * 2
+        cycles = CYCLE_SECONDS.labels("poll")
+        tasks = CYCLE_TASKS.labels("poll")
+        sent = ITEMS_SENT.labels()
+        before = (cycles.count, tasks.sum, sent.value)
+
+        await Notifier(AsyncMock(), svc)._check_and_send_items()
+
+        self.assertEqual(
+            (cycles.count, tasks.sum, sent.value),
+            (before[0] + 1, before[1] + 1, before[2] + 2),
+        )
+
+    async def test_delivered_items_record_freshness(self):
+        freshness = AsyncMock()
+        task = MagicMock(chat_id="1", id=7)
+        await Notifier(AsyncMock(), AsyncMock(), freshness=freshness).send_items(
+            task, [{"title": "A", "item_url": "U", "created_at": "2026-01-01"}]
+        )
+        freshness.record.assert_awaited_once()
+        recorded_task, delivered = freshness.record.await_args.args
+        self.assertIs(recorded_task, task)
+        ((item, sent_at),) = delivered
+        self.assertEqual(item.created_at, "2026-01-01")
+        self.assertIsNotNone(sent_at.tzinfo)
+
+    async def test_items_are_stamped_after_their_own_send(self):
+        freshness = AsyncMock()
+        items = [{"title": t, "item_url": "U"} for t in ("A", "B")]
+        notifier = Notifier(AsyncMock(), AsyncMock(), freshness=freshness)
+        with patch("services.notifier.datetime") as fake_datetime:
+            fake_datetime.now.side_effect = ["t1", "t2"]
+            await notifier.send_items(MagicMock(chat_id="1", id=7), items)
+
+        _task, delivered = freshness.record.await_args.args
+        # Oldest (last) item is sent first
+        self.assertEqual(
+            [(item.title, sent_at) for item, sent_at in delivered],
+            [("B", "t1"), ("A", "t2")],
+        )
+
+    async def test_album_items_are_stamped_per_message(self):
+        freshness = AsyncMock()
+        items = [
+            {"title": "A", "item_url": "U", "image_url": "http://a"},
+            {"title": "B", "item_url": "U", "image_url": "http://b"},
+            {"title": "C", "item_url": "U"},
+        ]
+        notifier = Notifier(AsyncMock(), AsyncMock(), album=True, freshness=freshness)
+        with patch("services.notifier.datetime") as fake_datetime:
+            fake_datetime.now.side_effect = ["album", "text"]
+            await notifier.send_items(MagicMock(chat_id="1", id=7), items)
+
+        _task, delivered = freshness.record.await_args.args
+        self.assertEqual(
+            sorted((item.title, sent_at) for item, sent_at in delivered),
+            [("A", "album"), ("B", "album"), ("C", "text")],
+        )
+
+    async def test_bookkeeping_flushed_when_a_delivery_fails(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1, url=None)
+        t2 = MagicMock(chat_id="2", id=2, url=None)
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.side_effect = lambda task: (
+            [] if task is t1 else [{"title": "A", "item_url": "U"}]
+        )
+        bot.send_photo.side_effect = RuntimeError("telegram down")
+
+        n = Notifier(bot, svc)
+        with self.assertRaises(RuntimeError):
+            await n._check_and_send_items()
+
+        # t1 was checked before the failure; t2 is retried next cycle
+        svc.update_last_updated_many.assert_awaited_once_with([t1])
+        svc.update_last_got_item_many.assert_not_awaited()
 
     async def test_run_periodically_breaks(self):
         bot = AsyncMock()
@@ -219,3 +314,563 @@ class TestNotifier(IsolatedAsyncioTestCase):
                 with self.assertRaises(asyncio.CancelledError):
                     await n.run_periodically(1)
         check.assert_awaited()
+
+
+class TestNotifierConcurrent(IsolatedAsyncioTestCase):
+    async def test_concurrent_cycle_sends_each_task(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1)
+        t1.name = "a"
+        t2 = MagicMock(chat_id="2", id=2)
+        t2.name = "b"
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.side_effect = lambda task: (
+            [{"title": "A", "item_url": "U"}] if task is t1 else []
+        )
+
+        n = Notifier(bot, svc, concurrency=4)
+        with patch("asyncio.sleep", new=AsyncMock()):
+            await n._check_and_send_items()
+
+        self.assertEqual(svc.items_to_send.await_count, 2)
+        bot.send_message.assert_awaited_once()
+        # One deferred flush per cycle covering every task
+        svc.update_last_got_item_many.assert_awaited_once_with([t1], unittest.mock.ANY)
+        svc.update_last_updated_many.assert_awaited_once()
+        self.assertCountEqual(svc.update_last_updated_many.await_args.args[0], [t1, t2])
+
+    async def test_concurrent_cycle_keeps_chat_order(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1)
+        t1.name = "first"
+        t2 = MagicMock(chat_id="1", id=2)
+        t2.name = "second"
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.side_effect = lambda task: [
+            {"title": task.name, "item_url": "U"}
+        ]
+
+        n = Notifier(bot, svc, concurrency=4)
+        with patch("asyncio.sleep", new=AsyncMock()):
+            await n._check_and_send_items()
+
+        # Header and item of one task are never interleaved with the other
+        captions = [
+            c.kwargs.get("caption") or c.kwargs.get("text")
+            for c in bot.method_calls
+            if c[0] in ("send_photo", "send_message")
+        ]
+        self.assertEqual(len(captions), 4)
+        self.assertIn("first", captions[0] + captions[1])
+        self.assertIn("second", captions[2] + captions[3])
+
+    async def test_concurrent_cycle_isolates_fetch_errors(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1)
+        t2 = MagicMock(chat_id="2", id=2)
+        svc.pending_tasks.return_value = [t1, t2]
+
+        async def items(task):
+            if task is t1:
+                raise RuntimeError("boom")
+            return []
+
+        svc.items_to_send.side_effect = items
+
+        n = Notifier(bot, svc, concurrency=2)
+        await n._check_and_send_items()
+        svc.update_last_updated_many.assert_awaited_once_with([t2])
+
+    async def test_sends_go_through_rate_limiter(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        limiter = MagicMock()
+        limiter.send = AsyncMock()
+        task = MagicMock(chat_id="1", id=1)
+        svc.pending_tasks.return_value = [task]
+        svc.items_to_send.return_value = [{"title": "A", "item_url": "U"}]
+
+        n = Notifier(bot, svc, limiter=limiter)
+        await n._check_and_send_items()
+
+        methods = [c.args[1] for c in limiter.send.await_args_list]
+        self.assertEqual(methods, [bot.send_photo, bot.send_message])
+        bot.send_photo.assert_not_awaited()  # called only by the limiter
+
+
+class TestNotifierAlbums(IsolatedAsyncioTestCase):
+    def _item(self, title, image_url=None):
+        return {"title": title, "item_url": "U", "image_url": image_url}
+
+    async def test_album_mode_batches_photos_and_merges_texts(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        task = MagicMock(chat_id="1", id=1)
+        task.name = "flats"
+        items = [self._item(f"P{i}", f"IMG{i}") for i in range(12)]
+        items += [self._item("T1"), self._item("T2")]
+        svc.pending_tasks.return_value = [task]
+        svc.items_to_send.return_value = items
+
+        n = Notifier(bot, svc, album=True)
+        with patch("asyncio.sleep", new=AsyncMock()):
+            await n._check_and_send_items()
+
+        # 12 photos -> one album of 10 and one of 2
+        self.assertEqual(bot.send_media_group.await_count, 2)
+        sizes = [len(c.kwargs["media"]) for c in bot.send_media_group.await_args_list]
+        self.assertEqual(sizes, [10, 2])
+        # Oldest item (last in the list) comes first
+        first = bot.send_media_group.await_args_list[0].kwargs["media"][0]
+        self.assertEqual(first.media, "IMG11")
+        # Two text-only items merged into one message
+        bot.send_message.assert_awaited_once()
+        text = bot.send_message.await_args.kwargs["text"]
+        self.assertIn("T1", text)
+        self.assertIn("T2", text)
+        # Only the header photo goes through send_photo
+        bot.send_photo.assert_awaited_once()
+
+    async def test_album_mode_single_photo_uses_send_photo(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        task = MagicMock(chat_id="1", id=1)
+        svc.pending_tasks.return_value = [task]
+        svc.items_to_send.return_value = [self._item("P", "IMG")]
+
+        n = Notifier(bot, svc, album=True)
+        with patch("asyncio.sleep", new=AsyncMock()):
+            await n._check_and_send_items()
+
+        bot.send_media_group.assert_not_awaited()
+        bot.send_photo.assert_any_await(
+            chat_id="1", photo="IMG", caption=unittest.mock.ANY, parse_mode="MarkdownV2"
+        )
+
+    def test_pack_texts_respects_limit(self):
+        texts = ["a" * 40, "b" * 40, "c" * 40]
+        self.assertEqual(
+            _pack_texts(texts, limit=100), ["a" * 40 + "\n\n" + "b" * 40, "c" * 40]
+        )
+        self.assertEqual(_pack_texts([]), [])
+        # Oversized texts are split into parts below the limit
+        self.assertEqual(_pack_texts(["x" * 150], limit=100), ["x" * 100, "x" * 50])
+
+    def test_oversized_text_splits_at_line_ends(self):
+        text = "\n".join(["a" * 60, "b" * 30, "c" * 60])
+        self.assertEqual(
+            _split_text(text, limit=100), ["a" * 60 + "\n" + "b" * 30, "c" * 60]
+        )
+        self.assertEqual(_split_text("short", limit=100), ["short"])
+        # A hard cut never separates a backslash from the character it escapes
+        parts = _split_text("a" * 98 + "\\." + "b" * 10, limit=99)
+        self.assertEqual(parts, ["a" * 98, "\\." + "b" * 10])
+
+    def test_pack_text_groups_counts_split_text_once(self):
+        groups = _pack_text_groups(["a" * 10, "x" * 150, "b" * 10], limit=100)
+        self.assertEqual([len(message) for message, _ in groups], [10, 100, 62])
+        self.assertEqual([count for _, count in groups], [1, 0, 2])
+
+    async def test_albums_split_texts_over_the_message_limit(self):
+        bot = AsyncMock()
+        n = Notifier(bot, AsyncMock(), album=True)
+        item = {"title": "A", "item_url": "U"}
+        text = "\n".join(["x" * 3000, "y" * 3000])
+
+        delivered = await n._send_albums("1", [item], [text])
+
+        sent = [c.kwargs["text"] for c in bot.send_message.await_args_list]
+        self.assertEqual(sent, ["x" * 3000, "y" * 3000])
+        self.assertTrue(all(len(t) <= MESSAGE_LIMIT for t in sent))
+        self.assertEqual([i for i, _ in delivered], [item])
+
+
+class TestNotifierPhotoCache(IsolatedAsyncioTestCase):
+    def _cache(self, cached=None):
+        cache = MagicMock()
+        cache.get = AsyncMock(side_effect=lambda url: (cached or {}).get(url))
+        cache.get_many = AsyncMock(
+            side_effect=lambda urls: [(cached or {}).get(u) for u in urls]
+        )
+        cache.remember = AsyncMock()
+        cache.remember_many = AsyncMock()
+        cache.invalidate = AsyncMock()
+        return cache
+
+    async def test_uses_cached_file_id_for_header(self):
+        from services.notifier import HEADER_IMAGE_URL
+
+        bot = AsyncMock()
+        svc = AsyncMock()
+        cache = self._cache({HEADER_IMAGE_URL: "HEADER_ID"})
+        task = MagicMock(chat_id="1", id=1)
+        svc.pending_tasks.return_value = [task]
+        svc.items_to_send.return_value = [{"title": "A", "item_url": "U"}]
+
+        n = Notifier(bot, svc, photo_cache=cache)
+        with patch("asyncio.sleep", new=AsyncMock()):
+            await n._check_and_send_items()
+
+        self.assertEqual(bot.send_photo.await_args.kwargs["photo"], "HEADER_ID")
+        cache.remember.assert_not_awaited()
+
+    async def test_uploads_and_remembers_on_miss(self):
+        bot = AsyncMock()
+        cache = self._cache()
+        n = Notifier(bot, AsyncMock(), photo_cache=cache)
+        await n._send_photo("1", "http://img", caption="c")
+        bot.send_photo.assert_awaited_once_with(
+            chat_id="1", photo="http://img", caption="c"
+        )
+        cache.remember.assert_awaited_once_with(
+            "http://img", bot.send_photo.return_value
+        )
+
+    async def test_stale_file_id_falls_back_to_url(self):
+        from aiogram.exceptions import TelegramBadRequest
+
+        bot = AsyncMock()
+        bot.send_photo.side_effect = [
+            TelegramBadRequest(method=MagicMock(), message="wrong file identifier"),
+            MagicMock(),
+        ]
+        cache = self._cache({"http://img": "OLD"})
+        n = Notifier(bot, AsyncMock(), photo_cache=cache)
+        failures = SEND_FAILURES.labels("TelegramBadRequest")
+        before = failures.value
+        await n._send_photo("1", "http://img")
+        cache.invalidate.assert_awaited_once_with("http://img")
+        self.assertEqual(bot.send_photo.await_args.kwargs["photo"], "http://img")
+        cache.remember.assert_awaited_once()
+        # Recovered by the fallback – not a failed send
+        self.assertEqual(failures.value, before)
+
+    async def test_failed_fallback_is_counted(self):
+        from aiogram.exceptions import TelegramBadRequest
+
+        bot = AsyncMock()
+        bot.send_photo.side_effect = TelegramBadRequest(
+            method=MagicMock(), message="wrong file identifier"
+        )
+        n = Notifier(bot, AsyncMock(), photo_cache=self._cache({"http://img": "OLD"}))
+        failures = SEND_FAILURES.labels("TelegramBadRequest")
+        before = failures.value
+        with self.assertRaises(TelegramBadRequest):
+            await n._send_photo("1", "http://img")
+        self.assertEqual(failures.value, before + 1)
+
+    async def test_album_uses_cached_ids_and_remembers_new_uploads(self):
+        bot = AsyncMock()
+        bot.send_media_group.return_value = [MagicMock(), MagicMock()]
+        cache = self._cache({"http://a": "ID_A"})
+        n = Notifier(bot, AsyncMock(), album=True, photo_cache=cache)
+        await n._send_album("1", [("http://a", "A"), ("http://b", "B")])
+        media = bot.send_media_group.await_args.kwargs["media"]
+        self.assertEqual([m.media for m in media], ["ID_A", "http://b"])
+        remembered = list(cache.remember_many.await_args.args[0])
+        self.assertEqual([url for url, _ in remembered], ["http://b"])
+
+
+class TestNotifierOutbox(IsolatedAsyncioTestCase):
+    async def test_items_are_enqueued_instead_of_sent(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        outbox = MagicMock()
+        outbox.enqueue = AsyncMock()
+        task = MagicMock(chat_id="1", id=1)
+        items = [{"title": "A", "item_url": "U"}]
+        svc.pending_tasks.return_value = [task]
+        svc.items_to_send.return_value = items
+
+        n = Notifier(bot, svc, outbox=outbox)
+        await n._check_and_send_items()
+
+        outbox.enqueue.assert_awaited_once_with(task, items)
+        bot.send_photo.assert_not_awaited()
+        svc.update_last_got_item_many.assert_awaited_once_with(
+            [task], unittest.mock.ANY
+        )
+        svc.update_last_updated_many.assert_awaited_once_with([task])
+
+    async def test_failed_enqueue_skips_bookkeeping(self):
+        svc = AsyncMock()
+        outbox = MagicMock()
+        outbox.enqueue = AsyncMock(side_effect=ConnectionError("redis down"))
+        task = MagicMock(chat_id="1", id=1)
+
+        n = Notifier(AsyncMock(), svc, outbox=outbox)
+        with self.assertRaises(ConnectionError):
+            await n._deliver(task, [{"title": "A"}])
+        await n._flush_bookkeeping()
+        svc.update_last_got_item_many.assert_not_awaited()
+
+
+class TestNotifierScheduler(IsolatedAsyncioTestCase):
+    async def test_only_due_tasks_are_fetched_and_observed(self):
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1)
+        t2 = MagicMock(chat_id="2", id=2)
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.return_value = []
+        scheduler = MagicMock()
+        scheduler.due.return_value = [t2]
+
+        n = Notifier(AsyncMock(), svc, scheduler=scheduler)
+        await n._check_and_send_items()
+
+        svc.items_to_send.assert_awaited_once_with(t2)
+        scheduler.observe.assert_called_once_with(t2, [])
+
+
+class TestNotifierBatch(IsolatedAsyncioTestCase):
+    def _svc(self, tasks, items_by_id):
+        svc = AsyncMock()
+        svc.pending_tasks.return_value = tasks
+        svc.items_to_send_many.return_value = items_by_id
+        return svc
+
+    async def test_items_fetched_in_one_batch(self):
+        t1 = MagicMock(chat_id="1", id=1, url=None)
+        t2 = MagicMock(chat_id="2", id=2, url=None)
+        svc = self._svc([t1, t2], {1: [{"title": "A"}], 2: []})
+        n = Notifier(AsyncMock(), svc, batch=True)
+        n.send_items = AsyncMock()
+
+        await n._check_and_send_items()
+
+        svc.items_to_send_many.assert_awaited_once_with([t1, t2])
+        svc.items_to_send.assert_not_awaited()
+        n.send_items.assert_awaited_once_with(t1, [{"title": "A"}], None)
+        # Bookkeeping is flushed together at the end of the cycle
+        svc.update_last_got_item_many.assert_awaited_once_with([t1], unittest.mock.ANY)
+        svc.update_last_updated_many.assert_awaited_once_with([t1, t2])
+        svc.update_last_updated.assert_not_awaited()
+
+    async def test_concurrent_cycle_uses_batch(self):
+        tasks = [MagicMock(chat_id=str(i), id=i, url=None) for i in range(3)]
+        svc = self._svc(tasks, {0: [], 1: [], 2: []})
+        n = Notifier(AsyncMock(), svc, batch=True, concurrency=4)
+
+        await n._check_and_send_items()
+
+        svc.items_to_send_many.assert_awaited_once()
+        svc.items_to_send.assert_not_awaited()
+        svc.update_last_updated_many.assert_awaited_once()
+        self.assertCountEqual(svc.update_last_updated_many.await_args.args[0], tasks)
+
+    async def test_last_got_item_is_the_fetch_time(self):
+        leader = MagicMock(chat_id="1", id=1, url="https://www.olx.pl/a/")
+        leader.last_got_item = "2024-01-01T10:00:00"
+        shared = MagicMock(chat_id="2", id=2, url="https://www.olx.pl/a/")
+        shared.last_got_item = "2024-01-01T11:00:00"
+        alone = MagicMock(chat_id="3", id=3, url=None)
+        svc = self._svc(
+            [leader, shared, alone],
+            {1: [{"title": "A", "created_at": "2024-01-01T12:00:00"}]},
+        )
+        svc.items_to_send.return_value = [{"title": "B"}]
+        clock = iter(range(100))
+        n = Notifier(AsyncMock(), svc, batch=True)
+        n.send_items = AsyncMock()
+
+        with patch("services.notifier.now_warsaw") as now:
+            now.side_effect = lambda: MagicMock(isoformat=lambda: f"t{next(clock)}")
+            await n._check_and_send_items()
+
+        tasks, stamps = svc.update_last_got_item_many.await_args.args
+        self.assertCountEqual(tasks, [leader, shared, alone])
+        # The prefetch stamp is shared by the group; the task fetched on its
+        # own is stamped right before its request, never at flush time
+        self.assertEqual(stamps, {1: "t0", 2: "t0", 3: "t1"})
+
+    async def test_batch_fetches_only_group_leaders(self):
+        old = MagicMock(chat_id="1", id=1, url="https://www.olx.pl/a/")
+        old.last_got_item = "2024-01-01T10:00:00"
+        new = MagicMock(chat_id="2", id=2, url="https://www.olx.pl/a/")
+        new.last_got_item = "2024-01-02T10:00:00"
+        svc = self._svc([old, new], {1: []})
+        n = Notifier(AsyncMock(), svc, batch=True)
+
+        await n._check_and_send_items()
+
+        svc.items_to_send_many.assert_awaited_once_with([old])
+
+
+class TestNotifierShard(IsolatedAsyncioTestCase):
+    async def test_only_chats_of_own_shard_are_checked(self):
+        from tools.sharding import shard_for
+
+        svc = AsyncMock()
+        tasks = [MagicMock(chat_id=str(i), id=i, url=None) for i in range(20)]
+        svc.pending_tasks.return_value = tasks
+        svc.items_to_send.return_value = []
+
+        n = Notifier(AsyncMock(), svc, shard=(1, 3))
+        await n._check_and_send_items()
+
+        checked = {c.args[0].chat_id for c in svc.items_to_send.await_args_list}
+        expected = {t.chat_id for t in tasks if shard_for(t.chat_id, 3) == 1}
+        self.assertEqual(checked, expected)
+        self.assertTrue(0 < len(checked) < len(tasks))
+
+    async def test_coordinator_filters_by_owned_leases(self):
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1, url=None)
+        t2 = MagicMock(chat_id="2", id=2, url=None)
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.return_value = []
+        coordinator = MagicMock()
+        coordinator.owns.side_effect = lambda chat_id: chat_id == "2"
+
+        n = Notifier(AsyncMock(), svc, coordinator=coordinator)
+        await n._check_and_send_items()
+
+        svc.items_to_send.assert_awaited_once_with(t2)
+
+    async def test_lease_lost_mid_cycle_skips_delivery(self):
+        svc = AsyncMock()
+        t1 = MagicMock(chat_id="1", id=1, url=None)
+        t2 = MagicMock(chat_id="2", id=2, url=None)
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.return_value = [{"title": "A"}]
+        coordinator = MagicMock()
+        owned = {"1", "2"}
+        coordinator.owns.side_effect = lambda chat_id: chat_id in owned
+        n = Notifier(AsyncMock(), svc, coordinator=coordinator)
+
+        async def send_items(task, items, texts=None):
+            # A heartbeat hands chat 2 to another node while chat 1 is sent
+            owned.discard("2")
+
+        n.send_items = AsyncMock(side_effect=send_items)
+        await n._check_and_send_items()
+
+        n.send_items.assert_awaited_once()
+        self.assertIs(n.send_items.await_args.args[0], t1)
+        svc.update_last_got_item_many.assert_awaited_once_with([t1], unittest.mock.ANY)
+        svc.update_last_updated_many.assert_awaited_once_with([t1])
+
+
+class TestNotifierSharedUrl(IsolatedAsyncioTestCase):
+    def _task(self, task_id, chat_id, url, last_got_item=None):
+        task = MagicMock(
+            id=task_id, chat_id=chat_id, url=url, last_got_item=last_got_item
+        )
+        task.name = f"task{task_id}"
+        return task
+
+    async def test_same_canonical_url_is_fetched_once(self):
+        bot = AsyncMock()
+        svc = AsyncMock()
+        # Different spellings of the same search
+        t1 = self._task(1, "1", "https://www.olx.pl/d/x?b=2&a=1", "2025-01-01T12:00:00")
+        t2 = self._task(2, "2", "https://olx.pl/d/x?a=1&b=2", None)
+        t3 = self._task(3, "3", "https://www.olx.pl/d/other", None)
+        svc.pending_tasks.return_value = [t1, t2, t3]
+        items = [
+            {"title": "new", "item_url": "U1", "created_at": "2025-01-01T12:30:00Z"},
+            {"title": "old", "item_url": "U2", "created_at": "2025-01-01T09:00:00Z"},
+        ]
+        svc.items_to_send.side_effect = lambda task: items if task is t2 else []
+
+        for concurrency in (1, 4):
+            svc.items_to_send.reset_mock()
+            bot.reset_mock()
+            n = Notifier(bot, svc, concurrency=concurrency)
+            with patch("asyncio.sleep", new=AsyncMock()):
+                await n._check_and_send_items()
+
+            # One fetch for the shared URL (by the task that never got items)
+            fetched = [c.args[0] for c in svc.items_to_send.await_args_list]
+            self.assertCountEqual(fetched, [t2, t3])
+            sent = [
+                (c.kwargs["chat_id"], c.kwargs["text"])
+                for c in bot.send_message.await_args_list
+            ]
+            # Chat 2 gets everything, chat 1 only what is newer than its
+            # last_got_item (12:00 Warsaw == 11:00 UTC)
+            self.assertEqual([chat for chat, _ in sent].count("2"), 2)
+            chat1 = [text for chat, text in sent if chat == "1"]
+            self.assertEqual(len(chat1), 1)
+            self.assertIn("new", chat1[0])
+
+    async def test_items_are_rendered_once_per_group(self):
+        svc = AsyncMock()
+        t1 = self._task(1, "1", "https://www.olx.pl/d/x")
+        t2 = self._task(2, "2", "https://www.olx.pl/d/x")
+        svc.pending_tasks.return_value = [t1, t2]
+        svc.items_to_send.return_value = [{"title": "A", "item_url": "U"}]
+
+        n = Notifier(AsyncMock(), svc)
+        with patch("services.notifier.render_items", wraps=render_items) as r:
+            await n._check_and_send_items()
+        r.assert_called_once()
+        svc.items_to_send.assert_awaited_once()
+
+
+class TestNotifierPush(IsolatedAsyncioTestCase):
+    def _task(self, task_id, chat_id, url):
+        task = MagicMock(id=task_id, chat_id=chat_id, url=url, last_got_item=None)
+        task.name = f"task{task_id}"
+        return task
+
+    async def asyncSetUp(self):
+        self.t1 = self._task(1, "1", "https://www.olx.pl/d/a")
+        self.t2 = self._task(2, "2", "https://www.olx.pl/d/b")
+        self.svc = AsyncMock()
+        self.svc.active_tasks.return_value = [self.t1, self.t2]
+        self.svc.items_to_send.return_value = []
+        self.notifier = Notifier(AsyncMock(), self.svc, events=AsyncMock())
+
+    async def test_resolves_events_by_id_and_url(self):
+        from services.events import ItemEventBatch
+
+        await self.notifier._refresh_registry()
+        tasks = await self.notifier._tasks_for(
+            ItemEventBatch(task_ids={"1"}, source_urls={"https://olx.pl/d/b"})
+        )
+        self.assertCountEqual(tasks, [self.t1, self.t2])
+        self.svc.active_tasks.assert_awaited_once()
+
+    async def test_unknown_task_reloads_registry_rate_limited(self):
+        from services.events import ItemEventBatch
+
+        await self.notifier._tasks_for(ItemEventBatch(task_ids={"1"}))
+        self.assertEqual(self.svc.active_tasks.await_count, 1)
+        self.assertEqual(
+            await self.notifier._tasks_for(ItemEventBatch(task_ids={"9"})), []
+        )
+        self.assertEqual(self.svc.active_tasks.await_count, 1)
+
+    async def test_poll_delivery_updates_registry_copy(self):
+        await self.notifier._refresh_registry()
+        polled = self._task(1, "1", "https://www.olx.pl/d/a")
+        self.svc.pending_tasks.return_value = [polled]
+        self.svc.items_to_send.return_value = [{"title": "A", "item_url": "U"}]
+        await self.notifier._check_and_send_items()
+
+        self.assertIsNotNone(polled.last_got_item)
+        self.assertEqual(self.t1.last_got_item, polled.last_got_item)
+
+    async def test_event_loop_processes_named_tasks_and_polls(self):
+        from services.events import ItemEventBatch
+
+        batches = [ItemEventBatch(task_ids={"2"}), ItemEventBatch()]
+
+        async def next_batch(timeout_s):
+            if not batches:
+                raise asyncio.CancelledError
+            return batches.pop(0)
+
+        self.notifier.events.next_batch.side_effect = next_batch
+        self.svc.pending_tasks.return_value = [self.t1]
+        with self.assertRaises(asyncio.CancelledError):
+            await self.notifier.run_on_events(safety_interval_s=60)
+
+        # Safety-net poll for the pending task, then the event for task 2
+        fetched = [c.args[0] for c in self.svc.items_to_send.await_args_list]
+        self.assertEqual(fetched, [self.t1, self.t2])
+        self.svc.pending_tasks.assert_awaited_once()
@@ -0,0 +1,135 @@
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from services.outbox import NotificationOutbox
+from tools.sharding import shard_for
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover – optional test dependency
+    fakeredis = None
+
+
+def _task(task_id=7, chat_id="1", name="flats"):
+    task = MagicMock(id=task_id, chat_id=chat_id)
+    task.name = name
+    return task
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestNotificationOutbox(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.outbox = NotificationOutbox(
+            self.redis, block_ms=10, claim_idle_ms=0, max_deliveries=2
+        )
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_enqueue_and_consume_acks(self):
+        await self.outbox.enqueue(_task(), [{"title": "A"}, {"title": "B"}])
+        handler = AsyncMock()
+
+        processed = await self.outbox.consume_once(handler, "c1")
+
+        self.assertEqual(processed, 1)
+        task, items = handler.await_args.args
+        self.assertEqual((task.id, task.chat_id, task.name), (7, "1", "flats"))
+        self.assertEqual(items, [{"title": "A"}, {"title": "B"}])
+        pending = await self.redis.xpending("notifier:outbox", "notifier")
+        self.assertEqual(pending["pending"], 0)
+
+    async def test_failed_delivery_is_retried_then_dead_lettered(self):
+        await self.outbox.enqueue(_task(), [{"title": "A"}])
+        handler = AsyncMock(side_effect=RuntimeError("telegram down"))
+
+        await self.outbox.consume_once(handler, "c1")
+        # Still pending after the first failure
+        pending = await self.redis.xpending("notifier:outbox", "notifier")
+        self.assertEqual(pending["pending"], 1)
+
+        # Reclaimed and failing again -> moved to the dead-letter stream
+        await self.outbox.consume_once(handler, "c2")
+        self.assertEqual(handler.await_count, 2)
+        pending = await self.redis.xpending("notifier:outbox", "notifier")
+        self.assertEqual(pending["pending"], 0)
+        dead = await self.redis.xrange("notifier:outbox:dead")
+        self.assertEqual(len(dead), 1)
+        self.assertIn("telegram down", dead[0][1]["error"])
+
+    async def test_malformed_entry_goes_to_dead_letter(self):
+        await self.redis.xadd("notifier:outbox", {"chat_id": "1"})
+        handler = AsyncMock()
+        await self.outbox.consume_once(handler, "c1")
+        handler.assert_not_awaited()
+        self.assertEqual(len(await self.redis.xrange("notifier:outbox:dead")), 1)
+
+    async def test_consume_once_with_empty_stream(self):
+        self.assertEqual(await self.outbox.consume_once(AsyncMock(), "c1"), 0)
+
+    async def test_consumers_keep_per_chat_order(self):
+        outbox = NotificationOutbox(self.redis, block_ms=10, batch_size=1)
+        await outbox.enqueue(_task(task_id=1), [{"title": "A"}])
+        await outbox.enqueue(_task(task_id=2), [{"title": "B"}])
+        events = []
+
+        async def handler(task, items):
+            events.append(("start", task.id))
+            await asyncio.sleep(0.05 if task.id == 1 else 0)
+            events.append(("end", task.id))
+
+        processed = await asyncio.gather(
+            outbox.consume_once(handler, "c1"), outbox.consume_once(handler, "c2")
+        )
+
+        self.assertEqual(processed, [1, 1])
+        self.assertEqual(events, [("start", 1), ("end", 1), ("start", 2), ("end", 2)])
+
+    async def test_queued_entries_are_not_reclaimed(self):
+        outbox = NotificationOutbox(self.redis, block_ms=10, claim_idle_ms=0)
+        for task_id in range(3):
+            await outbox.enqueue(_task(task_id=task_id), [{"title": "A"}])
+        sent = []
+        release = asyncio.Event()
+
+        async def handler(task, items):
+            await release.wait()
+            sent.append(task.id)
+
+        first = asyncio.create_task(outbox.consume_once(handler, "c1"))
+        await asyncio.sleep(0.01)
+        # c2 sees the entries queued by c1 as idle pending entries
+        second = asyncio.create_task(outbox.consume_once(handler, "c2"))
+        await asyncio.sleep(0.05)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(first, second), [3, 0])
+        self.assertEqual(sent, [0, 1, 2])
+
+    async def test_shards_are_consumed_by_their_own_process(self):
+        chats = {shard_for(str(chat), 2): str(chat) for chat in range(10)}
+        workers = [
+            NotificationOutbox(
+                self.redis, block_ms=10, shards=2, serves=lambda i=i: (i,)
+            )
+            for i in range(2)
+        ]
+        for chat in chats.values():
+            await workers[0].enqueue(_task(chat_id=chat), [{"title": "A"}])
+        self.assertEqual(await self.redis.xlen("notifier:outbox:0"), 1)
+        self.assertEqual(await self.redis.xlen("notifier:outbox:1"), 1)
+
+        for index, worker in enumerate(workers):
+            handler = AsyncMock()
+            self.assertEqual(await worker.consume_once(handler, f"c{index}"), 1)
+            self.assertEqual(handler.await_args.args[0].chat_id, chats[index])
+
+    async def test_consume_once_without_served_shards(self):
+        outbox = NotificationOutbox(self.redis, block_ms=10, shards=4, serves=frozenset)
+        await outbox.enqueue(_task(), [{"title": "A"}])
+        handler = AsyncMock()
+        self.assertEqual(await outbox.consume_once(handler, "c1"), 0)
+        handler.assert_not_awaited()
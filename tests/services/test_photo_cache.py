@@ -0,0 +1,63 @@
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from services.photo_cache import PhotoCache
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover – optional test dependency
+    fakeredis = None
+
+
+def _message(file_id):
+    return MagicMock(photo=[MagicMock(file_id="small"), MagicMock(file_id=file_id)])
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestPhotoCache(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.cache = PhotoCache(self.redis, ttl_s=60, max_entries=2)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_set_get_and_ttl(self):
+        self.assertIsNone(await self.cache.get("http://a"))
+        await self.cache.set("http://a", "FILE_A")
+        self.assertEqual(await self.cache.get("http://a"), "FILE_A")
+        key = self.cache._key(self.cache._digest("http://a"))
+        self.assertLessEqual(await self.redis.ttl(key), 60)
+
+    async def test_lru_eviction(self):
+        await self.cache.set("http://a", "A")
+        await self.cache.set("http://b", "B")
+        # Touch "a" so that "b" becomes least recently used
+        await self.cache.get("http://a")
+        await self.cache.set("http://c", "C")
+        self.assertEqual(
+            await self.cache.get_many(["http://a", "http://b", "http://c"]),
+            ["A", None, "C"],
+        )
+        self.assertEqual(await self.redis.zcard(self.cache._lru_key), 2)
+
+    async def test_remember_and_invalidate(self):
+        await self.cache.remember_many(
+            [("http://a", _message("BIG_A")), ("http://b", MagicMock(photo=None))]
+        )
+        self.assertEqual(await self.cache.get("http://a"), "BIG_A")
+        self.assertIsNone(await self.cache.get("http://b"))
+        await self.cache.invalidate("http://a")
+        self.assertIsNone(await self.cache.get("http://a"))
+
+
+class TestPhotoCacheErrors(IsolatedAsyncioTestCase):
+    async def test_redis_errors_are_swallowed(self):
+        redis = MagicMock()
+        redis.mget = AsyncMock(side_effect=ConnectionError("down"))
+        redis.pipeline.side_effect = ConnectionError("down")
+        cache = PhotoCache(redis)
+        self.assertEqual(await cache.get_many(["u1", "u2"]), [None, None])
+        await cache.set("u", "f")
+        await cache.invalidate("u")
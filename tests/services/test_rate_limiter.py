@@ -0,0 +1,103 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from services.rate_limiter import SEND_FAILURES, TelegramRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(IsolatedAsyncioTestCase):
+    async def test_reserve_within_capacity_and_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2.0, clock=clock)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        # Third token is borrowed from the future
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        clock.now += 3
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    async def test_block_and_idle(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=1.0, clock=clock)
+        self.assertTrue(bucket.is_idle())
+        bucket.block(5)
+        self.assertFalse(bucket.is_idle())
+        self.assertAlmostEqual(bucket.reserve(), 5.0)
+
+    async def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+
+class TestTelegramRateLimiter(IsolatedAsyncioTestCase):
+    async def test_private_and_group_buckets(self):
+        clock = FakeClock()
+        limiter = TelegramRateLimiter(
+            private_rate=1.0,
+            private_burst=1,
+            group_rate=0.5,
+            group_burst=1,
+            clock=clock,
+        )
+        with patch("services.rate_limiter.asyncio.sleep", new=AsyncMock()) as sleep:
+            self.assertEqual(await limiter.acquire("1"), 0.0)
+            self.assertAlmostEqual(await limiter.acquire("1"), 1.0)
+            self.assertEqual(await limiter.acquire("-100"), 0.0)
+            self.assertAlmostEqual(await limiter.acquire("-100"), 2.0)
+        self.assertEqual(sleep.await_count, 2)
+
+    async def test_global_bucket_limits_across_chats(self):
+        clock = FakeClock()
+        limiter = TelegramRateLimiter(global_rate=2.0, clock=clock)
+        with patch("services.rate_limiter.asyncio.sleep", new=AsyncMock()):
+            await limiter.acquire("1")
+            await limiter.acquire("2")
+            self.assertAlmostEqual(await limiter.acquire("3"), 0.5)
+
+    async def test_send_honours_retry_after(self):
+        clock = FakeClock()
+        limiter = TelegramRateLimiter(clock=clock)
+        method = AsyncMock(
+            side_effect=[
+                TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=7),
+                "ok",
+            ]
+        )
+        with patch("services.rate_limiter.asyncio.sleep", new=AsyncMock()) as sleep:
+            result = await limiter.send("1", method, chat_id="1", text="x")
+        self.assertEqual(result, "ok")
+        self.assertEqual(method.await_count, 2)
+        sleep.assert_any_await(7)
+
+    async def test_send_gives_up_after_max_retries(self):
+        limiter = TelegramRateLimiter(max_retries=1, clock=FakeClock())
+        exc = TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=1)
+        method = AsyncMock(side_effect=exc)
+        with patch("services.rate_limiter.asyncio.sleep", new=AsyncMock()):
+            with self.assertRaises(TelegramRetryAfter):
+                await limiter.send("1", method)
+        self.assertEqual(method.await_count, 2)
+
+    async def test_failed_sends_are_counted_by_error_class(self):
+        limiter = TelegramRateLimiter(clock=FakeClock())
+        child = SEND_FAILURES.labels("ValueError")
+        before = child.value
+        with self.assertRaises(ValueError):
+            await limiter.send("1", AsyncMock(side_effect=ValueError("bad")))
+        self.assertEqual(child.value, before + 1)
+
+    async def test_idle_chat_buckets_are_pruned(self):
+        limiter = TelegramRateLimiter(max_chat_buckets=2, clock=FakeClock())
+        limiter._chat_bucket("1")
+        limiter._chat_bucket("2")
+        limiter._chat_bucket("3")
+        self.assertEqual(list(limiter._chats), ["3"])
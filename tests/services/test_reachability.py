@@ -0,0 +1,71 @@
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from services.reachability import ReachabilityChecker, shared_checker
+
+
+class TestReachabilityChecker(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.now = 0.0
+        self.requests = []
+        self.statuses = {}
+
+        def handler(request):
+            self.requests.append((request.method, str(request.url)))
+            status = self.statuses.get((request.method, request.url.path), 200)
+            return httpx.Response(status)
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.checker = ReachabilityChecker(
+            self.client, ttl_s=60, negative_ttl_s=5, clock=lambda: self.now
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_head_success_skips_get(self):
+        self.assertTrue(await self.checker.is_reachable("https://www.olx.pl/a"))
+        self.assertEqual(self.requests, [("HEAD", "https://www.olx.pl/a")])
+
+    async def test_falls_back_to_get(self):
+        self.statuses[("HEAD", "/a")] = 405
+        self.assertTrue(await self.checker.is_reachable("https://www.olx.pl/a"))
+        self.statuses[("GET", "/b")] = self.statuses[("HEAD", "/b")] = 404
+        self.assertFalse(await self.checker.is_reachable("https://www.olx.pl/b"))
+        self.assertEqual([m for m, _ in self.requests], ["HEAD", "GET", "HEAD", "GET"])
+
+    async def test_results_cached_by_normalized_url(self):
+        await self.checker.is_reachable("https://www.olx.pl/a?b=2&a=1#top")
+        await self.checker.is_reachable("https://WWW.olx.pl/a?a=1&b=2")
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual((self.checker.hits, self.checker.misses), (1, 1))
+        self.now = 61
+        await self.checker.is_reachable("https://www.olx.pl/a?a=1&b=2")
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_negative_results_expire_sooner(self):
+        self.statuses[("HEAD", "/a")] = self.statuses[("GET", "/a")] = 503
+        self.assertFalse(await self.checker.is_reachable("https://www.olx.pl/a"))
+        self.now = 6
+        self.statuses.clear()
+        self.assertTrue(await self.checker.is_reachable("https://www.olx.pl/a"))
+
+    async def test_transport_errors_are_unreachable(self):
+        def fail(request):
+            raise httpx.ConnectError("down")
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fail)) as client:
+            checker = ReachabilityChecker(client)
+            self.assertFalse(await checker.is_reachable("https://www.olx.pl/a"))
+
+    async def test_check_many(self):
+        self.statuses[("HEAD", "/b")] = self.statuses[("GET", "/b")] = 404
+        urls = ["https://www.olx.pl/a", "https://www.olx.pl/b", "https://www.olx.pl/a"]
+        self.assertEqual(
+            await self.checker.check_many(urls),
+            {"https://www.olx.pl/a": True, "https://www.olx.pl/b": False},
+        )
+
+    def test_shared_checker_is_reused(self):
+        self.assertIs(shared_checker(), shared_checker())
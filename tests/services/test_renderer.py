@@ -0,0 +1,84 @@
+import unittest
+
+from services.renderer import (
+    bold_markdown_v2,
+    escape_markdown_v2,
+    render_item,
+    render_items,
+)
+
+# Reference outputs of the original per-call implementation
+ITEMS = [
+    {
+        "title": "*Luksusowy dom* w okolicy [rzeki]",
+        "price": "1,500-2,000",
+        "location": "Warsaw_Center",
+        "created_at": "2025-03-04T18:05:00Z",
+        "item_url": "https://www.olx.pl/d/oferta/x-ID1.html",
+        "description": "price: 1 800 zł\ndeposit: 0\nanimals_allowed: false\n"
+        "rent: 300 zł (current: 2)",
+        "source": "OLX.pl",
+    },
+    {
+        "title": "Kawalerka",
+        "price": 2500,
+        "location": "Kraków",
+        "created_at": "not a date",
+        "item_url": "https://x.pl/a_b",
+        "description": "  price: 2500 price: again \ndeposit: 5000\n"
+        "animals_allowed: maybe\n",
+        "source": None,
+    },
+    {"title": "", "description": "", "created_at": None},
+]
+EXPECTED = [
+    "📦 *\\*Luksusowy dom\\* w okolicy \\[rzeki\\]*\n\n"
+    "💰 *Price*: 1,500\\-2,000\n"
+    "📍 *Location*: Warsaw\\_Center\n"
+    "🕒 *Posted*: 04\\.03\\.2025 \\- *18:05*\n"
+    "💵 *Price*: Price: 1 800 zł\n"
+    "🐾 *Animals*: Pets: Not allowed\n"
+    "💳 *Rent*: Additional rent: 300 zł (curAdditional rent: 2)\n"
+    "🔗 [View on OLX\\.pl](https://www\\.olx\\.pl/d/oferta/x\\-ID1\\.html)",
+    "📦 *Kawalerka*\n\n"
+    "💰 *Price*: 2500\n"
+    "📍 *Location*: Kraków\n"
+    "🕒 *Posted*: not a date\n"
+    "💵 *Price*: Price: 2500 Price: again\n"
+    "🔐 *Deposit*: Deposit: 5000\n"
+    "🔗 [View on Unknown source](https://x\\.pl/a\\_b)",
+    "📦 \n\n"
+    "💰 *Price*: N/A\n"
+    "📍 *Location*: N/A\n"
+    "🕒 *Posted*: N/A\n"
+    "🔗 [View on Unknown source](\\#)",
+]
+
+
+class TestRenderer(unittest.TestCase):
+    def test_render_item_matches_reference_output(self):
+        for item, expected in zip(ITEMS, EXPECTED):
+            self.assertEqual(render_item(item), expected)
+
+    def test_render_items_batch(self):
+        self.assertEqual(render_items(ITEMS), EXPECTED)
+        self.assertEqual(render_items([]), [])
+
+    def test_object_items_render_like_dicts(self):
+        class Obj:
+            pass
+
+        obj = Obj()
+        for key, value in ITEMS[0].items():
+            setattr(obj, key, value)
+        self.assertEqual(render_item(obj), EXPECTED[0])
+
+    def test_escape_and_bold(self):
+        self.assertEqual(escape_markdown_v2("a_b*c"), "a\\_b\\*c")
+        self.assertEqual(escape_markdown_v2(""), "")
+        self.assertIsNone(escape_markdown_v2(None))
+        self.assertEqual(bold_markdown_v2("x.y"), "*x\\.y*")
+        self.assertEqual(bold_markdown_v2(None), "")
+
+    def test_missing_description_is_tolerated(self):
+        self.assertIn("View on", render_item({"description": None}))
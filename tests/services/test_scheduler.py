@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from services.scheduler import AdaptivePollingScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2025, 3, 3, 11, 0, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+
+def _items(*minutes_ago, clock):
+    return [
+        {"created_at": (clock.now - timedelta(minutes=m)).isoformat()}
+        for m in minutes_ago
+    ]
+
+
+class TestAdaptivePollingScheduler(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = AdaptivePollingScheduler(
+            min_interval_s=10, max_interval_s=900, clock=self.clock
+        )
+
+    def _task(self, task_id):
+        return MagicMock(id=task_id, last_got_item=None)
+
+    async def test_unknown_tasks_are_due(self):
+        tasks = [self._task(1), self._task(2)]
+        self.assertEqual(self.scheduler.due(tasks), tasks)
+
+    async def test_hot_search_is_polled_fast(self):
+        task = self._task(1)
+        interval = self.scheduler.observe(task, _items(3, 2, 1, 0, clock=self.clock))
+        # One listing per minute -> poll well below a minute, busy hour faster
+        self.assertGreaterEqual(interval, 10)
+        self.assertLessEqual(interval, 15)
+        self.assertEqual(self.scheduler.due([task]), [])
+        self.clock.now += timedelta(seconds=interval)
+        self.assertEqual(self.scheduler.due([task]), [task])
+
+    async def test_cold_search_backs_off_to_max(self):
+        task = self._task(1)
+        self.scheduler.observe(task, _items(3 * 24 * 60, 0, clock=self.clock))
+        self.assertEqual(self.scheduler.interval_for(1), 900)
+
+    async def test_without_arrivals_interval_grows_within_bounds(self):
+        task = self._task(1)
+        intervals = [self.scheduler.observe(task, []) for _ in range(20)]
+        self.assertEqual(intervals[0], 15)
+        self.assertEqual(intervals, sorted(intervals))
+        self.assertEqual(intervals[-1], 900)
+
+    async def test_quiet_period_stretches_interval(self):
+        task = self._task(1)
+        hot = self.scheduler.observe(task, _items(3, 2, 1, 0, clock=self.clock))
+        self.clock.now += timedelta(hours=2)
+        cooled = self.scheduler.observe(task, [])
+        self.assertGreater(cooled, hot)
+
+    async def test_stale_tasks_are_forgotten(self):
+        self.scheduler.observe(self._task(1), [])
+        self.clock.now += timedelta(days=8)
+        self.scheduler.due([])
+        self.assertIsNone(self.scheduler.interval_for(1))
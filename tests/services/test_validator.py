@@ -31,12 +31,22 @@ class TestUrlValidator(IsolatedAsyncioTestCase):
             "https://www.olx.pl/path/",
         )
 
-    @patch("services.validator.is_valid_and_accessible", new_callable=AsyncMock)
-    async def test_is_reachable_true(self, mock_check):
-        mock_check.return_value = True
-        self.assertTrue(await self.validator.is_reachable("https://www.olx.pl/x"))
+    async def test_is_reachable_true(self):
+        checker = AsyncMock()
+        checker.is_reachable.return_value = True
+        validator = UrlValidator(checker)
+        self.assertTrue(await validator.is_reachable("https://www.olx.pl/x"))
+        checker.is_reachable.assert_awaited_once_with("https://www.olx.pl/x")
+
+    async def test_is_reachable_false(self):
+        checker = AsyncMock()
+        checker.is_reachable.return_value = False
+        self.assertFalse(
+            await UrlValidator(checker).is_reachable("https://www.olx.pl/x")
+        )
 
-    @patch("services.validator.is_valid_and_accessible", new_callable=AsyncMock)
-    async def test_is_reachable_false(self, mock_check):
-        mock_check.return_value = False
-        self.assertFalse(await self.validator.is_reachable("https://www.olx.pl/x"))
+    @patch("services.validator.shared_checker")
+    async def test_default_uses_shared_checker(self, shared):
+        shared.return_value.is_reachable = AsyncMock(return_value=True)
+        self.assertTrue(await self.validator.is_reachable("https://www.olx.pl/x"))
+        shared.assert_called_once_with()
@@ -19,3 +19,32 @@ class TestNowWarsaw(IsolatedAsyncioTestCase):
         expected = datetime.now(WARSAW_TZ).astimezone(WARSAW_TZ).replace(tzinfo=None)
         # Should be within a few seconds
         self.assertLess(abs((expected - dt).total_seconds()), 5)
+
+
+class TestToUtc(IsolatedAsyncioTestCase):
+    async def test_parses_iso_strings(self):
+        from datetime import timezone
+
+        from tools.datetime_utils import to_utc
+
+        self.assertEqual(
+            to_utc("2025-01-01T12:00:00Z"),
+            datetime(2025, 1, 1, 12, tzinfo=timezone.utc),
+        )
+        # Naive timestamps are Warsaw local time (UTC+1 in winter)
+        self.assertEqual(
+            to_utc("2025-01-01T12:00:00"),
+            datetime(2025, 1, 1, 11, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            to_utc(datetime(2025, 7, 1, 12)),
+            datetime(2025, 7, 1, 10, tzinfo=timezone.utc),
+        )
+
+    async def test_invalid_values(self):
+        from tools.datetime_utils import to_utc
+
+        self.assertIsNone(to_utc(None))
+        self.assertIsNone(to_utc(""))
+        self.assertIsNone(to_utc("yesterday"))
+        self.assertIsNone(to_utc(42))
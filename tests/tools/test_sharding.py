@@ -0,0 +1,26 @@
+import unittest
+
+from tools.sharding import shard_for
+
+
+class TestShardFor(unittest.TestCase):
+    def test_single_shard(self):
+        self.assertEqual(shard_for("123", 1), 0)
+        self.assertEqual(shard_for("123", 0), 0)
+
+    def test_stable_and_in_range(self):
+        for key in ("1", "-100200300", 42, "@channel"):
+            shard = shard_for(key, 4)
+            self.assertIn(shard, range(4))
+            self.assertEqual(shard, shard_for(key, 4))
+
+    def test_int_and_str_keys_agree(self):
+        self.assertEqual(shard_for(12345, 7), shard_for("12345", 7))
+
+    def test_spreads_keys(self):
+        shards = {shard_for(str(chat_id), 4) for chat_id in range(100)}
+        self.assertEqual(shards, {0, 1, 2, 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+from unittest import IsolatedAsyncioTestCase
+
+from tools.tracing import current_trace, reset_trace, start_trace, trace_methods, traced
+
+
+@trace_methods("repository")
+class _Repo:
+    async def get(self):
+        return await self.nested()
+
+    async def nested(self):
+        return 1
+
+    async def _private(self):
+        return 2
+
+
+class TestTracing(IsolatedAsyncioTestCase):
+    async def test_no_trace_outside_updates(self):
+        self.assertIsNone(current_trace())
+        self.assertEqual(await _Repo().get(), 1)
+
+    async def test_records_calls_per_category(self):
+        @traced("validator")
+        async def check():
+            return True
+
+        trace, token = start_trace()
+        try:
+            await _Repo().get()
+            await _Repo().nested()
+            await _Repo()._private()
+            await check()
+        finally:
+            reset_trace(token)
+        # The nested call inside get() is not counted twice
+        self.assertEqual(trace.spans["repository"][0], 2)
+        self.assertEqual(trace.spans["validator"][0], 1)
+        self.assertIsNone(current_trace())
+
+    async def test_errors_are_timed(self):
+        @traced("validator")
+        async def fail():
+            raise RuntimeError
+
+        trace, token = start_trace()
+        with self.assertRaises(RuntimeError):
+            await fail()
+        reset_trace(token)
+        self.assertEqual(trace.spans["validator"][0], 1)
+        self.assertFalse(trace.active)
@@ -17,3 +17,24 @@ WARSAW_TZ: Final = pytz.timezone("Europe/Warsaw")
 def now_warsaw() -> datetime:
     """Return current naive datetime in Europe/Warsaw timezone."""
     return datetime.now(timezone.utc).astimezone(WARSAW_TZ).replace(tzinfo=None)
+
+
+def to_utc(value: datetime | str | None) -> datetime | None:
+    """Return *value* (ISO string or datetime) as an aware UTC datetime.
+
+    Naive values are interpreted as Europe/Warsaw local time, matching the
+    timestamps written with :func:`now_warsaw`.  Returns None for empty or
+    unparsable input.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = WARSAW_TZ.localize(value)
+    return value.astimezone(timezone.utc)
@@ -0,0 +1,17 @@
+"""Stable hash partitioning of chats across notifier workers."""
+
+from __future__ import annotations
+
+import zlib
+from typing import Any
+
+
+def shard_for(key: Any, shards: int) -> int:
+    """Return the shard index in ``[0, shards)`` owning *key*.
+
+    Uses CRC32 of ``str(key)`` so the mapping is identical across processes
+    and restarts (unlike the salted built-in ``hash``).
+    """
+    if shards <= 1:
+        return 0
+    return zlib.crc32(str(key).encode("utf-8")) % shards
@@ -0,0 +1,95 @@
+"""Attribute the time of one bot update to the downstream calls it made.
+
+The update middleware starts a :class:`Trace` in a context variable; calls
+decorated with :func:`traced` (or classes with :func:`trace_methods`) add
+their duration to the trace of the update they run for.  Outside an update –
+e.g. in the notifier – there is no trace and the decorators only await.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+__all__ = [
+    "Trace",
+    "current_trace",
+    "reset_trace",
+    "start_trace",
+    "trace_methods",
+    "traced",
+]
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+
+@dataclass(slots=True)
+class Trace:
+    """Timing of one update: total start plus calls / seconds per category."""
+
+    started: float = field(default_factory=time.perf_counter)
+    handler: str = "unhandled"
+    spans: Dict[str, List[float]] = field(default_factory=dict)
+    # Categories currently being timed (nested calls are not counted twice)
+    active: set = field(default_factory=set)
+
+    def record(self, category: str, seconds: float) -> None:
+        span = self.spans.setdefault(category, [0, 0.0])
+        span[0] += 1
+        span[1] += seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace of the update being handled (None outside updates)."""
+    return _current.get()
+
+
+def start_trace() -> tuple[Trace, Token]:
+    """Begin tracing the current context; pass the token to :func:`reset_trace`."""
+    trace = Trace()
+    return trace, _current.set(trace)
+
+
+def reset_trace(token: Token) -> None:
+    _current.reset(token)
+
+
+def traced(category: str) -> Callable:
+    """Decorate a coroutine function to add its duration to *category*."""
+
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trace = _current.get()
+            if trace is None or category in trace.active:
+                return await func(*args, **kwargs)
+            trace.active.add(category)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                trace.active.discard(category)
+                trace.record(category, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+def trace_methods(category: str) -> Callable[[type], type]:
+    """Class decorator applying :func:`traced` to every public coroutine method."""
+
+    def decorate(cls: type) -> type:
+        for name, value in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(value):
+                setattr(cls, name, traced(category)(value))
+        return cls
+
+    return decorate